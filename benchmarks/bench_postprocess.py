@@ -0,0 +1,108 @@
+"""
+Microbenchmark: postprocess time per frame with and without the person-class filter
+
+Compares the old detection path (all 80 COCO classes through NMS, then a
+per-box Python loop that drops non-person boxes) with the current
+PersonDetector path (classes=[0] and max_det pushed into the model call,
+vectorized extraction into Detections).
+
+Usage:
+    python benchmarks/bench_postprocess.py [--image street.jpg] [--runs 50]
+
+Without --image the ultralytics sample 'bus.jpg' is tiled 2x2 to get a
+busy scene.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.detector import PersonDetector
+
+
+def load_busy_scene(image_path=None):
+    """Load the benchmark image, tiling the ultralytics sample by default"""
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise SystemExit(f"Cannot read image: {image_path}")
+        return frame
+    
+    from ultralytics.utils import ASSETS
+    frame = cv2.imread(str(ASSETS / 'bus.jpg'))
+    return np.vstack([np.hstack([frame, frame]), np.hstack([frame, frame])])
+
+
+def legacy_extract(result):
+    """Per-box extraction loop used before the Detections batch"""
+    detections = []
+    for box in result.boxes:
+        class_id = int(box.cls[0])
+        if class_id != 0:
+            continue
+        x1, y1, x2, y2 = box.xyxy[0].tolist()
+        detections.append({
+            'bbox': [int(x1), int(y1), int(x2), int(y2)],
+            'confidence': float(box.conf[0]),
+            'class_id': class_id,
+            'center': [int((x1 + x2) / 2), int((y1 + y2) / 2)]
+        })
+    return detections
+
+
+def run(label, predict, extract, frame, runs):
+    """Time model postprocess (NMS) and Python extraction separately"""
+    for _ in range(3):  # Warm-up
+        extract(predict(frame)[0])
+    
+    postprocess_ms, extract_ms, boxes, people = [], [], 0, 0
+    for _ in range(runs):
+        result = predict(frame)[0]
+        start = time.perf_counter()
+        detections = extract(result)
+        extract_ms.append((time.perf_counter() - start) * 1000)
+        postprocess_ms.append(result.speed['postprocess'])
+        boxes, people = len(result.boxes), len(detections)
+    
+    post, ext = np.median(postprocess_ms), np.median(extract_ms)
+    print(f"{label:<10} boxes from NMS: {boxes:4d}  people: {people:4d}  "
+          f"postprocess: {post:7.3f} ms  extraction: {ext:7.3f} ms  total: {post + ext:7.3f} ms")
+    return post + ext
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='models/yolov8n.pt', help='YOLO model path')
+    parser.add_argument('--image', help='Busy scene to benchmark on')
+    parser.add_argument('--runs', type=int, default=50, help='Timed runs per variant')
+    parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    args = parser.parse_args()
+    
+    frame = load_busy_scene(args.image)
+    detector = PersonDetector(args.model, args.conf)
+    transform = (1.0, 1.0, 0, 0)
+    
+    print(f"Frame {frame.shape[1]}x{frame.shape[0]}, {args.runs} runs, median per frame\n")
+    before = run(
+        'before',
+        lambda f: detector.model(f, verbose=False, conf=args.conf),
+        legacy_extract,
+        frame, args.runs
+    )
+    after = run(
+        'after',
+        lambda f: detector.model(f, **detector._predict_args()),
+        lambda result: detector._extract_detections(result, transform),
+        frame, args.runs
+    )
+    print(f"\nPostprocess + extraction speedup: {before / max(after, 1e-9):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
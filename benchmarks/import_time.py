@@ -0,0 +1,85 @@
+"""
+Import-time regression check for the application modules
+
+Imports each module in a fresh interpreter with `python -X importtime`
+and reports the total import time and the slowest dependencies. Fails
+(exit status 1) when a module takes longer than --budget-ms or pulls in
+a heavy package that must only be imported lazily (ultralytics, torch,
+matplotlib, ...).
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 1000] [--top 10]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by the GUI on startup
+MODULES = ['src.gui.main_window', 'src.camera_manager', 'src.detector', 'src.utils.charts']
+
+# Must only be imported when actually used
+HEAVY_PACKAGES = ['ultralytics', 'torch', 'matplotlib', 'onnxruntime', 'openvino', 'nncf']
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def measure(module):
+    """
+    Import a module in a fresh interpreter
+    
+    Returns
+    -------
+    list
+        (self_us, cumulative_us, depth, name) per imported module
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr.splitlines()[-1]}")
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=MODULES, help='Modules to check')
+    parser.add_argument('--budget-ms', type=float, default=1000, help='Max import time per module')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+    
+    failed = False
+    for module in args.modules:
+        entries = measure(module)
+        total_ms = sum(self_us for self_us, _, _, _ in entries) / 1000.0
+        heavy = sorted({
+            name.split('.')[0] for _, _, _, name in entries
+            if name.split('.')[0] in HEAVY_PACKAGES
+        })
+        ok = total_ms <= args.budget_ms and not heavy
+        failed |= not ok
+        
+        print(f"\n{module}: {total_ms:.0f} ms, {len(entries)} modules - {'PASS' if ok else 'FAIL'}")
+        if heavy:
+            print(f"  heavy packages imported eagerly: {', '.join(heavy)}")
+        top_level = sorted((entry for entry in entries if entry[2] == 1), key=lambda e: -e[1])
+        for _, cumulative_us, _, name in top_level[:args.top]:
+            print(f"  {cumulative_us / 1000.0:8.1f} ms  {name}")
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
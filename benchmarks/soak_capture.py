@@ -0,0 +1,147 @@
+"""
+Soak benchmark: capture + annotation memory and time per frame
+
+Runs the capture/annotate loop for a while with and without buffer reuse
+and reports per-frame time and resident memory over time:
+
+    before  Camera(frame_pool=0): every decode allocates a new frame, and
+            draw_detections / draw_line each copy the frame
+    after   Camera(frame_pool=8): frames are decoded into reused buffers
+            and annotations are drawn in place into one overlay buffer
+
+A steady RSS column (no upward drift) and a lower per-frame time are the
+expected result for 'after'. Frames are held for a few iterations, like
+the pipeline queues do, and handed back with Camera.recycle() once let go.
+
+Usage:
+    python benchmarks/soak_capture.py [--video clip.mp4] [--seconds 60]
+
+Without --video a synthetic 1280x720 clip with moving boxes is generated.
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.camera import Camera
+from src.counter import PeopleCounter
+from src.detections import Detections
+from src.detector import PersonDetector
+
+
+def synthetic_clip(path, frames=150, size=(1280, 720)):
+    """Write a clip of boxes walking across a noisy background"""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, size)
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for index in range(frames):
+        frame = background.copy()
+        for person in range(5):
+            x = (index * 8 + person * 250) % width
+            y = 100 + person * 110
+            cv2.rectangle(frame, (x, y), (x + 80, y + 200), (0, 200, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def rss_mb():
+    """Current resident memory in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def fake_detections(frame_index, count=5):
+    """Boxes similar to the synthetic clip's people"""
+    xyxy = np.array([[(frame_index * 8 + i * 250) % 1200, 100 + i * 110,
+                      (frame_index * 8 + i * 250) % 1200 + 80, 300 + i * 110] for i in range(count)],
+                    dtype=np.float32)
+    return Detections(xyxy, np.full(count, 0.9, dtype=np.float32), track_id=np.arange(count))
+
+
+def soak(label, video, seconds, frame_pool, in_place, hold):
+    """Run the capture/annotate loop and print time and RSS samples"""
+    camera = Camera(video, threaded=False, auto_reconnect=False, duplicate_threshold=-1,
+                    frame_pool=frame_pool)
+    if not camera.connect(attempts=1):
+        raise SystemExit(f"Cannot open video: {video}")
+    
+    detector = PersonDetector.__new__(PersonDetector)  # Drawing only, no model
+    counter = PeopleCounter(frame_width=camera.frame_width, frame_height=camera.frame_height)
+    overlay = None
+    held = deque(maxlen=hold)  # Frames still referenced downstream
+    
+    frames, busy = 0, 0.0
+    samples = []
+    started = time.monotonic()
+    next_sample = started
+    while time.monotonic() - started < seconds:
+        start = time.perf_counter()
+        ret, frame = camera.read()
+        if not ret:
+            camera.connect(attempts=1)  # Loop the clip, keeping the pool
+            continue
+        
+        detections = fake_detections(frames)
+        if in_place:
+            if overlay is None or overlay.shape != frame.shape:
+                overlay = np.empty_like(frame)
+            annotated = detector.draw_detections(frame, detections, out=overlay)
+            annotated = counter.draw_line(annotated, out=annotated)
+        else:
+            annotated = detector.draw_detections(frame, detections)
+            annotated = counter.draw_line(annotated)
+        if len(held) == held.maxlen:
+            camera.recycle(held[0])
+        held.append(frame)
+        
+        busy += time.perf_counter() - start
+        frames += 1
+        if time.monotonic() >= next_sample:
+            samples.append(rss_mb())
+            next_sample += max(seconds / 10.0, 0.5)
+    
+    stats = camera.get_stats()
+    camera.release()
+    
+    print(f"{label:<7} frames: {frames:6d}  per frame: {1000 * busy / max(frames, 1):6.2f} ms  "
+          f"decode buffers reused/allocated: {stats['reused_frames']}/{stats['allocated_frames']}")
+    print(f"        RSS MB: {' '.join(f'{sample:.0f}' for sample in samples)}")
+    return busy / max(frames, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', help='Video file to loop')
+    parser.add_argument('--seconds', type=float, default=60, help='Soak duration per variant')
+    parser.add_argument('--pool', type=int, default=8, help='Decode buffers in the reuse pool')
+    parser.add_argument('--hold', type=int, default=4, help='Frames held downstream at a time')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video
+        if not video:
+            video = os.path.join(tmp, 'soak.avi')
+            synthetic_clip(video)
+        
+        print(f"Soaking {args.seconds:.0f}s per variant on {video}\n")
+        before = soak('before', video, args.seconds, 0, False, args.hold)
+        after = soak('after', video, args.seconds, args.pool, True, args.hold)
+    print(f"\nPer-frame speedup: {before / max(after, 1e-9):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Accuracy/speed verification harness for quantized (INT8) detector models
+
+Runs the FP32 reference model and a candidate model on the same clips and
+reports, per clip:
+  - person-detection recall and precision of the candidate, using the
+    reference detections as ground truth (IoU matching)
+  - IN/OUT line-crossing counts of both models through PeopleCounter
+  - average inference time per frame
+
+Exits with status 1 when recall drops below --min-recall or the counts
+drift by more than --max-count-drift on any clip, so it can gate a
+deployment.
+
+Usage:
+    python benchmarks/verify_int8.py --candidate models/yolov8n_640_int8_openvino_model \
+        --clips recordings/door1.mp4 recordings/door2.mp4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import config
+from src.counter import PeopleCounter
+from src.detections import box_iou
+from src.detector import PersonDetector
+
+
+def match_detections(reference, candidate, iou_threshold):
+    """
+    Greedily match candidate boxes to reference boxes by IoU
+    
+    Returns
+    -------
+    int
+        Number of matched pairs
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0
+    
+    iou = box_iou(reference.xyxy, candidate.xyxy)
+    matched = 0
+    while iou.size and iou.max() >= iou_threshold:
+        row, col = np.unravel_index(iou.argmax(), iou.shape)
+        iou[row, :] = 0
+        iou[:, col] = 0
+        matched += 1
+    return matched
+
+
+def run_clip(clip, detectors, iou_threshold, frame_limit):
+    """Run every detector on one clip and collect matching, counts and timing"""
+    cap = cv2.VideoCapture(clip)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    
+    counters = {
+        name: PeopleCounter(
+            line_position=config.get('counting', 'line_position'),
+            direction=config.get('counting', 'direction'),
+            frame_height=height,
+            frame_width=width
+        )
+        for name in detectors
+    }
+    timings = {name: [] for name in detectors}
+    totals = {'reference': 0, 'candidate': 0, 'matched': 0}
+    
+    frames = 0
+    while frame_limit <= 0 or frames < frame_limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames += 1
+        
+        results = {}
+        for name, detector in detectors.items():
+            start = time.perf_counter()
+            results[name] = detector.detect(frame, track=True, stream_id=clip)
+            timings[name].append(time.perf_counter() - start)
+            counters[name].update(results[name])
+        
+        totals['reference'] += len(results['reference'])
+        totals['candidate'] += len(results['candidate'])
+        totals['matched'] += match_detections(results['reference'], results['candidate'], iou_threshold)
+    cap.release()
+    
+    return {
+        'frames': frames,
+        'recall': totals['matched'] / float(totals['reference']) if totals['reference'] else 1.0,
+        'precision': totals['matched'] / float(totals['candidate']) if totals['candidate'] else 1.0,
+        'counts': {name: counter.get_stats() for name, counter in counters.items()},
+        'ms': {name: 1000 * np.mean(values) if values else 0.0 for name, values in timings.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reference', default='models/yolov8n.pt', help='FP32 reference model')
+    parser.add_argument('--candidate', required=True, help='Quantized model to verify')
+    parser.add_argument('--clips', nargs='+', required=True, help='Recorded clips from our cameras')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for a detection to match')
+    parser.add_argument('--min-recall', type=float, default=0.95, help='Fail below this recall')
+    parser.add_argument('--max-count-drift', type=int, default=0, help='Allowed IN/OUT difference per clip')
+    parser.add_argument('--frames', type=int, default=0, help='Frames per clip (0 = all)')
+    args = parser.parse_args()
+    
+    confidence = config.get('detection', 'confidence_threshold')
+    imgsz = config.get('detection', 'imgsz', default=640)
+    detectors = {
+        'reference': PersonDetector(args.reference, confidence, imgsz=imgsz),
+        'candidate': PersonDetector(args.candidate, confidence, imgsz=imgsz)
+    }
+    
+    failed = False
+    for clip in args.clips:
+        result = run_clip(clip, detectors, args.iou, args.frames)
+        reference, candidate = result['counts']['reference'], result['counts']['candidate']
+        drift = max(abs(reference['in'] - candidate['in']), abs(reference['out'] - candidate['out']))
+        ok = result['recall'] >= args.min_recall and drift <= args.max_count_drift
+        failed |= not ok
+        
+        print(f"\n{clip} ({result['frames']} frames) - {'PASS' if ok else 'FAIL'}")
+        print(f"  recall {result['recall']:.3f}  precision {result['precision']:.3f}")
+        print(f"  counts reference IN {reference['in']} OUT {reference['out']} | "
+              f"candidate IN {candidate['in']} OUT {candidate['out']} (drift {drift})")
+        print(f"  inference reference {result['ms']['reference']:.1f} ms | "
+              f"candidate {result['ms']['candidate']:.1f} ms "
+              f"({result['ms']['reference'] / max(result['ms']['candidate'], 1e-9):.2f}x)")
+    
+    print("\nINT8 model verified" if not failed else "\nINT8 model REJECTED - counts or recall drifted")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
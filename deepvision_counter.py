@@ -11,7 +11,7 @@ import cv2
 import threading
 from datetime import datetime
 import time
-from ultralytics import YOLO
+from src.inference_server import detect_people, load_people_model
 import os
 import sys
 import json
@@ -203,7 +203,8 @@ class DeepVisionCounter:
         """Load YOLO model in background"""
         global model
         try:
-            model = YOLO("yolov8n.pt")
+            # Shares the model of a running inference server when enabled
+            model = load_people_model("yolov8n.pt")
             self.model_loaded = True
             self.safe_update_status(self.get_text('ai_ready'), self.colors['success'])
         except Exception as e:
@@ -596,7 +597,7 @@ class DeepVisionCounter:
                     break
                 
                 # Run YOLO detection
-                results = model.track(frame, persist=True, verbose=False, conf=0.45)
+                people = detect_people(model, frame)
                 
                 # Draw counting line
                 h, w = frame.shape[:2]
@@ -608,36 +609,29 @@ class DeepVisionCounter:
                            0.8, (0, 0, 255), 2)
                 
                 # Process detections
-                if results and len(results) > 0 and results[0].boxes:
-                    for box in results[0].boxes:
-                        if int(box.cls[0]) != 0:  # Only people
-                            continue
-                        
-                        x1, y1, x2, y2 = box.xyxy[0].tolist()
-                        cx, cy = int((x1 + x2) / 2), int((y1 + y2) / 2)
-                        
-                        # Draw bounding box
-                        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)),
-                                    (0, 255, 0), 2)
-                        
-                        # Track crossing
-                        if hasattr(box, 'id') and box.id is not None:
-                            track_id = int(box.id[0])
+                for (x1, y1, x2, y2), track_id in people:
+                    cx, cy = int((x1 + x2) / 2), int((y1 + y2) / 2)
+                    
+                    # Draw bounding box
+                    cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)),
+                                (0, 255, 0), 2)
+                    
+                    # Track crossing
+                    if track_id is not None:
+                        if track_id not in self.tracks:
+                            self.tracks[track_id] = cy
+                        else:
+                            prev_y = self.tracks[track_id]
                             
-                            if track_id not in self.tracks:
-                                self.tracks[track_id] = cy
-                            else:
-                                prev_y = self.tracks[track_id]
-                                
-                                # Check if crossed line
-                                if prev_y < line_y and cy >= line_y:
-                                    self.count_in += 1
-                                    self.safe_update_counts()
-                                elif prev_y > line_y and cy <= line_y:
-                                    self.count_out += 1
-                                    self.safe_update_counts()
-                                
-                                self.tracks[track_id] = cy
+                            # Check if crossed line
+                            if prev_y < line_y and cy >= line_y:
+                                self.count_in += 1
+                                self.safe_update_counts()
+                            elif prev_y > line_y and cy <= line_y:
+                                self.count_out += 1
+                                self.safe_update_counts()
+                            
+                            self.tracks[track_id] = cy
                 
                 # Display frame
                 self.display_frame(frame)
@@ -13,6 +13,8 @@ import requests
 from collections import deque
 import sqlite3
 
+from src.utils.frames import line_band_roi
+
 # ============================================================================
 # MULTI-ZONE TRACKING
 # ============================================================================
@@ -96,6 +98,31 @@ class ZoneManager:
         
         return None
     
+    def get_band_roi(self, margin, frame_size):
+        """
+        Get bounding box (x1, y1, x2, y2) of a band around all enabled zone lines
+        
+        margin is the band half-width as a fraction of the frame size across
+        each line, as in PeopleCounter.get_band_roi()
+        """
+        width, height = frame_size
+        bands = []
+        for zone in self.zones.values():
+            if not zone['enabled']:
+                continue
+            (x1, y1), (x2, y2) = zone['point1'], zone['point2']
+            across = height if abs(x2 - x1) >= abs(y2 - y1) else width
+            band = line_band_roi((x1, y1), (x2, y2), int(across * margin), width, height)
+            if band is not None:
+                bands.append(band)
+        if not bands:
+            return None
+        
+        bands = np.array(bands)
+        x1, y1 = bands[:, :2].min(axis=0)
+        x2, y2 = bands[:, 2:].max(axis=0)
+        return int(x1), int(y1), int(x2), int(y2)
+    
     def reset_zone_counts(self, zone_name=None):
         """Reset counts for a zone or all zones"""
         if zone_name:
@@ -158,13 +185,29 @@ class HeatMapTracker:
             self.heat_map[grid_y, grid_x] += 0.1
             self.max_heat = max(self.max_heat, self.heat_map[grid_y, grid_x])
     
+    def add_detections(self, detections):
+        """Add all detection centers of a frame at once (Detections or (N, 2) array)"""
+        if not self.enabled:
+            return
+        
+        centers = np.asarray(getattr(detections, 'centers', detections)).reshape(-1, 2)
+        grid = centers // self.grid_size
+        inside = ((grid[:, 0] >= 0) & (grid[:, 0] < self.grid_cols) &
+                  (grid[:, 1] >= 0) & (grid[:, 1] < self.grid_rows))
+        if not inside.any():
+            return
+        
+        grid = grid[inside].astype(np.intp)
+        np.add.at(self.heat_map, (grid[:, 1], grid[:, 0]), 0.1)
+        self.max_heat = max(self.max_heat, float(self.heat_map.max()))
+    
     def decay_heat(self):
         """Gradually decay heat over time"""
         if self.enabled:
             self.heat_map *= self.decay_rate
     
-    def get_heat_overlay(self, frame):
-        """Generate heat map overlay on frame"""
+    def get_heat_overlay(self, frame, out=None):
+        """Generate heat map overlay on frame (into the overlay buffer out if given)"""
         if not self.enabled:
             return frame
         
@@ -174,7 +217,7 @@ class HeatMapTracker:
         heat_resized = cv2.resize(heat_colored, (frame.shape[1], frame.shape[0]))
         
         # Blend with original frame
-        overlay = cv2.addWeighted(frame, 0.7, heat_resized, 0.3, 0)
+        overlay = cv2.addWeighted(frame, 0.7, heat_resized, 0.3, 0, dst=out)
         return overlay
     
     def reset(self):
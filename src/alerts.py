@@ -88,20 +88,44 @@ class AlertSystem:
         
         return None
     
-    def check_no_activity(self, minutes_since_last_count):
+    def check_no_activity(self, minutes_since_last_count, camera_health=None):
         """
         Check for unusual inactivity
         
+        A frozen or lost camera feed explains the silence, so it is
+        reported right away (at any hour) instead of as inactivity.
+        
         Parameters
         ----------
         minutes_since_last_count : int
             Minutes since last person detected
+        camera_health : dict, optional
+            {camera_id: health} from CameraManager.get_health()
         
         Returns
         -------
         dict or None
             Alert details if triggered
         """
+        dead = sorted(
+            camera_id for camera_id, health in (camera_health or {}).items()
+            if health.get('frozen') or not health.get('connected', True)
+        )
+        if dead:
+            alert = {
+                'type': 'camera_health',
+                'severity': 'high',
+                'message': f'📷 Camera feed frozen or lost: {", ".join(dead)} - check camera',
+                'timestamp': datetime.now(),
+                'cameras': {camera_id: camera_health[camera_id] for camera_id in dead}
+            }
+            
+            if self._should_trigger_alert('camera_health'):
+                self.alerts_history.append(alert)
+                logger.warning(alert['message'])
+                return alert
+            return None
+        
         # Only alert during business hours
         current_hour = datetime.now().hour
         if not (8 <= current_hour <= 20):  # 8am to 8pm
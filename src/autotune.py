@@ -0,0 +1,263 @@
+"""
+Benchmark inference settings on this PC and keep the fastest that fit
+
+Times the detector across backends, input sizes and thread counts on a
+recorded clip (or synthetic frames) and writes the best configuration
+that reaches autotune.target_fps into config/settings.yaml together with
+a fingerprint of the hardware. The app re-runs the calibration when the
+fingerprint no longer matches. A calibration that fails is stored as
+failed for that fingerprint, so the app keeps the current settings
+instead of retrying at every start.
+
+Usage:
+    python -m src.autotune [--clip recordings/door1.mp4] [--target-fps 15]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+from src.config import config
+from src.utils.logger import logger
+
+# Backend -> package it needs
+BACKEND_PACKAGES = {
+    'torch': 'torch',
+    'onnxruntime': 'onnxruntime',
+    'openvino': 'openvino'
+}
+
+IMGSZ_CANDIDATES = [320, 416, 512, 640]
+
+
+def hardware_fingerprint():
+    """
+    Get a short hash identifying the CPU, OS and installed runtimes
+    
+    Returns
+    -------
+    str
+        12-character hex fingerprint
+    """
+    info = {
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'system': platform.system(),
+        'cpus': os.cpu_count(),
+        'backends': available_backends()
+    }
+    if os.path.exists('/proc/cpuinfo'):
+        with open('/proc/cpuinfo') as f:
+            info['cpu'] = next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), '')
+    return hashlib.sha1(json.dumps(info, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def available_backends():
+    """Get the inference backends whose runtime is installed"""
+    return [
+        backend for backend, package in BACKEND_PACKAGES.items()
+        if importlib.util.find_spec(package) is not None
+    ]
+
+
+def needs_tuning():
+    """
+    Check whether the settings were tuned for different hardware
+    
+    Returns
+    -------
+    bool
+        True if auto-tuning is enabled and the stored fingerprint differs
+        (a failed calibration on this hardware counts as done)
+    """
+    if not config.get('autotune', 'enabled', default=False):
+        return False
+    return config.get('autotune', 'fingerprint', default='') != hardware_fingerprint()
+
+
+def load_frames(clip=None, count=40):
+    """
+    Get benchmark frames from a clip, or synthetic frames at camera resolution
+    
+    Synthetic frames contain moving person-sized blocks on a textured
+    background so NMS and tracking see a realistic number of boxes.
+    """
+    frames = []
+    if clip:
+        cap = cv2.VideoCapture(clip)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+        logger.warning(f"Cannot read benchmark clip {clip}, using synthetic frames")
+    
+    width, height = config.get('camera', 'resolution', default=[1280, 720])
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 5)
+    for index in range(count):
+        frame = background.copy()
+        for person in range(6):
+            x = (index * 12 + person * width // 6) % width
+            y = height // 4 + (person % 2) * height // 4
+            cv2.rectangle(frame, (x, y), (x + width // 16, y + height // 3), (60 + 30 * person, 80, 120), -1)
+        frames.append(frame)
+    return frames
+
+
+def benchmark(backend, imgsz, threads, frames, warmup=5):
+    """
+    Measure detector throughput for one configuration
+    
+    Returns
+    -------
+    float
+        Frames per second, 0 when the configuration fails to load
+    """
+    from src.detector import PersonDetector
+    
+    detector = PersonDetector(
+        config.get('detection', 'model'),
+        config.get('detection', 'confidence_threshold'),
+        detection_resolution=config.get('performance', 'detection_resolution'),
+        max_det=config.get('detection', 'max_det', default=100),
+        iou_threshold=config.get('detection', 'iou_threshold', default=0.7),
+        backend=backend, threads=threads, imgsz=imgsz
+    )
+    # The detector falls back to torch when an export fails
+    if detector.model is None or detector.backend != backend:
+        return 0.0
+    
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+    
+    start = time.perf_counter()
+    for frame in frames:
+        detector.detect(frame)
+    fps = len(frames) / max(time.perf_counter() - start, 1e-9)
+    
+    logger.info(f"Autotune {backend:<12} imgsz {imgsz:4d} threads {threads or 'auto':>4}: {fps:6.1f} FPS")
+    return fps
+
+
+def pick_best(results, target_fps):
+    """
+    Choose a configuration: the largest input size that reaches the
+    target (most accurate), the fastest among those; the fastest overall
+    when none does
+    """
+    meeting = [result for result in results if result['fps'] >= target_fps]
+    if meeting:
+        return max(meeting, key=lambda result: (result['imgsz'], result['fps']))
+    return max(results, key=lambda result: result['fps'])
+
+
+def autotune(target_fps=None, clip=None, backends=None, sizes=None, frame_count=40, save=True):
+    """
+    Benchmark this PC and store the best inference settings
+    
+    Backends and input sizes are timed first with the runtime's default
+    threads, then thread counts are tried for the chosen pair only.
+    
+    Parameters
+    ----------
+    target_fps : float, optional
+        Detector FPS to reach; defaults to autotune.target_fps
+    clip : str, optional
+        Recorded clip to benchmark on; defaults to autotune.clip
+    backends : list, optional
+        Backends to try; defaults to every installed one
+    sizes : list, optional
+        Input sizes to try
+    frame_count : int
+        Timed frames per configuration
+    save : bool
+        Write the result to settings.yaml
+    
+    Returns
+    -------
+    dict
+        Chosen configuration with backend, imgsz, threads and fps
+    """
+    target_fps = target_fps or config.get('autotune', 'target_fps', default=15)
+    clip = clip or config.get('autotune', 'clip', default='') or None
+    backends = backends or available_backends()
+    sizes = sizes or IMGSZ_CANDIDATES
+    frames = load_frames(clip, frame_count)
+    logger.info(f"Autotune: {len(frames)} frames, target {target_fps} FPS, backends {', '.join(backends)}")
+    
+    results = [
+        {'backend': backend, 'imgsz': imgsz, 'threads': 0, 'fps': benchmark(backend, imgsz, 0, frames)}
+        for backend in backends for imgsz in sizes
+    ]
+    results = [result for result in results if result['fps'] > 0]
+    if not results:
+        raise RuntimeError("No inference backend could be benchmarked")
+    best = pick_best(results, target_fps)
+    
+    # Fewer threads can be faster on small models and leave CPU for capture.
+    # Only backends whose thread count can be set are swept
+    from src.detector import PersonDetector
+    
+    cpus = os.cpu_count() or 1
+    if best['backend'] in PersonDetector.THREAD_BACKENDS:
+        for threads in sorted({max(1, cpus // 4), max(1, cpus // 2), cpus}):
+            fps = benchmark(best['backend'], best['imgsz'], threads, frames)
+            if fps > best['fps']:
+                best = dict(best, threads=threads, fps=fps)
+    
+    logger.info(f"Autotune result: {best['backend']} imgsz {best['imgsz']} "
+                f"threads {best['threads'] or 'auto'} at {best['fps']:.1f} FPS")
+    if best['fps'] < target_fps:
+        logger.warning(f"No configuration reaches {target_fps} FPS on this PC, using the fastest")
+    
+    if save:
+        config.save_values('detection', {
+            'backend': best['backend'],
+            'imgsz': best['imgsz'],
+            'threads': best['threads']
+        })
+        config.save_values('autotune', {
+            'fingerprint': hardware_fingerprint(),
+            'tuned_fps': round(best['fps'], 1),
+            'failed': False
+        })
+    return best
+
+
+def mark_failed():
+    """Record a failed calibration for this hardware, see needs_tuning()"""
+    config.save_values('autotune', {
+        'fingerprint': hardware_fingerprint(),
+        'tuned_fps': 0,
+        'failed': True
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clip', help='Recorded clip to benchmark on (default: synthetic frames)')
+    parser.add_argument('--target-fps', type=float, help='Detector FPS to reach')
+    parser.add_argument('--backends', nargs='+', choices=list(BACKEND_PACKAGES), help='Backends to try')
+    parser.add_argument('--sizes', nargs='+', type=int, help='Input sizes to try')
+    parser.add_argument('--frames', type=int, default=40, help='Timed frames per configuration')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the result')
+    args = parser.parse_args()
+    
+    best = autotune(args.target_fps, args.clip, args.backends, args.sizes, args.frames, save=not args.dry_run)
+    print(f"\nBest: backend {best['backend']}, imgsz {best['imgsz']}, "
+          f"threads {best['threads'] or 'auto'} - {best['fps']:.1f} FPS")
+
+
+if __name__ == '__main__':
+    main()
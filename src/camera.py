@@ -3,16 +3,38 @@ Camera management with auto-reconnect and error handling
 """
 
 import cv2
+import random
 import time
+import threading
+from collections import deque
+from src.utils.frames import frame_signature, FramePool
 from src.utils.logger import logger
 
 
+# Frame hand-off policies for threaded capture
+DROP_OLDEST = 'latest'     # Keep only the newest frame (live cameras, RTSP)
+LOSSLESS = 'lossless'      # Never drop, capture thread waits for the consumer (files)
+
+# Connection states, see Camera.add_state_listener()
+DISCONNECTED = 'disconnected'  # Not connected yet, or released
+CONNECTED = 'connected'
+RECONNECTING = 'reconnecting'  # Source lost, retrying in the background
+FAILED = 'failed'              # Gave up after max_reconnect_attempts
+
+
 class Camera:
     """
     Robust camera handler with auto-reconnect capability
+    
+    A lost source is reopened by a background thread with exponential
+    backoff and jitter, so read() never blocks on a dead camera: it
+    returns (False, None) until the connection is back.
     """
     
-    def __init__(self, source=0, max_reconnect_attempts=10):
+    def __init__(self, source=0, max_reconnect_attempts=10, threaded=False,
+                 drop_policy='auto', buffer_size=4, read_timeout=2.0, frame_skip=1,
+                 duplicate_threshold=2, freeze_timeout=30.0, auto_reconnect=True,
+                 reconnect_delay=1.0, max_reconnect_delay=30.0, frame_pool=8):
         """
         Initialize camera
         
@@ -21,99 +43,587 @@ class Camera:
         source : int or str
             Camera index (0, 1, 2) or video file path or RTSP URL
         max_reconnect_attempts : int
-            Maximum number of reconnection attempts
+            Maximum number of reconnection attempts (0 = retry forever)
+        threaded : bool
+            If True, a background thread owns the capture and keeps
+            grabbing frames while the caller runs detection
+        drop_policy : str
+            'latest' keeps only the newest frame, 'lossless' queues every
+            frame, 'auto' picks 'latest' for live sources and 'lossless'
+            for video files
+        buffer_size : int
+            Maximum number of queued frames in lossless mode
+        read_timeout : float
+            Seconds read() waits for the capture thread before giving up
+        frame_skip : int
+            Return every Nth frame; skipped frames are only grabbed and
+            never decoded
+        duplicate_threshold : int
+            Largest pixel change (0-255) in the frame thumbnail for a frame
+            to count as a repeat of the last frame that was not one;
+            negative disables duplicate detection
+        freeze_timeout : float
+            Seconds of bit-identical frames after which the feed is
+            reported as frozen
+        auto_reconnect : bool
+            Start reconnecting in the background when a read fails
+        reconnect_delay : float
+            Seconds before the second reconnection attempt, doubled after
+            every failure
+        max_reconnect_delay : float
+            Upper limit of the backoff delay
+        frame_pool : int
+            Frame buffers reused for decoding once they are handed back
+            with recycle() or dropped unread (0 allocates every frame)
         """
         self.source = source
         self.cap = None
         self.is_connected = False
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = max_reconnect_attempts
+        
+        # Background reconnection
+        self.state = DISCONNECTED
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._state_listeners = []
+        self._reconnect_thread = None
+        self._stop_reconnect = threading.Event()
         self.frame_width = 0
         self.frame_height = 0
         self.fps = 0
+        
+        # Frame sampling - skipped frames are grabbed but never retrieved
+        self.frame_skip = max(1, int(frame_skip))
+        self.frame_index = -1
+        self.last_timestamp = None
+        self.frame_pool = FramePool(frame_pool)
+        
+        # Repeated / frozen frame detection
+        self.duplicate_threshold = duplicate_threshold
+        self.freeze_timeout = freeze_timeout
+        self.last_frame_duplicate = False
+        self.duplicate_frames = 0
+        self.frozen = False
+        self._last_signature = None
+        self._reference_signature = None
+        self._last_change = None
+        
+        # Threaded capture state
+        self.threaded = threaded
+        if drop_policy == 'auto':
+            drop_policy = DROP_OLDEST if self.is_live_source() else LOSSLESS
+        self.drop_policy = drop_policy
+        self.buffer_size = max(1, int(buffer_size))
+        self.read_timeout = read_timeout
+        self.dropped_frames = 0
+        self._frames = deque(maxlen=1 if drop_policy == DROP_OLDEST else None)
+        self._frame_cond = threading.Condition()
+        self._capture_thread = None
+        self._capturing = False
     
-    def connect(self):
+    def is_live_source(self):
+        """
+        Check whether the source is a live stream rather than a file
+        
+        Returns
+        -------
+        bool
+            True for camera indices and network streams
+        """
+        if isinstance(self.source, int):
+            return True
+        return str(self.source).lower().startswith(('rtsp://', 'rtmp://', 'http://', 'https://'))
+    
+    def connect(self, attempts=None):
         """
         Connect to camera with retry logic
         
+        Blocks between attempts with the same backoff as the background
+        reconnection; use start_reconnect() to connect without blocking.
+        
+        Parameters
+        ----------
+        attempts : int, optional
+            Connection attempts, defaults to max_reconnect_attempts
+        
         Returns
         -------
         bool
             True if connection successful, False otherwise
         """
         logger.info(f"Attempting to connect to camera: {self.source}")
+        attempts = attempts or self.max_reconnect_attempts or 1
+        
+        for attempt in range(attempts):
+            if self._open():
+                return True
+            
+            self.reconnect_attempts = attempt + 1
+            if attempt + 1 < attempts:
+                delay = self._backoff_delay(attempt)
+                logger.info(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
+        
+        logger.error(f"Camera connection failed after {attempts} attempts")
+        self.is_connected = False
+        return False
+    
+    def _open(self):
+        """
+        Make one connection attempt
+        
+        Returns
+        -------
+        bool
+            True if the source was opened
+        """
+        try:
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                cap.release()
+                raise Exception("Camera failed to open")
+        except Exception as e:
+            logger.warning(f"Connection attempt to {self.source} failed: {e}")
+            return False
+        
+        self.cap = cap
+        
+        # Get camera properties
+        self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
+        
+        self.reconnect_attempts = 0
+        self.frame_index = -1
+        self._last_signature = None
+        self._reference_signature = None
+        self._last_change = None
+        self.frozen = False
+        logger.info(f"Camera connected successfully: {self.frame_width}x{self.frame_height} @ {self.fps}fps")
+        
+        if self.threaded:
+            if self.drop_policy == DROP_OLDEST:
+                # Don't let stale frames pile up inside OpenCV
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self._start_capture_thread()
+        
+        self.is_connected = True
+        self._set_state(CONNECTED)
+        return True
+    
+    def _backoff_delay(self, attempt):
+        """
+        Get the wait before the next connection attempt
         
-        while self.reconnect_attempts < self.max_reconnect_attempts:
+        The delay doubles after every failed attempt up to
+        max_reconnect_delay; the random jitter keeps several cameras
+        behind one failed switch from retrying in lockstep.
+        
+        Parameters
+        ----------
+        attempt : int
+            Failed attempts so far minus one
+        
+        Returns
+        -------
+        float
+            Seconds to wait
+        """
+        delay = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+    
+    def add_state_listener(self, callback):
+        """
+        Subscribe to connection state changes
+        
+        Parameters
+        ----------
+        callback : callable
+            Called as callback(camera, state) with one of DISCONNECTED,
+            CONNECTED, RECONNECTING or FAILED, from the thread that changed
+            the state
+        """
+        self._state_listeners.append(callback)
+    
+    def _set_state(self, state):
+        """Change the connection state and notify listeners"""
+        if state == self.state:
+            return
+        
+        self.state = state
+        for callback in list(self._state_listeners):
             try:
-                self.cap = cv2.VideoCapture(self.source)
-                
-                if self.cap.isOpened():
-                    # Get camera properties
-                    self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
-                    
-                    self.is_connected = True
-                    self.reconnect_attempts = 0
-                    logger.info(f"Camera connected successfully: {self.frame_width}x{self.frame_height} @ {self.fps}fps")
-                    return True
-                else:
-                    raise Exception("Camera failed to open")
-                    
+                callback(self, state)
             except Exception as e:
-                self.reconnect_attempts += 1
-                logger.warning(f"Connection attempt {self.reconnect_attempts} failed: {e}")
-                
-                if self.reconnect_attempts < self.max_reconnect_attempts:
-                    logger.info(f"Retrying in 2 seconds...")
-                    time.sleep(2)
-                else:
-                    logger.error(f"Camera connection failed after {self.max_reconnect_attempts} attempts")
-                    self.is_connected = False
-                    return False
+                logger.error(f"Camera state listener failed: {e}")
+    
+    def start_reconnect(self):
+        """
+        Reconnect in a background thread and return immediately
         
-        return False
+        Returns
+        -------
+        bool
+            True if a reconnection is now running
+        """
+        thread = self._reconnect_thread
+        if thread is not None and thread.is_alive():
+            return True
+        
+        self.is_connected = False
+        self._stop_reconnect.clear()
+        self._set_state(RECONNECTING)
+        self._reconnect_thread = threading.Thread(target=self._reconnect_loop, daemon=True)
+        self._reconnect_thread.start()
+        return True
+    
+    def _reconnect_loop(self):
+        """Retry the connection with exponential backoff (runs in separate thread)"""
+        self._close_capture()
+        
+        attempt = 0
+        while not self._stop_reconnect.is_set():
+            if self._open():
+                if self._stop_reconnect.is_set():
+                    # Released while the source was opening
+                    self._close_capture()
+                return
+            
+            attempt += 1
+            self.reconnect_attempts = attempt
+            if self.max_reconnect_attempts and attempt >= self.max_reconnect_attempts:
+                logger.error(f"Camera {self.source} could not be reconnected after {attempt} attempts")
+                self._set_state(FAILED)
+                return
+            
+            delay = self._backoff_delay(attempt - 1)
+            logger.info(f"Camera {self.source}: retrying in {delay:.1f} seconds...")
+            self._stop_reconnect.wait(delay)
     
-    def read(self):
+    def _connection_lost(self):
+        """Mark the source as lost and start reconnecting if enabled"""
+        self.is_connected = False
+        if self.auto_reconnect:
+            self.start_reconnect()
+        else:
+            self._set_state(DISCONNECTED)
+    
+    def read(self, timeout=None):
         """
         Read a frame from camera
         
+        Returns (False, None) immediately while the camera is down or
+        reconnecting. In threaded mode this returns the next frame handed
+        over by the capture thread instead of decoding on the calling thread. With
+        frame_skip > 1 only every Nth frame is decoded; its capture time
+        is stored in last_timestamp, and last_frame_duplicate tells whether
+        it repeats the previous frame.
+        
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the capture thread (threaded mode only);
+            0 polls without blocking. Defaults to read_timeout.
+        
         Returns
         -------
         tuple
-            (success, frame) - success is bool, frame is numpy array or None
+            (success, frame) - success is bool, frame is numpy array or
+            None; the caller owns the frame, see recycle()
         """
         if not self.is_connected or self.cap is None:
             return False, None
         
+        if self.threaded:
+            return self._read_threaded(timeout)
+        
         try:
-            ret, frame = self.cap.read()
+            ret, frame, timestamp, duplicate = self._grab_next()
             
             if not ret:
                 logger.warning("Failed to read frame from camera")
-                self.is_connected = False
+                self._connection_lost()
                 return False, None
             
+            self.last_timestamp = timestamp
+            self.last_frame_duplicate = duplicate
             return True, frame
             
         except Exception as e:
             logger.error(f"Error reading frame: {e}")
-            self.is_connected = False
+            self._connection_lost()
             return False, None
     
-    def reconnect(self):
+    def _grab_next(self):
+        """
+        Grab frames up to the next sampled one and decode only that frame
+        
+        Returns
+        -------
+        tuple
+            (success, frame, timestamp, duplicate) - timestamp in seconds,
+            see capture_timestamp(); duplicate is True when the frame
+            repeats the previous one
+        """
+        # Skipped frames: demux only, no decode or color conversion
+        for _ in range(self.frame_skip - 1):
+            if not self.cap.grab():
+                return False, None, None, False
+            self.frame_index += 1
+        
+        if not self.cap.grab():
+            return False, None, None, False
+        self.frame_index += 1
+        timestamp = self.capture_timestamp()
+        
+        # Decode into a free pool buffer instead of a new array
+        buffer = self.frame_pool.acquire()
+        ret, frame = self.cap.retrieve(image=buffer) if buffer is not None else self.cap.retrieve()
+        if not ret:
+            return False, None, None, False
+        self.frame_pool.adopt(buffer, frame)
+        
+        duplicate = self._check_duplicate(frame)
+        return ret, frame, timestamp, duplicate
+    
+    def _check_duplicate(self, frame):
+        """
+        Compare a frame with the previous one and track feed freezes
+        
+        Cheap cameras repeat their last frame while the stream stays up.
+        Near-identical frames are reported as duplicates so their
+        detections can be reused. They are compared with the last frame
+        that was not a duplicate, so slow motion adds up until the frame
+        is processed again. Bit-identical consecutive frames for longer
+        than freeze_timeout mark the feed as frozen (a live camera always
+        has some sensor noise).
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Decoded frame
+        
+        Returns
+        -------
+        bool
+            True if the frame repeats the last non-duplicate frame
+        """
+        if self.duplicate_threshold is None or self.duplicate_threshold < 0:
+            return False
+        
+        signature = frame_signature(frame)
+        previous, self._last_signature = self._last_signature, signature
+        now = time.monotonic()
+        reference = self._reference_signature
+        if previous is None or previous.shape != signature.shape or reference.shape != signature.shape:
+            self._reference_signature = signature
+            self._last_change = now
+            return False
+        
+        if cv2.absdiff(previous, signature).max() > 0:
+            self._last_change = now
+        
+        frozen = now - self._last_change >= self.freeze_timeout
+        if frozen != self.frozen:
+            self.frozen = frozen
+            if frozen:
+                logger.warning(f"Camera {self.source} feed frozen for {self.freeze_timeout:.0f}s")
+            else:
+                logger.info(f"Camera {self.source} feed recovered")
+        
+        duplicate = int(cv2.absdiff(reference, signature).max()) <= self.duplicate_threshold
+        if duplicate:
+            self.duplicate_frames += 1
+        else:
+            self._reference_signature = signature
+        return duplicate
+    
+    def frozen_seconds(self):
+        """
+        Get how long the feed has repeated the same frame
+        
+        Returns
+        -------
+        float
+            Seconds since the last changed frame
+        """
+        if self._last_change is None:
+            return 0.0
+        return time.monotonic() - self._last_change
+    
+    def get_health(self):
+        """
+        Get the camera health signal
+        
+        Returns
+        -------
+        dict
+            connection state, connected and frozen flags, seconds without
+            a changed frame and the number of duplicate frames
+        """
+        return {
+            'state': self.state,
+            'connected': self.is_connected,
+            'frozen': self.frozen,
+            'frozen_seconds': self.frozen_seconds(),
+            'duplicate_frames': self.duplicate_frames
+        }
+    
+    def capture_timestamp(self):
+        """
+        Get the capture time of the most recently grabbed frame
+        
+        Returns
+        -------
+        float
+            Wall-clock time for live sources, media position for files
+            (both in seconds)
+        """
+        if self.is_live_source():
+            return time.time()
+        
+        position_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        if position_ms > 0:
+            return position_ms / 1000.0
+        return self.frame_index / float(self.fps or 30)
+    
+    def recycle(self, frame):
+        """
+        Return a frame from read() whose buffer may be decoded into again
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Frame nothing refers to any more; frames that are not recycled
+            are garbage collected as usual
+        """
+        self.frame_pool.release(frame)
+    
+    def _start_capture_thread(self):
+        """Start the background thread that owns cap.read()"""
+        self._stop_capture_thread()
+        with self._frame_cond:
+            for frame, _, _ in self._frames:
+                self.frame_pool.release(frame)
+            self._frames.clear()
+        self._capturing = True
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+        logger.info(f"Threaded capture started ({self.drop_policy} policy)")
+    
+    def _stop_capture_thread(self):
+        """Stop the capture thread and wait for it to exit"""
+        with self._frame_cond:
+            self._capturing = False
+            self._frame_cond.notify_all()
+        
+        thread = self._capture_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self._capture_thread = None
+    
+    def _capture_loop(self):
+        """Keep reading frames and hand them to read() (runs in separate thread)"""
+        lost = False
+        while self._capturing:
+            try:
+                ret, frame, timestamp, duplicate = self._grab_next()
+            except Exception as e:
+                logger.error(f"Error reading frame: {e}")
+                ret, frame, timestamp, duplicate = False, None, None, False
+            
+            with self._frame_cond:
+                if not ret:
+                    logger.warning("Failed to read frame from camera")
+                    self._capturing = False
+                    self._frame_cond.notify_all()
+                    lost = True
+                    break
+                
+                if self.drop_policy == LOSSLESS:
+                    # Backpressure: wait for the consumer instead of dropping
+                    while self._capturing and len(self._frames) >= self.buffer_size:
+                        self._frame_cond.wait(0.1)
+                elif len(self._frames) == self._frames.maxlen:
+                    # Mailbox still holds an unread frame - replace it,
+                    # nobody has seen it, so its buffer is free again
+                    self.dropped_frames += 1
+                    self.frame_pool.release(self._frames.popleft()[0])
+                
+                self._frames.append((frame, timestamp, duplicate))
+                self._frame_cond.notify_all()
+        
+        if lost:
+            self._connection_lost()
+    
+    def _read_threaded(self, timeout=None):
+        """Take the next frame from the capture thread"""
+        polling = timeout is not None
+        deadline = time.monotonic() + (timeout if polling else self.read_timeout)
+        
+        with self._frame_cond:
+            while not self._frames:
+                remaining = deadline - time.monotonic()
+                if not self._capturing or remaining <= 0:
+                    if self._capturing and not polling:
+                        logger.warning("Timed out waiting for frame from camera")
+                    return False, None
+                self._frame_cond.wait(remaining)
+            
+            frame, self.last_timestamp, self.last_frame_duplicate = self._frames.popleft()
+            self._frame_cond.notify_all()
+        
+        return True, frame
+    
+    def get_stats(self):
+        """
+        Get capture statistics
+        
+        Returns
+        -------
+        dict
+            Capture mode, drop policy, queued, dropped and duplicate frame
+            counts, the frozen flag and decode buffer reuse
+        """
+        with self._frame_cond:
+            queued = len(self._frames)
+        
+        return {
+            'frame_skip': self.frame_skip,
+            'threaded': self.threaded,
+            'drop_policy': self.drop_policy,
+            'queued_frames': queued,
+            'dropped_frames': self.dropped_frames,
+            'duplicate_frames': self.duplicate_frames,
+            'frozen': self.frozen,
+            'reused_frames': self.frame_pool.reused,
+            'allocated_frames': self.frame_pool.allocated
+        }
+    
+    def reconnect(self, wait=False):
         """
         Attempt to reconnect to camera
         
+        Parameters
+        ----------
+        wait : bool
+            Block until the reconnection succeeded or gave up
+        
         Returns
         -------
         bool
-            True if reconnection successful
+            With wait, True if reconnection successful; otherwise True if
+            a background reconnection is running
         """
         logger.info("Attempting to reconnect camera...")
-        self.release()
-        time.sleep(1)
-        return self.connect()
+        self.start_reconnect()
+        if not wait:
+            return True
+        
+        self._reconnect_thread.join()
+        return self.is_connected
     
     def set_resolution(self, width, height):
         """
@@ -144,13 +654,28 @@ class Camera:
             self.cap.set(cv2.CAP_PROP_FPS, fps)
             logger.info(f"Camera FPS set to {fps}")
     
-    def release(self):
-        """Release camera resources"""
+    def _close_capture(self):
+        """Stop the capture thread and close the source"""
+        self._stop_capture_thread()
+        
         if self.cap is not None:
             self.cap.release()
+            self.cap = None
             self.is_connected = False
             logger.info("Camera released")
     
+    def release(self):
+        """Release camera resources"""
+        self._stop_reconnect.set()
+        thread = self._reconnect_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self._reconnect_thread = None
+        self.frame_pool.clear()
+        
+        self._close_capture()
+        self._set_state(DISCONNECTED)
+    
     def __del__(self):
         """Cleanup on object destruction"""
         self.release()
@@ -0,0 +1,895 @@
+"""
+Multi-camera management with one shared detector
+"""
+
+import time
+from src.camera import Camera, CONNECTED, FAILED, RECONNECTING, DROP_OLDEST, LOSSLESS
+from src.counter import PeopleCounter
+from src.detections import Detections
+from src.motion import MotionGate
+from src.pipeline import Pipeline
+from src.propagation import TrackPropagator
+from src.config import config
+from src.utils.logger import logger
+
+
+# What to do with a frame, see CameraStream.plan()
+DETECT = 'detect'      # Run the detector
+PREDICT = 'predict'    # Propagate tracks with the motion model
+REUSE = 'reuse'        # Static scene or repeated frame - keep previous detections
+
+
+class CameraStream:
+    """
+    Per-camera state: capture, counter, ROI, motion gate and DB session
+    """
+    
+    def __init__(self, camera_id, camera, zones=None):
+        """
+        Initialize camera stream
+        
+        Parameters
+        ----------
+        camera_id : str
+            Camera identifier written to the database
+        camera : Camera
+            Capture for this stream
+        zones : ZoneManager, optional
+            Extra counting lines (features_pro) the line band ROI must cover
+        """
+        self.camera_id = camera_id
+        self.camera = camera
+        self.zones = zones
+        self.counter = None
+        self.motion_gate = None
+        self.propagator = None
+        self.detect_interval = 1
+        self.uncertain_confidence = 0.0
+        self.high_motion = 1.0
+        self.roi = None
+        self.session_id = None
+        self.last_detections = Detections.empty()
+        self.logged_events = 0
+        self.frames_processed = 0
+    
+    def setup(self):
+        """Create counter, detection ROI and motion gate for the connected camera"""
+        self.counter = PeopleCounter(
+            line_position=config.get('counting', 'line_position'),
+            direction=config.get('counting', 'direction'),
+            frame_height=self.camera.frame_height,
+            frame_width=self.camera.frame_width
+        )
+        self.roi = self.get_detection_roi()
+        
+        # Skip detection while nothing moves near the counting line
+        self.motion_gate = None
+        if config.get('motion', 'enabled', default=False):
+            self.motion_gate = MotionGate(
+                method=config.get('motion', 'method', default='diff'),
+                threshold=config.get('motion', 'threshold', default=25),
+                min_area=config.get('motion', 'min_area', default=0.002),
+                cooldown_frames=config.get('motion', 'cooldown_frames', default=15),
+                max_skip_frames=config.get('motion', 'max_skip_frames', default=150)
+            )
+            self.motion_gate.set_roi(self.get_band_roi(config.get('motion', 'band_margin', default=0.3)))
+        
+        # Run the detector every N frames and predict tracks in between
+        self.detect_interval = max(1, int(config.get('performance', 'detect_interval', default=1)))
+        self.uncertain_confidence = config.get('performance', 'uncertain_confidence', default=0.6)
+        self.high_motion = config.get('motion', 'high_motion', default=0.05)
+        self.propagator = None
+        self.set_detect_interval(self.detect_interval)
+        
+        self.last_detections = Detections.empty()
+        self.logged_events = 0
+    
+    def get_detection_roi(self):
+        """
+        Get the detection ROI from performance settings
+        
+        Returns
+        -------
+        list or None
+            [x1, y1, x2, y2] or None to detect on the full frame
+        """
+        if not config.get('performance', 'use_roi'):
+            return None
+        
+        if config.get('performance', 'roi_mode', default='manual') == 'line_band':
+            return self.get_band_roi(config.get('performance', 'roi_band_margin', default=0.25))
+        
+        return config.get('performance', 'roi_coords')
+    
+    def get_band_roi(self, margin):
+        """
+        Get the band around the counting line and the zone lines
+        
+        Parameters
+        ----------
+        margin : float
+            Band half-width as a fraction of the frame size across each line
+        
+        Returns
+        -------
+        tuple or None
+            (x1, y1, x2, y2) covering every line, see PeopleCounter.get_band_roi()
+        """
+        band = self.counter.get_band_roi(margin)
+        if band is None or self.zones is None:
+            return band
+        
+        zone_band = self.zones.get_band_roi(margin, (self.camera.frame_width, self.camera.frame_height))
+        if zone_band is None:
+            return band
+        return (min(band[0], zone_band[0]), min(band[1], zone_band[1]),
+                max(band[2], zone_band[2]), max(band[3], zone_band[3]))
+    
+    def set_detect_interval(self, interval):
+        """
+        Run the detector every N frames, predicting tracks in between
+        
+        Parameters
+        ----------
+        interval : int
+            Detector interval in frames (1 = every frame)
+        """
+        self.detect_interval = max(1, int(interval))
+        if self.detect_interval > 1 and self.propagator is None:
+            self.propagator = TrackPropagator()
+    
+    def capture_info(self):
+        """
+        Get the capture time and duplicate flag of the frame just read
+        
+        Call on the thread that read the frame, before the next read;
+        frames queued for other threads carry the result along.
+        
+        Returns
+        -------
+        tuple
+            (timestamp, duplicate), see Camera.last_timestamp and
+            Camera.last_frame_duplicate
+        """
+        return self.camera.last_timestamp, self.camera.last_frame_duplicate
+    
+    def plan(self, frame, duplicate=False):
+        """
+        Decide how this frame is processed
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Current frame
+        duplicate : bool
+            The camera repeated its previous frame (from capture_info())
+        
+        Returns
+        -------
+        str
+            REUSE when the camera repeated its previous frame or the motion
+            gate reports a static scene, PREDICT between detector runs,
+            DETECT otherwise
+        """
+        if duplicate:
+            return REUSE
+        
+        if self.motion_gate is not None and not self.motion_gate.check(frame):
+            return REUSE
+        
+        if self.propagator is None:
+            return DETECT
+        
+        # Detect early when motion is strong or a track is uncertain
+        due = (self.propagator.last_time is None or
+               self.propagator.frames_since_observe + 1 >= self.detect_interval)
+        busy = self.motion_gate is not None and self.motion_gate.last_motion >= self.high_motion
+        uncertain = self.propagator.min_confidence() < self.uncertain_confidence
+        return DETECT if due or busy or uncertain else PREDICT
+    
+    def frame_time(self, timestamp):
+        """Capture time of the current frame, falling back to the frame count"""
+        if timestamp is not None:
+            return timestamp
+        return self.frames_processed / float(self.camera.fps or 30)
+    
+    def predict(self, timestamp):
+        """
+        Propagate the tracks to the current frame without the detector
+        
+        Parameters
+        ----------
+        timestamp : float or None
+            Capture time of the frame (from capture_info())
+        
+        Returns
+        -------
+        Detections
+            Predicted detections
+        """
+        return self.propagator.predict(self.frame_time(timestamp))
+    
+    def update(self, detections, timestamp, predicted=False):
+        """
+        Feed detections to the counter
+        
+        Parameters
+        ----------
+        detections : Detections
+            Detections for the current frame
+        timestamp : float or None
+            Capture time of the frame (from capture_info())
+        predicted : bool
+            True if the detections come from predict() instead of the detector
+        
+        Returns
+        -------
+        dict
+            Counter statistics
+        """
+        if self.propagator is not None and not predicted:
+            self.propagator.observe(detections, self.frame_time(timestamp))
+        
+        self.last_detections = detections
+        return self.counter.update(detections, timestamp=timestamp)
+    
+    def pop_new_events(self):
+        """
+        Get counting events not yet written to the database
+        
+        Returns
+        -------
+        list
+            New events since the last call
+        """
+        events = self.counter.events
+        if self.logged_events > len(events):
+            self.logged_events = 0  # Counter was reset
+        
+        new_events = events[self.logged_events:]
+        self.logged_events = len(events)
+        return new_events
+
+
+class CameraManager:
+    """
+    Run several camera sources through one shared PersonDetector
+    
+    Frames are taken from the cameras in round-robin order so a busy
+    camera cannot starve the others, and every result is tagged with
+    the camera_id it came from.
+    """
+    
+    def __init__(self, detector, database=None, batch_size=1, batch_latency=0.03, qos=None):
+        """
+        Initialize camera manager
+        
+        Parameters
+        ----------
+        detector : PersonDetector
+            Detector shared by all cameras
+        database : CounterDatabase, optional
+            Database for per-camera events and sessions
+        batch_size : int
+            Maximum frames (one per camera) sent through the model at once
+        batch_latency : float
+            Seconds to wait for more cameras after the first frame of a batch
+        qos : QoSController, optional
+            Adjusts resolution, frame skip and detect interval to hold a
+            target frame rate
+        """
+        self.detector = detector
+        self.qos = qos
+        self._frame_detect_time = 0.0
+        self.pipeline = None
+        self.database = database
+        self.batch_size = max(1, int(batch_size))
+        self.batch_latency = batch_latency
+        self.streams = {}
+        self.is_running = False
+        self._next_index = 0
+        
+        # Startup timing, seconds after start()
+        self.started_at = None
+        self.time_to_first_frame = None
+        self.time_to_first_count = None
+    
+    @staticmethod
+    def get_camera_configs():
+        """
+        Get camera definitions from settings
+        
+        Returns
+        -------
+        list
+            [{'id': str, 'source': int or str}, ...] from the 'cameras'
+            section; empty when a single camera is configured
+        """
+        cameras = []
+        for index, entry in enumerate(config.get('cameras', default=None) or []):
+            if not isinstance(entry, dict):
+                entry = {'source': entry}
+            cameras.append({
+                'id': str(entry.get('id', f'camera{index + 1}')),
+                'source': entry.get('source', index)
+            })
+        return cameras
+    
+    def add_camera(self, camera_id, source, zones=None):
+        """
+        Add a camera source
+        
+        Parameters
+        ----------
+        camera_id : str
+            Unique camera identifier
+        source : int or str
+            Camera index, video file path or RTSP URL
+        zones : ZoneManager, optional
+            Extra counting lines of this camera, see CameraStream
+        
+        Returns
+        -------
+        CameraStream
+            The new stream
+        """
+        if camera_id in self.streams:
+            raise ValueError(f"Duplicate camera id: {camera_id}")
+        
+        camera = Camera(
+            source,
+            threaded=config.get('camera', 'threaded_capture', default=False),
+            drop_policy=config.get('camera', 'drop_policy', default='auto'),
+            buffer_size=config.get('camera', 'buffer_size', default=4),
+            frame_skip=config.get('performance', 'frame_skip', default=1),
+            duplicate_threshold=config.get('camera', 'duplicate_threshold', default=2),
+            freeze_timeout=config.get('camera', 'freeze_timeout', default=30.0),
+            max_reconnect_attempts=config.get('camera', 'reconnect_attempts', default=10),
+            reconnect_delay=config.get('camera', 'reconnect_delay', default=1.0),
+            max_reconnect_delay=config.get('camera', 'max_reconnect_delay', default=30.0),
+            frame_pool=config.get('camera', 'frame_pool', default=8)
+        )
+        camera.add_state_listener(
+            lambda camera, state, camera_id=camera_id: self._on_camera_state(camera_id, state)
+        )
+        stream = CameraStream(camera_id, camera, zones)
+        self.streams[camera_id] = stream
+        logger.info(f"Camera {camera_id} added: {source}")
+        return stream
+    
+    def start(self):
+        """
+        Connect all cameras and open a database session for each
+        
+        Every camera gets one connection attempt here. Cameras that are
+        down keep connecting in the background and join the rotation
+        (with their own session) once their first frame arrives.
+        
+        Returns
+        -------
+        bool
+            True if at least one camera connected
+        """
+        connected = False
+        for camera_id, stream in list(self.streams.items()):
+            if stream.camera.connect(attempts=1):
+                self._activate(stream)
+                connected = True
+            else:
+                logger.warning(f"Camera {camera_id} failed to connect - retrying in the background")
+                stream.camera.start_reconnect()
+        
+        if not connected:
+            self.release()
+            return False
+        
+        self.is_running = True
+        self._next_index = 0
+        self.started_at = time.monotonic()
+        self.time_to_first_frame = None
+        self.time_to_first_count = None
+        return self.is_running
+    
+    def _activate(self, stream):
+        """Create counter and database session of a newly connected stream"""
+        stream.setup()
+        if hasattr(self.detector, 'set_line_band'):
+            # Cascade detection escalates to YOLO near the line
+            margin = config.get('cascade', 'band_margin', default=0.25)
+            self.detector.set_line_band(stream.camera_id, stream.get_band_roi(margin))
+        if self.database:
+            stream.session_id = self.database.start_session(camera_id=stream.camera_id)
+    
+    def _on_camera_state(self, camera_id, state):
+        """Log connection state changes (called from the camera's threads)"""
+        if state == RECONNECTING:
+            logger.warning(f"Camera {camera_id} lost, reconnecting in the background")
+        elif state == CONNECTED:
+            logger.info(f"Camera {camera_id} connected")
+        elif state == FAILED:
+            logger.error(f"Camera {camera_id} could not be reconnected")
+    
+    def stop(self):
+        """Signal the processing loop to exit"""
+        self.is_running = False
+    
+    def release(self):
+        """Close database sessions and release all cameras"""
+        self.is_running = False
+        for camera_id in list(self.streams):
+            self._close_stream(camera_id)
+    
+    def _close_stream(self, camera_id):
+        """End the session of one camera and release it"""
+        stream = self.streams.pop(camera_id, None)
+        if stream is None:
+            return
+        
+        if self.database and stream.session_id:
+            self._persist_events(stream)
+            stats = stream.counter.get_stats()
+            self.database.end_session(stream.session_id, stats['in'], stats['out'])
+            stream.session_id = None
+        
+        stream.camera.release()
+    
+    def next_frame(self, timeout=1.0, exclude=None):
+        """
+        Get the next frame using fair round-robin scheduling
+        
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait when no camera has a frame ready
+        exclude : set, optional
+            Camera ids to leave out of this round
+        
+        Returns
+        -------
+        tuple
+            (stream, frame), or (None, None) on timeout
+        """
+        deadline = time.monotonic() + timeout
+        
+        while self.is_running and self.streams:
+            streams = list(self.streams.values())
+            
+            for offset in range(len(streams)):
+                index = (self._next_index + offset) % len(streams)
+                stream = streams[index]
+                camera = stream.camera
+                if exclude and stream.camera_id in exclude:
+                    continue
+                
+                # Returns at once while the camera reconnects in the background
+                ret, frame = camera.read(timeout=0) if camera.threaded else camera.read()
+                if ret:
+                    if stream.counter is None:
+                        self._activate(stream)
+                    # Next round starts after the camera that was just served
+                    self._next_index = index + 1
+                    return stream, frame
+                
+                if camera.state == FAILED:
+                    self._close_stream(stream.camera_id)
+                    break
+            
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.002)
+        
+        return None, None
+    
+    def next_batch(self, timeout=1.0):
+        """
+        Collect up to batch_size frames, at most one per camera
+        
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for the first frame
+        
+        Returns
+        -------
+        list
+            [(stream, frame, timestamp, duplicate), ...], empty on timeout;
+            see CameraStream.capture_info()
+        """
+        stream, frame = self.next_frame(timeout)
+        if stream is None:
+            return []
+        
+        batch = [(stream, frame) + stream.capture_info()]
+        served = {stream.camera_id}
+        deadline = time.monotonic() + self.batch_latency
+        
+        # Trade a little latency for a fuller batch
+        while len(batch) < min(self.batch_size, len(self.streams)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            stream, frame = self.next_frame(remaining, exclude=served)
+            if stream is None:
+                break
+            batch.append((stream, frame) + stream.capture_info())
+            served.add(stream.camera_id)
+        
+        return batch
+    
+    def process(self, stream, frame):
+        """
+        Run detection and counting for one frame
+        
+        Parameters
+        ----------
+        stream : CameraStream
+            Stream the frame came from, read by next_frame() on this thread
+        frame : numpy.ndarray
+            Frame to process
+        
+        Returns
+        -------
+        tuple
+            (detections, stats) for the stream
+        """
+        timestamp, duplicate = stream.capture_info()
+        action = stream.plan(frame, duplicate)
+        if action == DETECT:
+            start = time.perf_counter()
+            detections = self.detector.detect(
+                frame,
+                track=config.get('counting', 'tracking_enabled'),
+                roi=stream.roi,
+                stream_id=stream.camera_id
+            )
+            self._record_stage('detect', time.perf_counter() - start)
+            stats = stream.update(detections, timestamp)
+        elif action == PREDICT:
+            detections = stream.predict(timestamp)
+            stats = stream.update(detections, timestamp, predicted=True)
+        else:
+            # Static scene or repeated frame - keep previous detections and track state
+            detections = stream.last_detections
+            stats = stream.counter.get_stats()
+        
+        stream.frames_processed += 1
+        self._persist_events(stream)
+        return detections, stats
+    
+    def process_batch(self, batch):
+        """
+        Run detection for a batch of frames in one forward pass
+        
+        Parameters
+        ----------
+        batch : list
+            [(stream, frame, timestamp, duplicate), ...] from next_batch()
+        
+        Returns
+        -------
+        list
+            [(stream, frame, detections, stats), ...]
+        """
+        return self._count_batch(*self._detect_batch(batch))
+    
+    def _detect_batch(self, batch):
+        """
+        Plan every frame of a batch and run the detector on those that need it
+        
+        Returns
+        -------
+        tuple
+            (batch, actions, {id(frame): detections}) for _count_batch()
+        """
+        actions = [stream.plan(frame, duplicate) for stream, frame, _, duplicate in batch]
+        pending = [item[:2] for item, action in zip(batch, actions) if action == DETECT]
+        start = time.perf_counter()
+        batch_detections = self.detector.detect_batch(
+            [frame for _, frame in pending],
+            track=config.get('counting', 'tracking_enabled'),
+            rois=[stream.roi for stream, _ in pending],
+            stream_ids=[stream.camera_id for stream, _ in pending]
+        ) if pending else []
+        self._record_stage('detect', time.perf_counter() - start)
+        detected = {id(frame): detections for (_, frame), detections in zip(pending, batch_detections)}
+        return batch, actions, detected
+    
+    def _count_batch(self, batch, actions, detected, persist=True):
+        """
+        Feed planned and detected frames to the counters
+        
+        Parameters
+        ----------
+        batch : list
+            [(stream, frame, timestamp, duplicate), ...]
+        actions : list
+            Plan of every frame
+        detected : dict
+            {id(frame): detections} for the DETECT frames
+        persist : bool
+            Write new events to the database here; otherwise they are
+            returned for a separate persistence stage
+        
+        Returns
+        -------
+        list
+            [(stream, frame, detections, stats), ...], followed by
+            [(camera_id, events), ...] when persist is False
+        """
+        results = []
+        events = []
+        for (stream, frame, timestamp, _), action in zip(batch, actions):
+            if action == DETECT:
+                stats = stream.update(detected[id(frame)], timestamp)
+            elif action == PREDICT:
+                stats = stream.update(stream.predict(timestamp), timestamp, predicted=True)
+            else:
+                # Static scene or repeated frame - keep previous detections and track state
+                stats = stream.counter.get_stats()
+            
+            stream.frames_processed += 1
+            if persist:
+                self._persist_events(stream)
+            else:
+                events.append((stream.camera_id, self._pop_events(stream)))
+            results.append((stream, frame, stream.last_detections, stats))
+        
+        return results if persist else (results, events)
+    
+    def _record_pipeline_stage(self, stage, seconds):
+        """Pipeline monitor, detect and count record their own time"""
+        if stage in ('capture', 'render'):
+            self._record_stage(stage, seconds)
+    
+    def _record_stage(self, stage, seconds):
+        """Report time spent in a pipeline stage to the QoS controller"""
+        if self.qos is not None:
+            self.qos.record(stage, seconds)
+            if stage == 'detect':
+                self._frame_detect_time += seconds
+    
+    def _persist_events(self, stream):
+        """Write new counting events of a stream to the database"""
+        self._write_events(stream.camera_id, self._pop_events(stream))
+    
+    def _pop_events(self, stream):
+        """Take the new counting events of a stream and log startup timing"""
+        events = stream.pop_new_events()
+        
+        if self.time_to_first_frame is None:
+            self.time_to_first_frame = time.monotonic() - self.started_at
+            logger.info(f"Time to first processed frame: {self.time_to_first_frame:.2f}s")
+        if events and self.time_to_first_count is None:
+            self.time_to_first_count = time.monotonic() - self.started_at
+            logger.info(f"Time to first count: {self.time_to_first_count:.2f}s (camera {stream.camera_id})")
+        return events
+    
+    def _write_events(self, camera_id, events):
+        """Write counting events of one camera to the database"""
+        if not self.database:
+            return
+        
+        for event in events:
+            self.database.log_event(
+                event['direction'],
+                event['track_id'],
+                camera_id=camera_id,
+                count_total=event['count_total']
+            )
+    
+    def run(self, on_frame=None):
+        """
+        Processing loop for all cameras (blocks until stop() is called)
+        
+        Parameters
+        ----------
+        on_frame : callable, optional
+            Called as on_frame(stream, frame, detections, stats) after
+            each processed frame; the frame is decoded into again after
+            on_frame returns, so copy anything kept
+        """
+        while self.is_running and self.streams:
+            if self.batch_size > 1:
+                self._run_batch(on_frame)
+                continue
+            
+            start = time.perf_counter()
+            stream, frame = self.next_frame()
+            if stream is None:
+                continue
+            
+            try:
+                processed = time.perf_counter()
+                self._record_stage('capture', processed - start)
+                detections, stats = self.process(stream, frame)
+                
+                rendered = time.perf_counter()
+                if on_frame:
+                    on_frame(stream, frame, detections, stats)
+                stream.camera.recycle(frame)
+                self._record_frames(1, processed, rendered)
+            except Exception as e:
+                logger.error(f"Error processing frame from camera {stream.camera_id}: {e}")
+        
+        self.is_running = False
+    
+    def _run_batch(self, on_frame):
+        """Process one batch of frames from several cameras"""
+        start = time.perf_counter()
+        batch = self.next_batch()
+        if not batch:
+            return
+        
+        try:
+            processed = time.perf_counter()
+            self._record_stage('capture', processed - start)
+            results = self.process_batch(batch)
+            
+            rendered = time.perf_counter()
+            for stream, frame, detections, stats in results:
+                if on_frame:
+                    on_frame(stream, frame, detections, stats)
+                stream.camera.recycle(frame)
+            self._record_frames(len(batch), processed, rendered)
+        except Exception as e:
+            logger.error(f"Error processing batch: {e}")
+    
+    def run_pipeline(self, on_frame=None, queue_size=2, capture_policy=DROP_OLDEST,
+                     render_policy=DROP_OLDEST):
+        """
+        Processing loop with one thread per stage (blocks until stop() is called)
+        
+        capture -> detect -> count -> persist
+                                   -> render
+        
+        Stages are connected by bounded queues, so decoding the next
+        frames and writing events to the database overlap with inference.
+        Counting and persistence queues are always lossless (counts must
+        not be lost); a full lossless queue holds back the stages before it.
+        
+        Parameters
+        ----------
+        on_frame : callable, optional
+            Called as on_frame(stream, frame, detections, stats) from the
+            render stage; the frame is decoded into again after on_frame
+            returns, so copy anything kept
+        queue_size : int
+            Capacity of every stage queue
+        capture_policy : str
+            'latest' drops the oldest captured frame when detection falls
+            behind, 'lossless' makes capture wait
+        render_policy : str
+            'latest' drops frames the renderer cannot keep up with,
+            'lossless' holds back counting instead
+        
+        Returns
+        -------
+        Pipeline
+            The finished pipeline with its statistics
+        """
+        pipeline = Pipeline(monitor=self._record_pipeline_stage)
+        pipeline.add_source('capture', self._capture_stage)
+        pipeline.add_stage('detect', self._detect_stage, queue_size, capture_policy)
+        pipeline.add_stage('count', self._count_stage, queue_size, LOSSLESS)
+        pipeline.add_stage('persist', self._persist_stage, queue_size, LOSSLESS, after='count')
+        if on_frame:
+            pipeline.add_stage(
+                'render', lambda item: self._render_stage(item, on_frame), queue_size, render_policy, after='count'
+            )
+        
+        self.pipeline = pipeline
+        pipeline.start()
+        while self.is_running and self.streams:
+            time.sleep(0.1)
+        
+        self.is_running = False
+        pipeline.stop()
+        pipeline.log_stats()
+        return pipeline
+    
+    def _capture_stage(self):
+        """
+        Pipeline source: next batch of frames (one per camera)
+        
+        Capture time and duplicate flag are taken here, with the frame; by
+        the time later stages run, the camera has moved on.
+        """
+        if self.batch_size > 1:
+            batch = self.next_batch(timeout=0.1)
+        else:
+            stream, frame = self.next_frame(timeout=0.1)
+            batch = [(stream, frame) + stream.capture_info()] if stream is not None else []
+        return batch or None
+    
+    def _detect_stage(self, batch):
+        """Pipeline stage: plan and detection"""
+        return self._detect_batch(batch)
+    
+    def _count_stage(self, detected):
+        """Pipeline stage: tracking propagation and counting"""
+        start = time.perf_counter()
+        results, events = self._count_batch(*detected, persist=False)
+        self._record_stage('count', time.perf_counter() - start)
+        
+        if self.qos is not None:
+            self._frame_detect_time = 0.0
+            self.qos.frame_done(self, len(results))
+        return results, events
+    
+    def _persist_stage(self, counted):
+        """Pipeline stage: database writes"""
+        for camera_id, events in counted[1]:
+            self._write_events(camera_id, events)
+        return counted
+    
+    def _render_stage(self, counted, on_frame):
+        """Pipeline stage: on_frame callbacks"""
+        for stream, frame, detections, stats in counted[0]:
+            on_frame(stream, frame, detections, stats)
+            stream.camera.recycle(frame)
+        return counted
+    
+    def _record_frames(self, count, processed, rendered):
+        """
+        Report finished frames to the QoS controller
+        
+        Parameters
+        ----------
+        count : int
+            Frames finished
+        processed : float
+            perf_counter() when processing started
+        rendered : float
+            perf_counter() when the on_frame callbacks started
+        """
+        if self.qos is None:
+            return
+        
+        # Processing time besides the detector: motion gate, tracking, counting
+        self.qos.record('count', max(rendered - processed - self._frame_detect_time, 0.0))
+        self.qos.record('render', time.perf_counter() - rendered)
+        self._frame_detect_time = 0.0
+        self.qos.frame_done(self, count)
+    
+    def get_stream(self, camera_id):
+        """Get a stream by camera id"""
+        return self.streams.get(camera_id)
+    
+    def get_stats(self):
+        """
+        Get counts for every camera
+        
+        Returns
+        -------
+        dict
+            {camera_id: counter statistics}
+        """
+        return {
+            camera_id: stream.counter.get_stats()
+            for camera_id, stream in list(self.streams.items())
+            if stream.counter is not None
+        }
+    
+    def get_health(self):
+        """
+        Get the health signal of every camera
+        
+        Returns
+        -------
+        dict
+            {camera_id: Camera.get_health()}, see AlertSystem.check_no_activity()
+        """
+        return {
+            camera_id: stream.camera.get_health()
+            for camera_id, stream in list(self.streams.items())
+        }
+    
+    def reset_counters(self):
+        """Reset the counters of all cameras"""
+        for stream in list(self.streams.values()):
+            if stream.counter is not None:
+                stream.counter.reset()
+                stream.logged_events = 0
+            if stream.propagator is not None:
+                stream.propagator.reset()
+            self.detector.reset_tracking(stream.camera_id)
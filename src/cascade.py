@@ -0,0 +1,308 @@
+"""
+Two-tier person detection: a cheap OpenCV screen in front of YOLO
+"""
+
+import cv2
+import numpy as np
+from pathlib import Path
+from src.detections import Detections, box_iou
+from src.utils.frames import resize_to_fit, clip_roi
+from src.utils.logger import logger
+
+
+class CheapDetector:
+    """
+    Base class of the screening tier
+    
+    Subclasses implement _detect() on a downscaled crop; boxes are mapped
+    back to source frame coordinates here.
+    """
+    
+    def __init__(self, input_width=400, confidence_threshold=0.4):
+        """
+        Initialize screening detector
+        
+        Parameters
+        ----------
+        input_width : int
+            Width the frame (or ROI crop) is downscaled to
+        confidence_threshold : float
+            Minimum confidence of reported people
+        """
+        self.input_width = input_width
+        self.confidence_threshold = confidence_threshold
+    
+    def detect(self, frame, roi=None):
+        """
+        Detect people in frame
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Input frame
+        roi : list, optional
+            [x1, y1, x2, y2] crop to screen
+        
+        Returns
+        -------
+        Detections
+            Untracked person boxes in source frame coordinates
+        """
+        offset_x, offset_y = 0, 0
+        if roi:
+            roi = clip_roi(roi, frame.shape[1], frame.shape[0])
+            if roi is None:
+                return Detections.empty()
+            offset_x, offset_y, x2, y2 = roi
+            frame = frame[offset_y:y2, offset_x:x2]
+        
+        max_height = int(self.input_width * frame.shape[0] / float(frame.shape[1]))
+        small, (scale_x, scale_y) = resize_to_fit(frame, [self.input_width, max_height])
+        xyxy, confidence = self._detect(small)
+        
+        keep = confidence >= self.confidence_threshold
+        xyxy = xyxy[keep] * np.array([scale_x, scale_y, scale_x, scale_y]) + \
+            np.array([offset_x, offset_y, offset_x, offset_y])
+        return Detections(xyxy, confidence[keep])
+    
+    def _detect(self, frame):
+        """Return (N, 4) xyxy boxes and (N,) confidences for a small frame"""
+        raise NotImplementedError
+
+
+class HOGPersonDetector(CheapDetector):
+    """OpenCV's built-in HOG + linear SVM people detector (no model file)"""
+    
+    @staticmethod
+    def available():
+        """Check for cv2.HOGDescriptor, which OpenCV 5 no longer ships"""
+        return hasattr(cv2, 'HOGDescriptor')
+    
+    def __init__(self, input_width=400, confidence_threshold=0.4):
+        """Initialize HOG detector, see CheapDetector"""
+        super().__init__(input_width, confidence_threshold)
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+    
+    def _detect(self, frame):
+        """Run the HOG sliding-window detector"""
+        rects, weights = self.hog.detectMultiScale(frame, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(rects) == 0:
+            return np.empty((0, 4)), np.empty(0)
+        
+        rects = np.asarray(rects, dtype=np.float32).reshape(-1, 4)
+        xyxy = np.hstack([rects[:, :2], rects[:, :2] + rects[:, 2:]])
+        # SVM margins are unbounded, squash them to 0-1
+        confidence = 1.0 / (1.0 + np.exp(-np.asarray(weights, dtype=np.float32).reshape(-1)))
+        return xyxy, confidence
+
+
+class SSDPersonDetector(CheapDetector):
+    """MobileNet-SSD (Caffe, VOC classes) through cv2.dnn"""
+    
+    PERSON_CLASS = 15  # VOC 'person'
+    
+    def __init__(self, config_path, model_path, input_width=300, confidence_threshold=0.4):
+        """
+        Initialize MobileNet-SSD detector
+        
+        Parameters
+        ----------
+        config_path : str
+            Caffe .prototxt
+        model_path : str
+            Caffe .caffemodel
+        input_width : int
+            Network input size (square blob), the model was trained at 300
+        confidence_threshold : float
+            Minimum confidence of reported people
+        """
+        super().__init__(input_width, confidence_threshold)
+        self.net = cv2.dnn.readNetFromCaffe(str(config_path), str(model_path))
+    
+    def _detect(self, frame):
+        """Run one MobileNet-SSD forward pass"""
+        height, width = frame.shape[:2]
+        size = (self.input_width, self.input_width)
+        blob = cv2.dnn.blobFromImage(frame, 0.007843, size, 127.5)
+        self.net.setInput(blob)
+        output = self.net.forward().reshape(-1, 7)
+        
+        people = output[output[:, 1] == self.PERSON_CLASS]
+        xyxy = np.clip(people[:, 3:7], 0, 1) * np.array([width, height, width, height])
+        return xyxy, people[:, 2]
+
+
+class CascadeDetector:
+    """
+    PersonDetector wrapper that only runs YOLO when the cheap tier needs it
+    
+    Every frame is screened by the cheap detector. YOLO runs when the
+    screen finds someone near the counting line, or when any screened box
+    is below escalate_confidence; otherwise the screened boxes are used
+    (and tracked with the detector's built-in tracker). With any other
+    tracker every tracked frame goes to YOLO, so track IDs come from one
+    tracker. Both tiers return the same Detections, so counting is
+    unchanged.
+    """
+    
+    def __init__(self, detector, cheap, escalate_confidence=0.7):
+        """
+        Initialize cascade
+        
+        Parameters
+        ----------
+        detector : PersonDetector
+            Accurate tier (local detector or InferenceClient)
+        cheap : CheapDetector
+            Screening tier
+        escalate_confidence : float
+            Screened boxes below this confidence send the frame to YOLO
+        """
+        self.detector = detector
+        self.cheap = cheap
+        self.escalate_confidence = escalate_confidence
+        self.line_bands = {}
+        self.frames = 0
+        self.escalated = 0
+    
+    @classmethod
+    def from_config(cls, detector, settings):
+        """
+        Wrap a detector according to the 'cascade' settings
+        
+        Parameters
+        ----------
+        detector : PersonDetector
+            Accurate tier
+        settings : dict
+            cascade section of the config
+        
+        Returns
+        -------
+        CascadeDetector or PersonDetector
+            The cascade, or the detector itself if the cheap tier cannot be
+            created
+        """
+        tier = settings.get('tier', 'hog')
+        if tier != 'ssd' and not HOGPersonDetector.available():
+            logger.warning(f"OpenCV {cv2.__version__} has no HOG people detector, "
+                           f"using the 'ssd' screening tier instead (cascade.ssd_config / ssd_model)")
+            tier = 'ssd'
+        width = settings.get('input_width', 400)
+        confidence = settings.get('confidence', 0.5)
+        try:
+            if tier == 'ssd':
+                config_path, model_path = Path(settings['ssd_config']), Path(settings['ssd_model'])
+                if not (config_path.exists() and model_path.exists()):
+                    raise FileNotFoundError(f"MobileNet-SSD files not found: {config_path}, {model_path}")
+                cheap = SSDPersonDetector(config_path, model_path, width, confidence)
+            else:
+                cheap = HOGPersonDetector(width, confidence)
+        except Exception as e:
+            logger.error(f"Cascade disabled, cannot create '{tier}' screening tier: {e}")
+            return detector
+        
+        logger.info(f"Cascade detection enabled ({tier} screen, YOLO near the line)")
+        return cls(detector, cheap, settings.get('escalate_confidence', 0.7))
+    
+    def __getattr__(self, name):
+        # model, ready, wait_ready, roi, ... of the YOLO tier
+        return getattr(self.detector, name)
+    
+    @property
+    def imgsz(self):
+        """Model input size of the YOLO tier (adjusted by QoS)"""
+        return getattr(self.detector, 'imgsz', None)
+    
+    @imgsz.setter
+    def imgsz(self, value):
+        self.detector.imgsz = value
+    
+    def set_line_band(self, stream_id, band):
+        """
+        Set the region around a stream's counting line
+        
+        Parameters
+        ----------
+        stream_id : str
+            Camera identifier
+        band : tuple
+            (x1, y1, x2, y2) band around the line; people overlapping it
+            are always detected with YOLO
+        """
+        self.line_bands[stream_id] = band
+    
+    def _needs_escalation(self, screened, stream_id):
+        """Check whether the screened boxes are good enough to count with"""
+        if len(screened) == 0:
+            return False
+        if screened.confidence.min() < self.escalate_confidence:
+            return True
+        
+        band = self.line_bands.get(stream_id)
+        if band is None:
+            return True  # Line unknown, every person could be crossing
+        return bool(box_iou(screened.xyxy, [band]).max() > 0)
+    
+    def detect(self, frame, track=False, roi=None, stream_id=None):
+        """Detect people in frame, see PersonDetector.detect()"""
+        return self.detect_batch([frame], track, [roi], [stream_id])[0]
+    
+    def detect_batch(self, frames, track=False, rois=None, stream_ids=None):
+        """Detect people in several frames, see PersonDetector.detect_batch()"""
+        rois = rois or [None] * len(frames)
+        stream_ids = stream_ids or [None] * len(frames)
+        
+        # Screened boxes can only be tracked with the local built-in tracker.
+        # A remote detector tracks on the server and model.track() keeps its
+        # own IDs, so mixing in screened frames would give a person two IDs
+        tracker = None
+        if track and getattr(self.detector, 'tracker', None) == 'builtin':
+            tracker = getattr(self.detector, 'stream_tracker', None)
+        
+        results = []
+        escalate = []
+        for index, (frame, roi, stream_id) in enumerate(zip(frames, rois, stream_ids)):
+            if track and tracker is None:
+                # Untrackable screen, no point in running it
+                results.append(None)
+                escalate.append(index)
+                continue
+            screened = self.cheap.detect(frame, roi if roi is not None else self.detector.roi)
+            results.append(screened)
+            if self._needs_escalation(screened, stream_id):
+                escalate.append(index)
+        
+        self.frames += len(frames)
+        self.escalated += len(escalate)
+        
+        # Accurate tier for the frames that need it, one batch
+        accurate = self.detector.detect_batch(
+            [frames[i] for i in escalate], track=track,
+            rois=[rois[i] for i in escalate], stream_ids=[stream_ids[i] for i in escalate]
+        ) if escalate else []
+        for index, detections in zip(escalate, accurate):
+            results[index] = detections
+        
+        if tracker is not None:
+            # Keep tracks alive through screened frames
+            for index, stream_id in enumerate(stream_ids):
+                if index not in escalate:
+                    results[index] = tracker.update(stream_id, results[index])
+        return results
+    
+    def get_stats(self):
+        """
+        Get escalation statistics
+        
+        Returns
+        -------
+        dict
+            frames, escalated and escalation ratio
+        """
+        return {
+            'frames': self.frames,
+            'escalated': self.escalated,
+            'escalation_ratio': self.escalated / float(self.frames) if self.frames else 0.0
+        }
@@ -3,6 +3,7 @@ Configuration management for Customer Counter Pro
 Loads settings from YAML file with sensible defaults
 """
 
+import threading
 import yaml
 from pathlib import Path
 from typing import Any, Dict
@@ -17,16 +18,79 @@ class Config:
         'camera': {
             'source': 0,
             'resolution': [1280, 720],
-            'fps': 30
+            'fps': 30,
+            'threaded_capture': True,
+            'drop_policy': 'auto',  # 'auto', 'latest' or 'lossless'
+            'buffer_size': 4,
+            'duplicate_threshold': 2,  # Max thumbnail pixel change of a repeated frame (-1 = off)
+            'freeze_timeout': 30.0,  # Seconds of identical frames before the feed counts as frozen
+            'reconnect_attempts': 10,  # Background reconnection attempts (0 = forever)
+            'reconnect_delay': 1.0,  # First retry delay in seconds, doubled per failure
+            'max_reconnect_delay': 30.0,  # Backoff limit in seconds
+            'frame_pool': 8  # Reused decode buffers per camera (0 = allocate every frame)
         },
+        'cameras': [],  # Multi-camera sites: [{'id': 'door1', 'source': 0}, ...]
         'detection': {
             'model': 'models/yolov8n.pt',
-            'confidence_threshold': 0.5
+            'confidence_threshold': 0.5,
+            'max_det': 100,  # Max people per frame after NMS
+            'iou_threshold': 0.7,  # NMS IoU threshold
+            'backend': 'torch',  # 'torch', 'onnxruntime' or 'openvino'
+            'threads': 0,  # Inference CPU threads (0 = runtime default, torch only)
+            'imgsz': 640  # Model input size
+        },
+        'cascade': {
+            'enabled': False,  # Screen frames with a cheap detector, YOLO only when needed
+            'tier': 'hog',  # 'hog' (built into OpenCV 4) or 'ssd' (MobileNet-SSD files below, also the fallback without HOG)
+            'ssd_config': 'models/MobileNetSSD_deploy.prototxt',
+            'ssd_model': 'models/MobileNetSSD_deploy.caffemodel',
+            'input_width': 400,
+            'confidence': 0.5,
+            'escalate_confidence': 0.7,
+            'band_margin': 0.25  # People this close to the line always go to YOLO
         },
         'counting': {
             'line_position': 0.5,  # 50% from top
             'direction': 'vertical',  # or 'horizontal'
-            'tracking_enabled': True
+            'tracking_enabled': True,
+            'tracker': 'builtin',  # 'builtin' (per-camera state) or 'ultralytics'
+            'track_buffer': 30  # Frames a lost track is kept
+        },
+        'workers': {
+            'enabled': False,  # One process per camera, parent owns database and GUI
+            'preview_fps': 10,  # Preview frames per second sent by each worker
+            'heartbeat_timeout': 15.0,  # Restart a worker silent for this many seconds
+            'startup_timeout': 120.0,  # Time a worker has for model load and first heartbeat
+            'restart_delay': 1.0  # First restart delay in seconds, doubled per crash
+        },
+        'pipeline': {
+            'enabled': False,  # One thread per stage (capture, detect, count, persist, render)
+            'queue_size': 2,  # Items buffered between stages
+            'capture_policy': 'latest',  # 'latest' drops old frames when detection lags, 'lossless' waits
+            'render_policy': 'latest'  # 'latest' drops frames the display cannot keep up with
+        },
+        'qos': {
+            'enabled': False,  # Adapt quality to hold target_fps
+            'target_fps': 15,  # Processed frames per second per camera
+            'min_imgsz': 320,  # Model input size floor
+            'max_frame_skip': 3,
+            'max_detect_interval': 4
+        },
+        'autotune': {
+            'enabled': True,  # Benchmark at first start and when the hardware changes
+            'target_fps': 15,
+            'clip': '',  # Recorded clip to benchmark on (empty = synthetic)
+            'fingerprint': '',  # Hardware the settings were tuned for
+            'tuned_fps': 0,
+            'failed': False  # Calibration failed on this hardware, not retried at start
+        },
+        'inference_server': {
+            'enabled': False,  # Use a running 'python -m src.inference_server'
+            'socket_path': '/tmp/deepvision_inference.sock',
+            'port': 47615,  # Used instead of the socket on Windows
+            'authkey_file': '~/.deepvision/inference.key',  # Random key, created user-only on first use
+            'batch_size': 4,
+            'batch_latency_ms': 10
         },
         'display': {
             'show_boxes': True,
@@ -52,11 +116,27 @@ class Config:
             'version': '1.0.0'
         },
         'performance': {
-            'frame_skip': 1,
+            'frame_skip': 1,  # Decode and detect every Nth frame
             'detection_resolution': [640, 480],
             'display_resolution': [1280, 720],
             'use_roi': False,
-            'roi_coords': [0, 0, 1280, 720]
+            'roi_mode': 'manual',  # 'manual' (roi_coords) or 'line_band'
+            'roi_coords': [0, 0, 1280, 720],
+            'roi_band_margin': 0.25,  # Band half-width around the line (fraction of frame)
+            'batch_size': 1,  # Frames from different cameras per forward pass
+            'batch_latency_ms': 30,  # Max wait to fill a batch
+            'detect_interval': 1,  # Run the detector every N frames, predict tracks in between
+            'uncertain_confidence': 0.6  # Detect early when a track is less confident
+        },
+        'motion': {
+            'enabled': False,
+            'method': 'diff',  # 'diff' or 'mog2'
+            'threshold': 25,
+            'min_area': 0.002,
+            'cooldown_frames': 15,
+            'max_skip_frames': 150,
+            'band_margin': 0.3,
+            'high_motion': 0.05  # Motion level that forces a detection between intervals
         },
         'analytics': {
             'enabled': True,
@@ -117,6 +197,55 @@ class Config:
         except Exception as e:
             logger.error(f"Error saving config file: {e}")
     
+    def save_values(self, section, values):
+        """
+        Set values of one section and write only those to the YAML file
+        
+        Unlike save(), the rest of the file including its comments is
+        kept as is.
+        
+        Parameters
+        ----------
+        section : str
+            Top-level section, e.g. 'detection'
+        values : dict
+            {key: value} to set in that section
+        """
+        for key, value in values.items():
+            self.set(section, key, value=value)
+        
+        try:
+            lines = self.config_path.read_text().splitlines() if self.config_path.exists() else []
+            
+            # Find the section block
+            start = next((i for i, line in enumerate(lines) if line.rstrip() == f"{section}:"), None)
+            if start is None:
+                lines += ['', f"{section}:"]
+                start = len(lines) - 1
+            end = start + 1
+            while end < len(lines) and (lines[end].startswith(' ') or not lines[end].strip()):
+                end += 1
+            while end > start + 1 and not lines[end - 1].strip():
+                end -= 1
+            
+            for key, value in values.items():
+                text = yaml.safe_dump(value, default_flow_style=True).strip()
+                text = text[:-3].strip() if text.endswith('...') else text
+                for i in range(start + 1, end):
+                    if lines[i].startswith(f"  {key}:"):
+                        comment = lines[i].find('  #')
+                        lines[i] = f"  {key}: {text}" + (lines[i][comment:] if comment > 0 else '')
+                        break
+                else:
+                    lines.insert(end, f"  {key}: {text}")
+                    end += 1
+            
+            self.config_path.parent.mkdir(parents=True, exist_ok=True)
+            self.config_path.write_text('\n'.join(lines) + '\n')
+            logger.info(f"Updated {section} settings in {self.config_path}")
+        except Exception as e:
+            logger.error(f"Error saving config file: {e}")
+    
     def get(self, *keys, default=None):
         """
         Get configuration value using dot notation
@@ -175,6 +304,39 @@ class Config:
                 base_dict[key] = value
 
 
+class LazyConfig:
+    """
+    Global config handle that reads settings.yaml on first use
+    
+    Importing a module that uses `config` stays cheap; the Config is
+    created the first time a setting is read or changed.
+    """
+    
+    def __init__(self, config_path='config/settings.yaml'):
+        """
+        Initialize lazy configuration
+        
+        Parameters
+        ----------
+        config_path : str
+            Path to YAML configuration file
+        """
+        self._config_path = config_path
+        self._config = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        """Create the Config once, thread-safe"""
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._config = Config(self._config_path)
+        return self._config
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+
 # Global config instance
-config = Config()
+config = LazyConfig()
 
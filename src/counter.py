@@ -3,8 +3,11 @@ People counting logic with IN/OUT tracking using virtual line crossing
 """
 
 import cv2
+import numpy as np
 from datetime import datetime
+from src.detections import Detections
 from src.utils.logger import logger
+from src.utils.frames import line_band_roi, annotation_target
 
 
 class PeopleCounter:
@@ -38,8 +41,9 @@ class PeopleCounter:
         # Calculate line coordinates
         self._update_line_coords()
         
-        # Tracking data: {track_id: {'last_pos': y or x, 'counted': bool}}
-        self.tracks = {}
+        # Tracks of the last update as parallel arrays: track ID (the ID
+        # map), position along the counting axis and counted flag
+        self._reset_tracks()
         
         # Counters
         self.count_in = 0
@@ -49,8 +53,27 @@ class PeopleCounter:
         # History for events
         self.events = []
         
+        # Capture time of the last update and the gap since the one before
+        self.last_timestamp = None
+        self.frame_interval = None
+        
         logger.info(f"Counter initialized: {direction} line at {line_position}")
     
+    def _reset_tracks(self):
+        """Forget all tracks"""
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.track_pos = np.empty(0, dtype=np.float64)
+        self.track_counted = np.empty(0, dtype=bool)
+    
+    @property
+    def tracks(self):
+        """Tracking data as {track_id: {'last_pos': y or x, 'counted': bool}}"""
+        return {
+            track_id: {'last_pos': pos, 'counted': counted}
+            for track_id, pos, counted in zip(self.track_ids.tolist(), self.track_pos.tolist(),
+                                              self.track_counted.tolist())
+        }
+    
     def _update_line_coords(self):
         """Update line coordinates based on frame size"""
         if self.direction == 'vertical':
@@ -79,103 +102,136 @@ class PeopleCounter:
         self.frame_width = width
         self._update_line_coords()
     
-    def update(self, detections):
+    def get_band_roi(self, margin=0.25):
+        """
+        Get a region of interest covering a band around the counting line
+        
+        Parameters
+        ----------
+        margin : float
+            Band half-width as a fraction of the frame size across the line
+        
+        Returns
+        -------
+        tuple or None
+            (x1, y1, x2, y2) in frame pixels
+        """
+        across = self.frame_height if self.direction == 'vertical' else self.frame_width
+        return line_band_roi(self.line_start, self.line_end, int(across * margin),
+                             self.frame_width, self.frame_height)
+    
+    def update(self, detections, timestamp=None):
         """
         Update counter with new detections
         
         Parameters
         ----------
-        detections : list
-            List of detections from PersonDetector with 'track_id' and 'center'
+        detections : Detections
+            Detections from PersonDetector; only tracked ones are counted.
+            A legacy list of dicts with 'track_id' and 'bbox' is accepted too.
+        timestamp : float, optional
+            Capture time of the frame in seconds (Camera.last_timestamp).
+            Needed when frames are skipped so the real time between
+            samples is known.
         
         Returns
         -------
         dict
             Counter statistics
         """
-        # Get current tracked IDs
-        current_ids = set()
-        
-        for det in detections:
-            if 'track_id' not in det:
-                continue
-            
-            track_id = det['track_id']
-            center_x, center_y = det['center']
-            current_ids.add(track_id)
-            
-            # Get relevant coordinate based on direction
-            current_pos = center_y if self.direction == 'vertical' else center_x
-            
-            # Check if this is a new track
-            if track_id not in self.tracks:
-                self.tracks[track_id] = {
-                    'last_pos': current_pos,
-                    'counted': False
-                }
-                continue
-            
-            # Get previous position
-            last_pos = self.tracks[track_id]['last_pos']
-            
-            # Check if not yet counted and crossed the line
-            if not self.tracks[track_id]['counted']:
-                if self._crossed_line(last_pos, current_pos):
-                    # Determine direction
-                    if current_pos > last_pos:
-                        # Moving down/right (IN)
-                        self.count_in += 1
-                        direction = 'IN'
-                    else:
-                        # Moving up/left (OUT)
-                        self.count_out += 1
-                        direction = 'OUT'
-                    
-                    self.count_total = self.count_in - self.count_out
-                    self.tracks[track_id]['counted'] = True
-                    
-                    # Log event
-                    event = {
-                        'timestamp': datetime.now(),
-                        'track_id': track_id,
-                        'direction': direction,
-                        'count_total': self.count_total
-                    }
-                    self.events.append(event)
-                    
-                    logger.info(f"Person {track_id} counted: {direction} | Total: {self.count_total}")
-            
-            # Update last position
-            self.tracks[track_id]['last_pos'] = current_pos
-        
-        # Clean up old tracks that are no longer detected
-        disappeared_ids = set(self.tracks.keys()) - current_ids
-        for track_id in disappeared_ids:
-            del self.tracks[track_id]
+        if timestamp is not None:
+            if self.last_timestamp is not None:
+                self.frame_interval = timestamp - self.last_timestamp
+            self.last_timestamp = timestamp
+        
+        detections = Detections.from_dicts(detections)
+        tracked = detections[detections.tracked]
+        
+        # Relevant center coordinate of every track based on direction
+        axis = 1 if self.direction == 'vertical' else 0
+        track_ids = tracked.track_id
+        positions = tracked.centers[:, axis]
+        
+        # Previous state of every track: trackers usually report the same
+        # tracks in the same order as last frame, otherwise use the ID map
+        if len(track_ids) == len(self.track_ids) and (track_ids == self.track_ids).all():
+            last_pos, counted = self.track_pos, self.track_counted
+        else:
+            last_pos, counted = self._lookup_tracks(track_ids, positions)
+        
+        # Line sides of all tracks at once (signed offsets): a track not
+        # counted yet crossed when it left its side; new tracks stay put
+        last_offset = last_pos - self.line_coord
+        offset = positions - self.line_coord
+        crossed = ~counted & (last_offset != 0) & (last_offset * offset <= 0)
+        for i in crossed.nonzero()[0].tolist():
+            # Coming from above/left is moving down/right (IN)
+            self._count_crossing(int(track_ids[i]), bool(last_offset[i] < 0), timestamp)
+        
+        # The current tracks replace the state, disappeared ones are dropped
+        self.track_ids = track_ids
+        self.track_pos = positions
+        self.track_counted = counted | crossed
         
         return self.get_stats()
     
-    def _crossed_line(self, last_pos, current_pos):
+    def _lookup_tracks(self, track_ids, positions):
         """
-        Check if object crossed the counting line
+        Get the previous position and counted flag of tracks
         
         Parameters
         ----------
-        last_pos : int
-            Previous position
-        current_pos : int
-            Current position
+        track_ids : numpy.ndarray
+            (N,) current track IDs
+        positions : numpy.ndarray
+            (N,) current positions along the counting axis
         
         Returns
         -------
-        bool
-            True if line was crossed
+        tuple
+            (last_pos, counted) arrays; new tracks get their current
+            position and False
         """
-        # Check if line is between last and current position
-        return (last_pos < self.line_coord <= current_pos) or \
-               (last_pos > self.line_coord >= current_pos)
+        if len(self.track_ids) == 0:
+            return positions, np.zeros(len(track_ids), dtype=bool)
+        
+        sorter = self.track_ids.argsort()
+        index = self.track_ids.searchsorted(track_ids, sorter=sorter)
+        slots = sorter[np.minimum(index, len(sorter) - 1)]
+        known = self.track_ids[slots] == track_ids
+        return np.where(known, self.track_pos[slots], positions), known & self.track_counted[slots]
     
-    def draw_line(self, frame, color=(0, 0, 255), thickness=2):
+    def _count_crossing(self, track_id, moving_in, timestamp):
+        """
+        Count one line crossing and log the event
+        
+        Parameters
+        ----------
+        track_id : int
+            Track that crossed
+        moving_in : bool
+            True when moving down/right (IN), False for up/left (OUT)
+        timestamp : float or None
+            Capture time of the frame
+        """
+        if moving_in:
+            self.count_in += 1
+            direction = 'IN'
+        else:
+            self.count_out += 1
+            direction = 'OUT'
+        self.count_total = self.count_in - self.count_out
+        
+        self.events.append({
+            'timestamp': datetime.now(),
+            'frame_time': timestamp,
+            'track_id': track_id,
+            'direction': direction,
+            'count_total': self.count_total
+        })
+        logger.info(f"Person {track_id} counted: {direction} | Total: {self.count_total}")
+    
+    def draw_line(self, frame, color=(0, 0, 255), thickness=2, scale=None, out=None):
         """
         Draw counting line on frame
         
@@ -187,27 +243,40 @@ class PeopleCounter:
             BGR color for line
         thickness : int
             Line thickness
+        scale : tuple, optional
+            (scale_x, scale_y) mapping source coordinates onto frame
+        out : numpy.ndarray, optional
+            Overlay buffer to draw into (may be frame itself); a copy of
+            frame is made without it
         
         Returns
         -------
         numpy.ndarray
             Frame with line drawn
         """
-        annotated = frame.copy()
-        cv2.line(annotated, self.line_start, self.line_end, color, thickness)
+        annotated = annotation_target(frame, out)
+        
+        line_start, line_end, line_coord = self.line_start, self.line_end, self.line_coord
+        if scale is not None:
+            sx, sy = scale
+            line_start = (int(line_start[0] * sx), int(line_start[1] * sy))
+            line_end = (int(line_end[0] * sx), int(line_end[1] * sy))
+            line_coord = int(line_coord * (sy if self.direction == 'vertical' else sx))
+        
+        cv2.line(annotated, line_start, line_end, color, thickness)
         
         # Draw text labels
         if self.direction == 'vertical':
             # Label above and below line
-            cv2.putText(annotated, "OUT", (10, self.line_coord - 10),
+            cv2.putText(annotated, "OUT", (10, line_coord - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            cv2.putText(annotated, "IN", (10, self.line_coord + 30),
+            cv2.putText(annotated, "IN", (10, line_coord + 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         else:
             # Label left and right of line
-            cv2.putText(annotated, "OUT", (self.line_coord - 60, 30),
+            cv2.putText(annotated, "OUT", (line_coord - 60, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            cv2.putText(annotated, "IN", (self.line_coord + 10, 30),
+            cv2.putText(annotated, "IN", (line_coord + 10, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         
         return annotated
@@ -233,8 +302,10 @@ class PeopleCounter:
         self.count_in = 0
         self.count_out = 0
         self.count_total = 0
-        self.tracks = {}
+        self._reset_tracks()
         self.events = []
+        self.last_timestamp = None
+        self.frame_interval = None
         logger.info("Counter reset")
     
     def get_recent_events(self, limit=10):
@@ -0,0 +1,165 @@
+"""
+Compact array-based container for person detections
+"""
+
+import numpy as np
+
+
+class Detections:
+    """
+    Detections of one frame stored as parallel NumPy arrays
+    
+    Replaces the per-box dicts returned by earlier versions. Consumers
+    read the arrays directly; to_dicts() gives the old list-of-dicts form.
+    """
+    
+    __slots__ = ('xyxy', 'confidence', 'track_id')
+    
+    def __init__(self, xyxy=None, confidence=None, track_id=None):
+        """
+        Initialize detections
+        
+        Parameters
+        ----------
+        xyxy : array-like, optional
+            (N, 4) boxes as x1, y1, x2, y2 in source frame pixels
+        confidence : array-like, optional
+            (N,) confidence scores
+        track_id : array-like, optional
+            (N,) track IDs, -1 where no ID is assigned
+        """
+        self.xyxy = np.asarray(xyxy if xyxy is not None else np.empty((0, 4)), dtype=np.int32).reshape(-1, 4)
+        count = len(self.xyxy)
+        
+        if confidence is None:
+            confidence = np.ones(count)
+        self.confidence = np.asarray(confidence, dtype=np.float32).reshape(count)
+        
+        if track_id is None:
+            track_id = np.full(count, -1)
+        self.track_id = np.asarray(track_id, dtype=np.int64).reshape(count)
+    
+    @classmethod
+    def empty(cls):
+        """Get an empty detection set"""
+        return cls()
+    
+    @classmethod
+    def from_dicts(cls, detections):
+        """
+        Build detections from the legacy list-of-dicts format
+        
+        Parameters
+        ----------
+        detections : list
+            Dicts with 'bbox', 'confidence' and optional 'track_id'
+        
+        Returns
+        -------
+        Detections
+            Array form of the same detections
+        """
+        if isinstance(detections, cls):
+            return detections
+        if not detections:
+            return cls.empty()
+        
+        return cls(
+            [det['bbox'] for det in detections],
+            [det.get('confidence', 1.0) for det in detections],
+            [det.get('track_id', -1) for det in detections]
+        )
+    
+    def __len__(self):
+        return len(self.xyxy)
+    
+    def __getitem__(self, index):
+        """Select a subset with an index array or boolean mask"""
+        return Detections(self.xyxy[index], self.confidence[index], self.track_id[index])
+    
+    def __repr__(self):
+        return f"Detections(n={len(self)}, tracked={int(self.tracked.sum())})"
+    
+    @property
+    def centers(self):
+        """(N, 2) box centers as integer x, y"""
+        return (self.xyxy[:, :2] + self.xyxy[:, 2:]) // 2
+    
+    @property
+    def tracked(self):
+        """(N,) boolean mask of detections that carry a track ID"""
+        return self.track_id >= 0
+    
+    def scaled(self, scale_x, scale_y):
+        """
+        Get a copy with boxes scaled, e.g. onto a display-size frame
+        
+        Parameters
+        ----------
+        scale_x : float
+            Horizontal scale factor
+        scale_y : float
+            Vertical scale factor
+        
+        Returns
+        -------
+        Detections
+            Scaled detections
+        """
+        xyxy = self.xyxy * np.array([scale_x, scale_y, scale_x, scale_y])
+        return Detections(xyxy, self.confidence, self.track_id)
+    
+    def to_dicts(self):
+        """
+        Convert to the legacy list-of-dicts format
+        
+        Returns
+        -------
+        list
+            Dicts with bbox, confidence, class_id, center and track_id
+            (when tracked)
+        """
+        detections = []
+        for box, center, confidence, track_id in zip(
+            self.xyxy.tolist(), self.centers.tolist(),
+            self.confidence.tolist(), self.track_id.tolist()
+        ):
+            detection = {
+                'bbox': box,
+                'confidence': confidence,
+                'class_id': 0,
+                'center': center
+            }
+            if track_id >= 0:
+                detection['track_id'] = track_id
+            detections.append(detection)
+        return detections
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise IoU between two sets of boxes
+    
+    Parameters
+    ----------
+    boxes_a : numpy.ndarray
+        (N, 4) boxes as x1, y1, x2, y2
+    boxes_b : numpy.ndarray
+        (M, 4) boxes as x1, y1, x2, y2
+    
+    Returns
+    -------
+    numpy.ndarray
+        (N, M) IoU matrix
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).clip(0).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).clip(0).prod(axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
@@ -4,8 +4,15 @@ YOLO-based person detection with performance optimizations
 
 import cv2
 import os
-from ultralytics import YOLO
+import shutil
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from src.detections import Detections
+from src.tracker import StreamTracker
 from src.utils.logger import logger
+from src.utils.frames import resize_to_fit, clip_roi, draw_detections
 from src.config import config
 
 
@@ -14,7 +21,23 @@ class PersonDetector:
     YOLO person detector with tracking support
     """
     
-    def __init__(self, model_path='models/yolov8n.pt', confidence_threshold=0.5):
+    # COCO class id of 'person'
+    PERSON_CLASS = 0
+    
+    # Inference backends: name -> ultralytics export format
+    BACKENDS = {
+        'torch': None,
+        'onnxruntime': 'onnx',
+        'openvino': 'openvino'
+    }
+    
+    # Backends whose thread count can be set (see threads)
+    THREAD_BACKENDS = ('torch',)
+    
+    def __init__(self, model_path='models/yolov8n.pt', confidence_threshold=0.5,
+                 detection_resolution=None, roi=None, max_det=100, iou_threshold=0.7,
+                 backend='torch', threads=0, imgsz=640, tracker='builtin', track_buffer=30,
+                 background=False):
         """
         Initialize YOLO detector
         
@@ -24,14 +47,98 @@ class PersonDetector:
             Path to YOLO model file
         confidence_threshold : float
             Minimum confidence score for detections (0.0 to 1.0)
+        detection_resolution : list, optional
+            [width, height] the frame is downscaled to before inference.
+            Boxes are always returned in source frame coordinates.
+        roi : list, optional
+            [x1, y1, x2, y2] region of interest; only this crop is sent
+            to the model
+        max_det : int
+            Maximum number of people kept per frame after NMS
+        iou_threshold : float
+            IoU threshold for non-maximum suppression
+        backend : str
+            'torch', 'onnxruntime' or 'openvino'. Non-torch backends export
+            the .pt model once and reuse the cached export afterwards.
+        threads : int
+            CPU threads used for inference (0 = runtime default). Only the
+            torch backend can be limited (torch.set_num_threads());
+            ultralytics creates the onnxruntime and OpenVINO sessions with
+            their default thread pools
+        imgsz : int
+            Model input size in pixels
+        tracker : str
+            'builtin' tracks outside the model with explicit per-stream
+            state (src.tracker); 'ultralytics' uses model.track()
+        track_buffer : int
+            Frames a lost track is kept by the built-in tracker
+        background : bool
+            Load and warm up the model in a background thread; `ready` is
+            set when done and detect() waits for it
         """
         self.model_path = model_path
         self.confidence_threshold = confidence_threshold
+        self.detection_resolution = detection_resolution
+        self.roi = roi
+        self.max_det = max_det
+        self.iou_threshold = iou_threshold
+        if backend not in self.BACKENDS:
+            logger.error(f"Unknown detection backend '{backend}' (expected {', '.join(self.BACKENDS)}), using torch")
+            backend = 'torch'
+        self.backend = backend
+        self.threads = int(threads or 0)
+        self.imgsz = imgsz
+        self.model_file = None
         self.model = None
-        self.load_model()
+        
+        # Tracker state per stream so one model can serve several cameras
+        self.tracker = tracker if tracker in ('builtin', 'ultralytics') else 'builtin'
+        self.stream_tracker = StreamTracker(
+            track_threshold=confidence_threshold,
+            low_threshold=min(0.1, confidence_threshold),
+            track_buffer=track_buffer
+        )
+        self._tracker_states = {}
+        self._active_stream = None
+        
+        self.ready = threading.Event()
+        if background:
+            threading.Thread(target=self.load_model, daemon=True).start()
+        else:
+            self.load_model()
+    
+    @classmethod
+    def from_config(cls, background=False):
+        """
+        Create a detector from the detection/performance/counting settings
+        
+        Parameters
+        ----------
+        background : bool
+            Load the model in a background thread
+        
+        Returns
+        -------
+        PersonDetector
+            Detector with the model loaded (or loading)
+        """
+        return cls(
+            config.get('detection', 'model'),
+            config.get('detection', 'confidence_threshold'),
+            detection_resolution=config.get('performance', 'detection_resolution'),
+            max_det=config.get('detection', 'max_det', default=100),
+            iou_threshold=config.get('detection', 'iou_threshold', default=0.7),
+            backend=config.get('detection', 'backend', default='torch'),
+            threads=config.get('detection', 'threads', default=0),
+            imgsz=config.get('detection', 'imgsz', default=640),
+            tracker=config.get('counting', 'tracker', default='builtin'),
+            track_buffer=config.get('counting', 'track_buffer', default=30),
+            background=background
+        )
     
     def load_model(self):
-        """Load YOLO model with offline mode"""
+        """Load YOLO model with offline mode and run a warm-up inference"""
+        started = time.monotonic()
         try:
             logger.info(f"Loading YOLO model from {self.model_path}")
             
@@ -41,19 +148,198 @@ class PersonDetector:
                 os.environ['ULTRALYTICS_OFFLINE'] = '1'
                 logger.info("Offline mode enabled - no network calls")
             
-            self.model = YOLO(self.model_path)
+            # Imported here: ultralytics pulls in torch and takes seconds
+            from ultralytics import YOLO
+            
+            self.model_file = self._resolve_model_path()
+            self._limit_threads()
+            model = YOLO(self.model_file, task='detect')
             
             # Disable verbose output and any telemetry
-            if hasattr(self.model, 'overrides'):
-                self.model.overrides['verbose'] = False
+            if hasattr(model, 'overrides'):
+                model.overrides['verbose'] = False
+            
+            # First call builds the runtime session
+            model(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8), **self._predict_args())
+            self.model = model
             
-            logger.info("YOLO model loaded successfully")
+            logger.info(f"YOLO model loaded and warmed up in {time.monotonic() - started:.2f}s "
+                        f"({self.backend} backend)")
             return True
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
             return False
+        finally:
+            self.ready.set()
+    
+    def wait_ready(self, timeout=None):
+        """
+        Wait for a background model load to finish
+        
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum seconds to wait
+        
+        Returns
+        -------
+        bool
+            True if the model is loaded
+        """
+        self.ready.wait(timeout)
+        return self.model is not None
+    
+    def _resolve_model_path(self):
+        """
+        Get the model file for the configured backend, exporting it if needed
+        
+        Returns
+        -------
+        str
+            Path to the .pt model or the cached ONNX / OpenVINO export
+        """
+        source = Path(self.model_path)
+        
+        # Exported models (e.g. INT8 from src.quantize) pick their own runtime
+        if source.suffix == '.onnx':
+            self.backend = 'onnxruntime'
+        elif source.name.endswith('_openvino_model'):
+            self.backend = 'openvino'
+        
+        export_format = self.BACKENDS[self.backend]
+        
+        # Already an exported model, or nothing to export
+        if export_format is None or source.suffix != '.pt':
+            return str(source)
+        
+        if export_format == 'onnx':
+            cached = source.with_name(f"{source.stem}_{self.imgsz}.onnx")
+        else:
+            cached = source.with_name(f"{source.stem}_{self.imgsz}_{export_format}_model")
+        
+        if cached.exists() and cached.stat().st_mtime >= source.stat().st_mtime:
+            logger.info(f"Using cached {self.backend} model: {cached}")
+            return str(cached)
+        
+        try:
+            from ultralytics import YOLO
+            
+            logger.info(f"Exporting {source} for {self.backend} (one-time)...")
+            exported = YOLO(str(source)).export(
+                format=export_format, imgsz=self.imgsz, dynamic=True, verbose=False
+            )
+            
+            if cached.exists():
+                shutil.rmtree(cached) if cached.is_dir() else cached.unlink()
+            Path(exported).rename(cached)
+            logger.info(f"Exported model cached at {cached}")
+            return str(cached)
+        except Exception as e:
+            logger.error(f"Export for {self.backend} failed: {e}. Falling back to torch.")
+            self.backend = 'torch'
+            return str(source)
+    
+    def _limit_threads(self):
+        """Limit the CPU threads of the inference runtime"""
+        if not self.threads:
+            return
+        if self.backend not in self.THREAD_BACKENDS:
+            logger.warning(f"detection.threads ({self.threads}) cannot be applied to the {self.backend} backend, "
+                           f"using its default thread count")
+            return
+        
+        try:
+            import torch
+            torch.set_num_threads(self.threads)
+            logger.info(f"Inference threads set to {self.threads}")
+        except Exception as e:
+            logger.warning(f"Could not set inference threads for {self.backend}: {e}")
+    
+    def set_roi(self, roi):
+        """
+        Restrict inference to a region of interest
+        
+        Parameters
+        ----------
+        roi : list or None
+            [x1, y1, x2, y2] in frame pixels, or None for the full frame
+        """
+        self.roi = list(roi) if roi is not None else None
+        if self.roi:
+            logger.info(f"Detection ROI set to {self.roi}")
+        else:
+            logger.info("Detection ROI cleared")
+    
+    def _predict_args(self, track=False):
+        """
+        Get keyword arguments for model calls
+        
+        Only the person class is requested so NMS and postprocessing never
+        see the other 79 COCO classes.
+        
+        Parameters
+        ----------
+        track : bool
+            True when the output feeds the built-in tracker, which also
+            needs the low-confidence boxes
+        
+        Returns
+        -------
+        dict
+            Arguments for model() / model.track()
+        """
+        return {
+            'verbose': False,
+            'imgsz': self.imgsz,
+            'conf': self.stream_tracker.tracker_args['low_threshold'] if track else self.confidence_threshold,
+            'iou': self.iou_threshold,
+            'max_det': self.max_det,
+            'classes': [self.PERSON_CLASS]
+        }
     
-    def detect(self, frame, track=False):
+    def _switch_tracker_state(self, stream_id):
+        """
+        Swap the model's persistent tracker state to another stream
+        
+        Parameters
+        ----------
+        stream_id : str
+            Camera identifier the next tracking call belongs to
+        """
+        if stream_id == self._active_stream:
+            return
+        
+        predictor = getattr(self.model, 'predictor', None)
+        if predictor is not None:
+            # Park the current stream's trackers and restore (or reset) the next one
+            if hasattr(predictor, 'trackers'):
+                self._tracker_states[self._active_stream] = predictor.trackers
+                del predictor.trackers
+            if stream_id in self._tracker_states:
+                predictor.trackers = self._tracker_states.pop(stream_id)
+        
+        self._active_stream = stream_id
+    
+    def reset_tracking(self, stream_id=None):
+        """
+        Forget the tracks of one stream, or of all streams
+        
+        Parameters
+        ----------
+        stream_id : str, optional
+            Camera identifier; None resets every stream
+        """
+        self.stream_tracker.reset(stream_id)
+        if stream_id is None or stream_id == self._active_stream:
+            predictor = getattr(self.model, 'predictor', None)
+            if predictor is not None and hasattr(predictor, 'trackers'):
+                del predictor.trackers
+        if stream_id is None:
+            self._tracker_states.clear()
+        else:
+            self._tracker_states.pop(stream_id, None)
+    
+    def detect(self, frame, track=False, roi=None, stream_id=None):
         """
         Detect people in frame
         
@@ -63,121 +349,179 @@ class PersonDetector:
             Input image frame
         track : bool
             If True, use tracking to maintain consistent IDs across frames
+        roi : list, optional
+            [x1, y1, x2, y2] overriding the detector ROI for this call
+        stream_id : str, optional
+            Camera identifier; tracking state is kept separately per stream
         
         Returns
         -------
-        list
-            List of detections, each containing:
-            - bbox: [x1, y1, x2, y2]
-            - confidence: float
-            - class_id: int (always 0 for person)
-            - track_id: int (only if track=True)
+        Detections
+            Person boxes (xyxy), confidences and track IDs (-1 when not
+            tracked) in source frame coordinates
         """
-        if self.model is None:
+        if not self.wait_ready():
             logger.error("Model not loaded")
-            return []
+            return Detections.empty()
         
         try:
-            # Run detection or tracking
-            if track:
-                results = self.model.track(frame, persist=True, verbose=False, conf=self.confidence_threshold)
-            else:
-                results = self.model(frame, verbose=False, conf=self.confidence_threshold)
+            small, transform = self._prepare_frame(frame, roi)
+            if small is None:
+                return Detections.empty()
             
-            # Extract person detections (class 0 in COCO dataset)
-            detections = []
+            # Run detection or tracking
+            if track and self.tracker == 'ultralytics':
+                self._switch_tracker_state(stream_id)
+                results = self.model.track(small, persist=True, **self._predict_args())
+                if results and len(results) > 0:
+                    return self._extract_detections(results[0], transform, track)
+                return Detections.empty()
             
+            results = self.model(small, **self._predict_args(track))
+            detections = Detections.empty()
             if results and len(results) > 0:
-                result = results[0]
-                
-                if result.boxes is not None and len(result.boxes) > 0:
-                    for box in result.boxes:
-                        class_id = int(box.cls[0])
-                        
-                        # Only keep person detections (class 0)
-                        if class_id != 0:
-                            continue
-                        
-                        # Extract bounding box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].tolist()
-                        confidence = float(box.conf[0])
-                        
-                        detection = {
-                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                            'confidence': confidence,
-                            'class_id': class_id,
-                            'center': [int((x1 + x2) / 2), int((y1 + y2) / 2)]
-                        }
-                        
-                        # Add track ID if available
-                        if track and hasattr(box, 'id') and box.id is not None:
-                            detection['track_id'] = int(box.id[0])
-                        
-                        detections.append(detection)
-            
-            return detections
+                detections = self._extract_detections(results[0], transform)
+            return self.stream_tracker.update(stream_id, detections) if track else detections
             
         except Exception as e:
             logger.error(f"Detection error: {e}")
+            return Detections.empty()
+    
+    def detect_batch(self, frames, track=False, rois=None, stream_ids=None):
+        """
+        Detect people in several frames with one forward pass
+        
+        Parameters
+        ----------
+        frames : list
+            Input frames (may differ in size)
+        track : bool
+            If True, assign track IDs. With the ultralytics tracker, which
+            keeps one state per call, tracked frames are run one by one.
+        rois : list, optional
+            Per-frame ROI (or None) overriding the detector ROI
+        stream_ids : list, optional
+            Per-frame camera identifiers used for tracking state
+        
+        Returns
+        -------
+        list
+            One Detections per input frame, see detect()
+        """
+        if not frames:
             return []
+        
+        rois = rois or [None] * len(frames)
+        stream_ids = stream_ids or [None] * len(frames)
+        
+        if track and self.tracker == 'ultralytics':
+            return [
+                self.detect(frame, track=True, roi=roi, stream_id=stream_id)
+                for frame, roi, stream_id in zip(frames, rois, stream_ids)
+            ]
+        
+        if not self.wait_ready():
+            logger.error("Model not loaded")
+            return [Detections.empty() for _ in frames]
+        
+        try:
+            prepared = [self._prepare_frame(frame, roi) for frame, roi in zip(frames, rois)]
+            batch = [small for small, _ in prepared if small is not None]
+            results = self.model(batch, **self._predict_args(track)) if batch else []
+            
+            # Map results back, frames with an empty ROI get no detections
+            batch_detections = []
+            result_index = 0
+            for small, transform in prepared:
+                if small is None:
+                    batch_detections.append(Detections.empty())
+                    continue
+                batch_detections.append(self._extract_detections(results[result_index], transform))
+                result_index += 1
+            
+            if track:
+                batch_detections = [
+                    self.stream_tracker.update(stream_id, detections)
+                    for stream_id, detections in zip(stream_ids, batch_detections)
+                ]
+            return batch_detections
+        
+        except Exception as e:
+            logger.error(f"Batch detection error: {e}")
+            return [Detections.empty() for _ in frames]
     
-    def draw_detections(self, frame, detections, show_ids=True, box_color=(0, 255, 0)):
+    def _prepare_frame(self, frame, roi=None):
         """
-        Draw bounding boxes on frame
+        Crop a frame to the ROI and downscale it to the detection size
         
         Parameters
         ----------
         frame : numpy.ndarray
             Input frame
-        detections : list
-            List of detections from detect()
-        show_ids : bool
-            Whether to show track IDs
-        box_color : tuple
-            BGR color for bounding boxes
+        roi : list, optional
+            [x1, y1, x2, y2] overriding the detector ROI
         
         Returns
         -------
-        numpy.ndarray
-            Annotated frame
+        tuple
+            (model_input, (scale_x, scale_y, offset_x, offset_y)); model_input
+            is None when the ROI does not overlap the frame
         """
-        annotated = frame.copy()
+        # Crop to the ROI (a view, no copy) before downscaling
+        offset_x, offset_y = 0, 0
+        roi = roi if roi is not None else self.roi
+        if roi:
+            roi = clip_roi(roi, frame.shape[1], frame.shape[0])
+            if roi is None:
+                return None, None
+            offset_x, offset_y, x2, y2 = roi
+            frame = frame[offset_y:y2, offset_x:x2]
         
-        for det in detections:
-            x1, y1, x2, y2 = det['bbox']
-            confidence = det['confidence']
-            
-            # Draw bounding box
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), box_color, 2)
-            
-            # Prepare label text
-            label = f"Person {confidence:.2f}"
-            if show_ids and 'track_id' in det:
-                label = f"ID:{det['track_id']} {confidence:.2f}"
-            
-            # Draw label background
-            (label_width, label_height), _ = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
-            )
-            cv2.rectangle(
-                annotated,
-                (x1, y1 - label_height - 10),
-                (x1 + label_width, y1),
-                box_color,
-                -1
-            )
-            
-            # Draw label text
-            cv2.putText(
-                annotated,
-                label,
-                (x1, y1 - 5),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 0, 0),  # Black text
-                1,
-                cv2.LINE_AA
-            )
+        # Downscale once to the detection size
+        small, (scale_x, scale_y) = resize_to_fit(frame, self.detection_resolution)
+        return small, (scale_x, scale_y, offset_x, offset_y)
+    
+    def _extract_detections(self, result, transform, track=False):
+        """
+        Convert one model result into person detections in source coordinates
+        
+        Parameters
+        ----------
+        result : ultralytics.engine.results.Results
+            Model output for one frame
+        transform : tuple
+            (scale_x, scale_y, offset_x, offset_y) from _prepare_frame()
+        track : bool
+            Whether track IDs should be read
         
-        return annotated
+        Returns
+        -------
+        Detections
+            Person detections, see detect()
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return Detections.empty()
+        
+        # Keep person detections only (already filtered by the model for
+        # COCO weights, kept for custom models that ignore 'classes')
+        keep = boxes.cls.cpu().numpy() == self.PERSON_CLASS
+        if not keep.any():
+            return Detections.empty()
+        
+        # Rescale and shift all boxes back to source coordinates at once
+        scale_x, scale_y, offset_x, offset_y = transform
+        xyxy = boxes.xyxy.cpu().numpy()[keep]
+        xyxy = xyxy * np.array([scale_x, scale_y, scale_x, scale_y]) + \
+            np.array([offset_x, offset_y, offset_x, offset_y])
+        
+        track_ids = None
+        if track and boxes.id is not None:
+            track_ids = boxes.id.cpu().numpy()[keep]
+        
+        return Detections(xyxy, boxes.conf.cpu().numpy()[keep], track_ids)
+    
+    def draw_detections(self, frame, detections, show_ids=True, box_color=(0, 255, 0), scale=None, out=None):
+        """Draw bounding boxes on frame, see utils.frames.draw_detections()"""
+        return draw_detections(frame, detections, show_ids, box_color, scale, out)
 
@@ -0,0 +1,278 @@
+"""
+Shared-memory frame bus: a preallocated ring of frame slots
+
+Frames are written once into a slot and handed to every consumer
+(display, recorder, heat map, preview of a worker process) as read-only
+views of the same memory. Each slot has a reference count; it is reused
+only after every consumer released it, so nothing is copied per consumer
+and no frame memory is allocated in the hot loop.
+"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.utils.logger import logger
+
+# Per-slot header fields
+_REFS, _SEQ, _HEIGHT, _WIDTH = range(4)
+
+
+class FrameRef:
+    """
+    A reference to one frame slot of a FrameBus
+    
+    Must be released exactly once by its holder; retain() hands out an
+    additional reference (e.g. to a second consumer).
+    """
+    
+    def __init__(self, bus, index, seq, writable=False):
+        self.bus = bus
+        self.index = index
+        self.seq = seq
+        self.released = False
+        
+        height, width = bus.header[index, _HEIGHT], bus.header[index, _WIDTH]
+        self.array = bus.slots[index, :height, :width]
+        if not writable:
+            self.array = self.array.view()
+            self.array.flags.writeable = False
+    
+    @property
+    def timestamp(self):
+        """Capture time stored with the frame"""
+        return float(self.bus.timestamps[self.index])
+    
+    def handle(self):
+        """
+        Get a picklable handle to send to another process
+        
+        Returns
+        -------
+        tuple
+            (index, seq) for FrameBus.open()
+        """
+        return self.index, self.seq
+    
+    def retain(self):
+        """
+        Take another reference to the same frame
+        
+        Returns
+        -------
+        FrameRef
+            Read-only reference, release it separately
+        """
+        with self.bus.lock:
+            self.bus.header[self.index, _REFS] += 1
+        return FrameRef(self.bus, self.index, self.seq)
+    
+    def release(self):
+        """Give the reference back, the slot is reused at zero"""
+        if self.released:
+            return
+        self.released = True
+        with self.bus.lock:
+            self.bus.header[self.index, _REFS] = max(0, self.bus.header[self.index, _REFS] - 1)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FrameBus:
+    """
+    Ring of reference-counted frame slots in shared memory
+    
+    Producer:  ref = bus.claim(shape); fill ref.array (decode, resize or
+               draw into it); bus.publish(ref) -> read-only FrameRef
+    Consumer:  ref.retain() in-process, or bus.open(ref.handle()) in a
+               process that attached with FrameBus.attach(); release()
+               when done
+    
+    Frames smaller than the slot size are stored in the top-left corner,
+    so one bus can carry frames of different sizes up to max_shape.
+    """
+    
+    def __init__(self, max_shape, slots=4, lock=None, name=None, create=True):
+        """
+        Create (or attach to) a frame bus
+        
+        Parameters
+        ----------
+        max_shape : tuple
+            (height, width, channels) of the largest frame
+        slots : int
+            Frames that can be in use at once
+        lock : multiprocessing.Lock, optional
+            Guards the reference counts; pass the same lock to every
+            process using the bus
+        name : str, optional
+            Shared-memory name (required to attach)
+        create : bool
+            Create the segment; False attaches to an existing one
+        """
+        self.max_shape = tuple(max_shape)
+        self.slot_count = max(1, int(slots))
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        self.owner = create
+        self.overruns = 0
+        self._next = 0
+        
+        frame_bytes = int(np.prod(self.max_shape))
+        header_bytes = self.slot_count * (4 * 8 + 8)
+        size = header_bytes + self.slot_count * frame_bytes
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        
+        buffer = self.shm.buf
+        self.header = np.ndarray((self.slot_count, 4), dtype=np.int64, buffer=buffer)
+        self.timestamps = np.ndarray((self.slot_count,), dtype=np.float64, buffer=buffer,
+                                     offset=self.slot_count * 4 * 8)
+        self.slots = np.ndarray((self.slot_count,) + self.max_shape, dtype=np.uint8, buffer=buffer,
+                                offset=header_bytes)
+        if create:
+            self.header[:] = 0
+    
+    @classmethod
+    def attach(cls, name, max_shape, slots, lock):
+        """
+        Attach to a bus created by another process
+        
+        Parameters
+        ----------
+        name : str
+            FrameBus.name of the creator
+        max_shape : tuple
+            Same max_shape as the creator
+        slots : int
+            Same slot count as the creator
+        lock : multiprocessing.Lock
+            The creator's lock
+        
+        Returns
+        -------
+        FrameBus
+            Bus sharing the creator's memory
+        """
+        return cls(max_shape, slots, lock=lock, name=name, create=False)
+    
+    @property
+    def name(self):
+        """Shared-memory name other processes attach with"""
+        return self.shm.name
+    
+    def claim(self, shape):
+        """
+        Get a free slot to write a frame into
+        
+        Parameters
+        ----------
+        shape : tuple
+            (height, width) or (height, width, channels) of the frame
+        
+        Returns
+        -------
+        FrameRef or None
+            Writable reference (count 1), None when every slot is in use
+        """
+        height, width = int(shape[0]), int(shape[1])
+        if height > self.max_shape[0] or width > self.max_shape[1]:
+            raise ValueError(f"Frame {width}x{height} does not fit the bus "
+                             f"({self.max_shape[1]}x{self.max_shape[0]})")
+        
+        with self.lock:
+            for offset in range(self.slot_count):
+                index = (self._next + offset) % self.slot_count
+                if self.header[index, _REFS] == 0:
+                    self._next = index + 1
+                    self.header[index] = (1, self.header[index, _SEQ] + 1, height, width)
+                    seq = int(self.header[index, _SEQ])
+                    break
+            else:
+                self.overruns += 1
+                return None
+        
+        return FrameRef(self, index, seq, writable=True)
+    
+    def publish(self, ref, timestamp=None):
+        """
+        Mark a claimed frame as complete
+        
+        Parameters
+        ----------
+        ref : FrameRef
+            Reference from claim(), owned by the caller afterwards as a
+            read-only reference
+        timestamp : float, optional
+            Capture time, defaults to now
+        
+        Returns
+        -------
+        FrameRef
+            Read-only reference to the frame
+        """
+        self.timestamps[ref.index] = time.time() if timestamp is None else timestamp
+        published = FrameRef(self, ref.index, ref.seq)
+        ref.released = True  # The reference moves to the read-only view
+        return published
+    
+    def put(self, frame, timestamp=None):
+        """
+        Copy a frame into the bus (for producers that cannot decode in place)
+        
+        Returns
+        -------
+        FrameRef or None
+            Read-only reference, None when every slot is in use
+        """
+        ref = self.claim(frame.shape)
+        if ref is None:
+            return None
+        np.copyto(ref.array, frame)
+        return self.publish(ref, timestamp)
+    
+    def open(self, handle):
+        """
+        Take a reference to a frame published by another process
+        
+        The publisher transfers its reference with the handle; the
+        receiver releases it.
+        
+        Parameters
+        ----------
+        handle : tuple
+            FrameRef.handle()
+        
+        Returns
+        -------
+        FrameRef or None
+            Read-only reference, None if the slot was already reused
+        """
+        index, seq = handle
+        if int(self.header[index, _SEQ]) != seq:
+            return None
+        return FrameRef(self, index, seq)
+    
+    def in_use(self):
+        """Number of slots currently referenced"""
+        with self.lock:
+            return int(np.count_nonzero(self.header[:, _REFS]))
+    
+    def close(self):
+        """Detach from the shared memory, the creator also frees it"""
+        self.header = self.timestamps = self.slots = None
+        # Unlink first: a frame still viewed elsewhere makes close() raise,
+        # and the segment must not outlive the creator because of it
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError as e:
+                logger.debug(f"Frame bus {self.shm.name} unlink: {e}")
+        try:
+            self.shm.close()
+        except BufferError as e:
+            logger.debug(f"Frame bus {self.shm.name} close: {e}")
@@ -7,12 +7,22 @@ from tkinter import ttk, messagebox, filedialog
 import cv2
 from PIL import Image, ImageTk
 from datetime import datetime, timedelta
+import os
 import threading
+import time
 
-from src.camera import Camera
+from src.alerts import AlertSystem
+from src.autotune import autotune, mark_failed, needs_tuning
+from src.camera import RECONNECTING
+from src.camera_manager import CameraManager
+from src.cascade import CascadeDetector
 from src.detector import PersonDetector
-from src.counter import PeopleCounter
+from src.inference_server import InferenceClient
+from src.qos import QoSController
+from src.workers import WorkerSupervisor
 from src.utils.database import CounterDatabase
+from src.frame_bus import FrameBus
+from src.utils.frames import resize_to_fit, fit_resolution
 from src.config import config
 from src.utils.logger import logger
 
@@ -35,11 +45,9 @@ class MainWindow:
         
         # Application state
         self.is_running = False
-        self.camera = None
+        self.camera_manager = None
         self.detector = None
-        self.counter = None
         self.database = None
-        self.session_id = None
         self.start_time = None
         
         # FPS tracking
@@ -47,6 +55,17 @@ class MainWindow:
         self.frame_count = 0
         self.fps_start_time = datetime.now()
         
+        # Inactivity and camera health alerts, checked with the clock
+        self.alerts = AlertSystem()
+        self.last_total = None
+        self.last_count_time = None
+        
+        # Latest rendered frame waiting for the Tk thread, drawn into a
+        # frame bus slot so the hot loop allocates no display frames
+        self.pending_display = None
+        self.display_lock = threading.Lock()
+        self.display_bus = None
+        
         # Setup GUI
         self.setup_ui()
         
@@ -96,11 +115,19 @@ class MainWindow:
         
         ttk.Label(control_frame, text="Camera:").pack(side=tk.LEFT, padx=(0, 5))
         
-        self.camera_var = tk.StringVar(value="0")
+        # With a 'cameras' list in settings the combo picks the displayed camera
+        self.camera_ids = [camera['id'] for camera in CameraManager.get_camera_configs()]
+        camera_choices = self.camera_ids or ["0", "1", "2"]
+        self.camera_var = tk.StringVar(value=camera_choices[0])
         self.camera_combo = ttk.Combobox(control_frame, textvariable=self.camera_var, 
-                                         values=["0", "1", "2"], width=10, state='readonly')
+                                         values=camera_choices, width=10, state='readonly')
         self.camera_combo.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Plain copy of the selection for the processing thread, which must
+        # not touch Tk variables
+        self.display_camera_id = self.camera_var.get()
+        self.camera_combo.bind('<<ComboboxSelected>>', self.on_camera_selected)
+        
         self.start_button = ttk.Button(control_frame, text="● Start", command=self.start_counting)
         self.start_button.pack(side=tk.LEFT, padx=5)
         
@@ -180,10 +207,23 @@ class MainWindow:
     def init_components(self):
         """Initialize camera, detector, counter, and database"""
         try:
-            # Initialize detector
-            model_path = config.get('detection', 'model')
-            confidence = config.get('detection', 'confidence_threshold')
-            self.detector = PersonDetector(model_path, confidence)
+            # Initialize detector, preferring the shared inference server
+            self.detector = None
+            if config.get('inference_server', 'enabled', default=False):
+                self.detector = InferenceClient.connect_if_available()
+            if self.detector is not None:
+                self.wrap_cascade()
+            elif config.get('workers', 'enabled', default=False):
+                # Every camera worker loads its own detector
+                self.status_label.config(text="Ready (one process per camera)")
+            else:
+                self.start_button.config(state='disabled')
+                if needs_tuning():
+                    # New or changed hardware: benchmark before loading the model
+                    self.status_label.config(text="Calibrating for this PC...")
+                    threading.Thread(target=self.run_autotune, daemon=True).start()
+                else:
+                    self.load_detector()
             
             # Initialize database if enabled
             if config.get('data', 'save_to_database'):
@@ -196,45 +236,96 @@ class MainWindow:
             logger.error(f"Error initializing components: {e}")
             messagebox.showerror("Initialization Error", f"Failed to initialize components:\n{e}")
     
+    def load_detector(self):
+        """Load and warm up the model while the window is already usable"""
+        self.detector = PersonDetector.from_config(background=True)
+        self.wrap_cascade()
+        self.status_label.config(text="Loading model...")
+        self.root.after(100, self.check_model_ready)
+    
+    def wrap_cascade(self):
+        """Put the cheap screening detector in front of YOLO when enabled"""
+        if config.get('cascade', 'enabled', default=False):
+            self.detector = CascadeDetector.from_config(self.detector, config.get('cascade'))
+    
+    def run_autotune(self):
+        """Benchmark inference settings (runs in separate thread), then load the model"""
+        try:
+            autotune()
+        except Exception as e:
+            logger.error(f"Autotune failed, keeping current settings until 'python -m src.autotune' is run: {e}")
+            try:
+                mark_failed()
+            except Exception as e:
+                logger.error(f"Cannot store the failed calibration: {e}")
+        self.root.after(0, self.load_detector)
+    
+    def check_model_ready(self):
+        """Enable counting once the background model load has finished"""
+        if not self.detector.ready.is_set():
+            self.root.after(100, self.check_model_ready)
+            return
+        
+        if self.detector.model is None:
+            self.status_label.config(text="Model failed to load")
+            messagebox.showerror("Model Error", "Failed to load the detection model, see the log for details.")
+            return
+        
+        self.start_button.config(state='normal')
+        self.status_label.config(text="Ready")
+    
     def start_counting(self):
         """Start camera and counting"""
         if self.is_running:
             return
         
         try:
-            # Get camera source
-            camera_source = self.camera_var.get()
-            try:
-                camera_source = int(camera_source)
-            except ValueError:
-                pass  # Keep as string (file path or URL)
+            if config.get('workers', 'enabled', default=False):
+                self.camera_manager = WorkerSupervisor(
+                    self.database,
+                    preview_fps=config.get('workers', 'preview_fps', default=10),
+                    heartbeat_timeout=config.get('workers', 'heartbeat_timeout', default=15.0),
+                    startup_timeout=config.get('workers', 'startup_timeout', default=120.0),
+                    restart_delay=config.get('workers', 'restart_delay', default=1.0)
+                )
+            else:
+                self.camera_manager = CameraManager(
+                    self.detector, self.database,
+                    batch_size=config.get('performance', 'batch_size', default=1),
+                    batch_latency=config.get('performance', 'batch_latency_ms', default=30) / 1000.0,
+                    qos=self.create_qos()
+                )
+            
+            if self.camera_ids:
+                # Multi-camera site from settings
+                for camera in CameraManager.get_camera_configs():
+                    self.camera_manager.add_camera(camera['id'], camera['source'])
+            else:
+                # Get camera source
+                camera_source = self.camera_var.get()
+                try:
+                    camera_source = int(camera_source)
+                except ValueError:
+                    pass  # Keep as string (file path or URL)
+                if isinstance(self.camera_manager, CameraManager):
+                    self.camera_manager.add_camera('default', camera_source, zones=self.load_zones())
+                else:
+                    self.camera_manager.add_camera('default', camera_source)
             
-            # Initialize camera
-            self.camera = Camera(camera_source)
-            if not self.camera.connect():
+            if not self.camera_manager.start():
                 messagebox.showerror("Camera Error", "Failed to connect to camera")
+                self.camera_manager = None
                 return
             
-            # Initialize counter with frame dimensions
-            line_pos = config.get('counting', 'line_position')
-            direction = config.get('counting', 'direction')
-            self.counter = PeopleCounter(
-                line_position=line_pos,
-                direction=direction,
-                frame_height=self.camera.frame_height,
-                frame_width=self.camera.frame_width
-            )
-            
-            # Start database session
-            if self.database:
-                self.session_id = self.database.start_session()
-            
             # Update UI state
             self.is_running = True
             self.start_time = datetime.now()
+            self.last_total = None
+            self.last_count_time = self.start_time
             self.start_button.config(state='disabled')
             self.stop_button.config(state='normal')
-            self.camera_combo.config(state='disabled')
+            if not self.camera_ids:
+                self.camera_combo.config(state='disabled')
             self.status_label.config(text="Running")
             
             # Start video processing thread
@@ -248,27 +339,42 @@ class MainWindow:
             messagebox.showerror("Start Error", f"Failed to start counting:\n{e}")
             self.is_running = False
     
+    def load_zones(self):
+        """Load the multi-zone lines of the Pro features, None without zones_config.json"""
+        if not os.path.exists('zones_config.json'):
+            return None
+        try:
+            from features_pro import ZoneManager
+            return ZoneManager()
+        except Exception as e:
+            logger.warning(f"Zones not loaded: {e}")
+            return None
+    
+    def create_qos(self):
+        """Create the QoS controller from settings, None when disabled"""
+        if not config.get('qos', 'enabled', default=False):
+            return None
+        return QoSController(
+            target_fps=config.get('qos', 'target_fps', default=15),
+            min_imgsz=config.get('qos', 'min_imgsz', default=320),
+            max_frame_skip=config.get('qos', 'max_frame_skip', default=3),
+            max_detect_interval=config.get('qos', 'max_detect_interval', default=4)
+        )
+    
     def stop_counting(self):
         """Stop camera and counting"""
         if not self.is_running:
             return
         
         self.is_running = False
+        self.camera_manager.stop()
         
         # Wait for thread to finish
         if hasattr(self, 'process_thread'):
             self.process_thread.join(timeout=2.0)
         
-        # Release camera
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-        
-        # End database session
-        if self.database and self.session_id:
-            stats = self.counter.get_stats()
-            self.database.end_session(self.session_id, stats['in'], stats['out'])
-            self.session_id = None
+        # Release cameras and end their database sessions
+        self.camera_manager.release()
         
         # Update UI state
         self.start_button.config(state='normal')
@@ -280,61 +386,151 @@ class MainWindow:
     
     def process_video(self):
         """Video processing loop (runs in separate thread)"""
-        while self.is_running:
-            ret, frame = self.camera.read()
-            
-            if not ret:
-                logger.warning("Failed to read frame, attempting reconnect...")
-                if not self.camera.reconnect():
-                    self.root.after(0, self.stop_counting)
-                    break
-                continue
-            
+        if config.get('pipeline', 'enabled', default=False) and hasattr(self.camera_manager, 'run_pipeline'):
+            self.camera_manager.run_pipeline(
+                on_frame=self.on_frame_processed,
+                queue_size=config.get('pipeline', 'queue_size', default=2),
+                capture_policy=config.get('pipeline', 'capture_policy', default='latest'),
+                render_policy=config.get('pipeline', 'render_policy', default='latest')
+            )
+        else:
+            self.camera_manager.run(on_frame=self.on_frame_processed)
+        
+        if self.is_running:
+            # Every camera was lost
+            self.root.after(0, self.stop_counting)
+    
+    def on_camera_selected(self, event=None):
+        """Remember the camera picked in the combo (Tk thread)"""
+        self.display_camera_id = self.camera_var.get()
+    
+    def get_display_stream(self):
+        """Get the camera stream shown in the video panel (any thread)"""
+        if self.camera_ids:
+            return self.camera_manager.get_stream(self.display_camera_id)
+        return self.camera_manager.get_stream('default')
+    
+    def on_frame_processed(self, stream, frame, detections, stats):
+        """
+        Render a processed frame (called from the processing thread)
+        
+        Parameters
+        ----------
+        stream : CameraStream
+            Stream the frame came from
+        frame : numpy.ndarray
+            Source frame
+        detections : Detections
+            Detections in source coordinates; None when a worker process
+            already annotated the frame
+        stats : dict
+            Counter statistics of the stream
+        """
+        # Calculate FPS over all cameras
+        self.frame_count += 1
+        if (datetime.now() - self.fps_start_time).total_seconds() >= 1.0:
+            self.fps = self.frame_count
+            self.frame_count = 0
+            self.fps_start_time = datetime.now()
+            self.root.after(0, self.update_fps_display)
+        
+        if stream is not self.get_display_stream():
+            return
+        
+        # Resize straight into the overlay buffer and draw the annotations
+        # in place, at display resolution only
+        display_resolution = config.get('performance', 'display_resolution')
+        ref = self.claim_display_frame(frame, display_resolution)
+        overlay = ref.array if ref is not None else None
+        source = frame
+        frame, (scale_x, scale_y) = resize_to_fit(frame, display_resolution, out=overlay)
+        display_scale = (1.0 / scale_x, 1.0 / scale_y)
+        
+        if detections is not None and config.get('display', 'show_boxes'):
+            frame = overlay = self.detector.draw_detections(
+                frame, detections,
+                show_ids=config.get('display', 'show_ids'),
+                box_color=tuple(config.get('display', 'box_color')),
+                scale=display_scale,
+                out=overlay
+            )
+        
+        if stream.counter is not None and config.get('display', 'show_line'):
+            frame = stream.counter.draw_line(
+                frame,
+                color=tuple(config.get('display', 'line_color')),
+                scale=display_scale,
+                out=overlay
+            )
+        
+        if ref is not None:
+            ref = self.display_bus.publish(ref)
+            frame = ref.array
+        elif frame is source:
+            frame = frame.copy()  # The camera decodes into the source frame again
+        
+        # Update display - a slow Tk loop only ever sees the newest frame
+        with self.display_lock:
+            superseded = self.pending_display
+            self.pending_display = (frame, stats, ref)
+        if superseded is None:
+            self.root.after(0, self.flush_display)
+        elif superseded[2] is not None:
+            superseded[2].release()
+    
+    def claim_display_frame(self, frame, display_resolution):
+        """
+        Get a frame bus slot for the display frame
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Source frame
+        display_resolution : list or None
+            [max_width, max_height] of the display frame
+        
+        Returns
+        -------
+        FrameRef or None
+            Writable slot of the fitted shape, None when the frame does not
+            fit the bus or every slot is still shown (the frame is then
+            rendered into a new array)
+        """
+        height, width = frame.shape[:2]
+        if display_resolution:
+            width, height = fit_resolution(width, height, display_resolution)
+        shape = (height, width) + frame.shape[2:]
+        
+        if self.display_bus is None:
+            max_size = (display_resolution[1], display_resolution[0]) if display_resolution else shape[:2]
             try:
-                # Run detection with tracking
-                use_tracking = config.get('counting', 'tracking_enabled')
-                detections = self.detector.detect(frame, track=use_tracking)
-                
-                # Update counter
-                stats = self.counter.update(detections)
-                
-                # Log events to database
-                if self.database and self.counter.events:
-                    for event in self.counter.get_recent_events(limit=1):
-                        self.database.log_event(
-                            event['direction'],
-                            event['track_id'],
-                            count_total=event['count_total']
-                        )
-                
-                # Draw annotations
-                if config.get('display', 'show_boxes'):
-                    frame = self.detector.draw_detections(
-                        frame, detections,
-                        show_ids=config.get('display', 'show_ids'),
-                        box_color=tuple(config.get('display', 'box_color'))
-                    )
-                
-                if config.get('display', 'show_line'):
-                    frame = self.counter.draw_line(
-                        frame,
-                        color=tuple(config.get('display', 'line_color'))
-                    )
-                
-                # Update display
-                self.root.after(0, self.update_video_display, frame)
-                self.root.after(0, self.update_stats_display, stats)
-                
-                # Calculate FPS
-                self.frame_count += 1
-                if (datetime.now() - self.fps_start_time).total_seconds() >= 1.0:
-                    self.fps = self.frame_count
-                    self.frame_count = 0
-                    self.fps_start_time = datetime.now()
-                    self.root.after(0, self.update_fps_display)
-                
+                # Slots for the rendering, pending and shown frame
+                self.display_bus = FrameBus(tuple(max_size) + shape[2:], slots=3)
             except Exception as e:
-                logger.error(f"Error processing frame: {e}")
+                logger.warning(f"Display frame bus unavailable, rendering into new frames: {e}")
+                self.display_bus = False
+        
+        if not self.display_bus or shape[2:] != self.display_bus.max_shape[2:]:
+            return None
+        try:
+            return self.display_bus.claim(shape)
+        except ValueError:
+            return None  # Larger than the first camera without a display resolution
+    
+    def flush_display(self):
+        """Show the newest rendered frame and its statistics"""
+        with self.display_lock:
+            pending, self.pending_display = self.pending_display, None
+        if pending is None:
+            return
+        
+        frame, stats, ref = pending
+        try:
+            self.update_video_display(frame)
+            self.update_stats_display(stats)
+        finally:
+            if ref is not None:
+                ref.release()
     
     def update_video_display(self, frame):
         """Update video canvas with new frame"""
@@ -377,23 +573,55 @@ class MainWindow:
     
     def update_fps_display(self):
         """Update FPS label"""
-        self.fps_label.config(text=f"FPS: {self.fps}")
+        text = f"FPS: {self.fps}"
+        stream = self.get_display_stream() if self.camera_manager else None
+        if stream and stream.motion_gate:
+            text += f" | Skipped: {stream.motion_gate.get_stats()['skip_ratio']:.0%}"
+        if stream and stream.camera.state == RECONNECTING:
+            text += " | Camera reconnecting..."
+        elif stream and stream.camera.frozen:
+            text += f" | Camera frozen ({stream.camera.frozen_seconds():.0f}s)"
+        if self.camera_manager and self.camera_manager.qos:
+            qos = self.camera_manager.qos.get_stats()
+            if qos['degraded']:
+                text += f" | Reduced quality ({qos['last_change']})"
+        self.fps_label.config(text=text)
     
     def update_clock(self):
         """Update clock in status bar"""
         self.time_label.config(text=datetime.now().strftime("%H:%M:%S"))
+        self.check_alerts()
         self.root.after(1000, self.update_clock)
     
+    def check_alerts(self):
+        """Check for inactivity and frozen or lost camera feeds while counting"""
+        if not self.is_running or not self.camera_manager:
+            return
+        
+        try:
+            now = datetime.now()
+            total = sum(stats['total'] for stats in self.camera_manager.get_stats().values())
+            if total != self.last_total:
+                self.last_total = total
+                self.last_count_time = now
+            minutes = int((now - self.last_count_time).total_seconds() // 60)
+            
+            alert = self.alerts.check_no_activity(minutes, camera_health=self.camera_manager.get_health())
+            if alert:
+                self.status_label.config(text=alert['message'])
+        except Exception as e:
+            logger.error(f"Error checking alerts: {e}")
+    
     def reset_counter(self):
         """Reset all counters"""
-        if self.counter:
+        if self.camera_manager:
             result = messagebox.askyesno("Reset Counter", "Are you sure you want to reset all counters?")
             if result:
-                self.counter.reset()
+                self.camera_manager.reset_counters()
                 logger.info("Counter reset by user")
     
     def export_report(self):
-        """Export data to CSV"""
+        """Export the hourly counts of every camera to CSV"""
         if not self.database:
             messagebox.showinfo("Export", "Database not enabled")
             return
@@ -423,12 +651,18 @@ class MainWindow:
                 return
             self.stop_counting()
         
+        if self.display_bus:
+            with self.display_lock:
+                self.pending_display = None
+            self.display_bus.close()
         self.root.destroy()
 
 
 def launch_gui():
     """Launch the GUI application"""
+    started = time.monotonic()
     root = tk.Tk()
     app = MainWindow(root)
+    root.after_idle(lambda: logger.info(f"Time to first window: {time.monotonic() - started:.2f}s"))
     root.mainloop()
 
@@ -0,0 +1,783 @@
+"""
+Local inference service shared by all counter front-ends
+
+One process loads and warms the model; front-ends connect over a unix
+socket (localhost TCP on Windows), pass frames through shared memory and
+get Detections back. Requests from all clients are batched together.
+
+Clients authenticate with a random per-install key kept in a file only
+the current user can read, and messages are plain JSON (never pickles).
+Frame buffers are created by the server, one per client, so a client
+cannot make the server map memory it does not own.
+
+Usage:
+    python -m src.inference_server
+"""
+
+import argparse
+import json
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError, resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from src.config import config
+from src.detections import Detections
+from src.utils.frames import draw_detections
+from src.utils.logger import logger
+
+
+def get_server_address():
+    """
+    Get the address of the inference server from the config
+    
+    Returns
+    -------
+    str or tuple
+        Unix socket path, or (host, port) on Windows
+    """
+    if sys.platform == 'win32':
+        return ('127.0.0.1', config.get('inference_server', 'port', default=47615))
+    return config.get('inference_server', 'socket_path', default='/tmp/deepvision_inference.sock')
+
+
+# Largest frame buffer a client may request and largest message accepted
+MAX_BUFFER_BYTES = 512 * 1024 * 1024
+MAX_MESSAGE_BYTES = 1024 * 1024
+
+
+def _authkey():
+    """
+    Get the per-install key clients authenticate with
+    
+    The key is created with random bytes on first use, in a file readable
+    by the current user only (on Windows the user profile is private by
+    default), so other local users and processes cannot connect.
+    
+    Returns
+    -------
+    bytes
+        Authentication key
+    """
+    path = os.path.expanduser(config.get('inference_server', 'authkey_file',
+                                         default='~/.deepvision/inference.key'))
+    try:
+        with open(path, 'rb') as key_file:
+            key = key_file.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    
+    # Write the key to a private temporary file and link it into place, so
+    # a server and client starting together agree on one key
+    os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+    key = secrets.token_hex(32).encode()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as key_file:
+        key_file.write(key)
+    try:
+        os.link(temp_path, path)
+    except FileExistsError:
+        with open(path, 'rb') as key_file:
+            key = key_file.read().strip()
+    finally:
+        os.unlink(temp_path)
+    logger.info(f"Inference server key stored in {path}")
+    return key
+
+
+def _send(conn, message):
+    """Send a message as JSON"""
+    conn.send_bytes(json.dumps(message).encode())
+
+
+def _recv(conn):
+    """
+    Receive a JSON message
+    
+    Raises
+    ------
+    ValueError
+        If the message is not a JSON object
+    """
+    message = json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES))
+    if not isinstance(message, dict):
+        raise ValueError("Malformed message")
+    return message
+
+
+def _attach_shared_memory(name):
+    """Attach to a segment created by another process without taking ownership"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with this
+        # process' resource tracker, which would unlink it at exit
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class _ClientState:
+    """Connection and shared-memory segment of one connected client"""
+    
+    def __init__(self, client_id, conn):
+        self.client_id = client_id
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.buffer_lock = threading.Lock()  # Held while frames of the buffer are in use
+        self.shm = None
+    
+    def create_buffer(self, size):
+        """
+        Create the client's frame buffer, replacing a smaller one
+        
+        Parameters
+        ----------
+        size : int
+            Bytes requested by the client
+        
+        Returns
+        -------
+        SharedMemory
+            Segment owned by the server
+        """
+        if not isinstance(size, int) or not 0 < size <= MAX_BUFFER_BYTES:
+            raise ValueError(f"Invalid buffer size: {size}")
+        with self.buffer_lock:
+            self._free()
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            return self.shm
+    
+    def frame(self, offset, shape):
+        """
+        Get a view of one frame in the client's buffer
+        
+        Raises
+        ------
+        ValueError
+            If the frame does not lie inside the buffer
+        """
+        if self.shm is None:
+            raise ValueError("No frame buffer, request one first")
+        if not (isinstance(offset, int) and isinstance(shape, list) and len(shape) in (2, 3) and
+                all(isinstance(n, int) and n > 0 for n in shape)):
+            raise ValueError(f"Invalid frame layout: {offset}, {shape}")
+        if offset < 0 or offset + int(np.prod(shape)) > self.shm.size:
+            raise ValueError("Frame outside the buffer")
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+    
+    def detach(self):
+        """Free the shared-memory segment once the inference thread is done with it"""
+        with self.buffer_lock:
+            self._free()
+    
+    def _free(self):
+        """Free the shared-memory segment, buffer_lock must be held"""
+        if self.shm is not None:
+            # Unlink first, a view still in use must not leak the segment
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                self.shm.close()
+            except BufferError:
+                pass
+            self.shm = None
+    
+    def send(self, message, request=None):
+        """
+        Send a reply; the inference and reader threads both reply
+        
+        Parameters
+        ----------
+        message : dict
+            Reply
+        request : dict, optional
+            Request answered, its 'seq' is echoed so the client can drop
+            replies to requests it gave up on
+        """
+        if request is not None:
+            message['seq'] = request.get('seq')
+        with self.send_lock:
+            _send(self.conn, message)
+
+
+class InferenceServer:
+    """
+    Serve one PersonDetector to many client processes
+    
+    Each client connection has a reader thread that queues requests; a
+    single inference thread collects queued frames for up to
+    batch_latency seconds (or batch_size frames) and runs them through
+    detect_batch() in one forward pass.
+    """
+    
+    def __init__(self, detector, address=None, batch_size=4, batch_latency=0.01):
+        """
+        Initialize inference server
+        
+        Parameters
+        ----------
+        detector : PersonDetector
+            Loaded detector shared by all clients
+        address : str or tuple, optional
+            Unix socket path or (host, port); defaults to the config
+        batch_size : int
+            Maximum frames per forward pass
+        batch_latency : float
+            Maximum seconds to wait for more frames to fill a batch
+        """
+        self.detector = detector
+        self.address = address or get_server_address()
+        self.batch_size = max(1, int(batch_size))
+        self.batch_latency = batch_latency
+        self.requests = queue.Queue()
+        # Resets come from client threads, the trackers are updated by the inference thread
+        self.tracker_lock = threading.Lock()
+        self.listener = None
+        self.running = False
+        self.next_client_id = 1
+        self.frames_served = 0
+        self.batches_run = 0
+    
+    def serve_forever(self):
+        """Accept clients and run inference until stop() is called"""
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)  # Stale socket from a previous run
+        
+        self.listener = Listener(self.address, authkey=_authkey())
+        self.running = True
+        threading.Thread(target=self._inference_loop, daemon=True).start()
+        logger.info(f"Inference server listening on {self.address}")
+        
+        try:
+            while self.running:
+                try:
+                    conn = self.listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    if self.running:
+                        logger.warning(f"Inference client rejected: {e}")
+                    continue
+                
+                client = _ClientState(self.next_client_id, conn)
+                self.next_client_id += 1
+                threading.Thread(target=self._client_loop, args=(client,), daemon=True).start()
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """Stop serving and remove the socket"""
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+    
+    def _client_loop(self, client):
+        """Read requests of one client until it disconnects"""
+        logger.info(f"Inference client {client.client_id} connected")
+        try:
+            while self.running:
+                request = _recv(client.conn)
+                op = request.get('op')
+                if op == 'detect':
+                    fields = [request.get(key) for key in ('offsets', 'shapes', 'rois', 'stream_ids')]
+                    if all(isinstance(field, list) for field in fields) and \
+                            len(set(map(len, fields))) == 1 and fields[0]:
+                        self.requests.put((client, request))
+                    else:
+                        client.send({'error': "Malformed detect request"}, request)
+                elif op == 'buffer':
+                    try:
+                        shm = client.create_buffer(request.get('size'))
+                        client.send({'shm': shm.name, 'size': shm.size}, request)
+                    except (ValueError, OSError) as e:
+                        client.send({'error': f"Cannot create frame buffer: {e}"}, request)
+                elif op == 'reset_tracking':
+                    self._reset_tracking(client, request.get('stream_id'))
+                    client.send({'ok': True}, request)
+                elif op == 'info':
+                    client.send({
+                        'model': str(self.detector.model_file),
+                        'backend': self.detector.backend,
+                        'imgsz': self.detector.imgsz,
+                        'frames_served': self.frames_served,
+                        'batches_run': self.batches_run
+                    }, request)
+                else:
+                    client.send({'error': f"Unknown request '{op}'"}, request)
+        except (EOFError, OSError):
+            pass
+        except ValueError as e:
+            logger.warning(f"Inference client {client.client_id} sent a malformed message: {e}")
+        finally:
+            self._reset_tracking(client)
+            client.detach()
+            client.conn.close()
+            logger.info(f"Inference client {client.client_id} disconnected")
+    
+    @staticmethod
+    def _stream_key(client, stream_id):
+        """Namespace stream ids per client so two front-ends never share tracks"""
+        return f"{client.client_id}:{stream_id}"
+    
+    def _reset_tracking(self, client, stream_id=None):
+        """Forget the tracks of one stream, or of all streams of a client"""
+        with self.tracker_lock:
+            if stream_id is not None:
+                self.detector.reset_tracking(self._stream_key(client, stream_id))
+                return
+            
+            prefix = self._stream_key(client, '')
+            for key in list(self.detector.stream_tracker.trackers):
+                if str(key).startswith(prefix):
+                    self.detector.reset_tracking(key)
+    
+    def _next_jobs(self):
+        """Wait for requests and collect a batch of them"""
+        try:
+            jobs = [self.requests.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        
+        frame_count = len(jobs[0][1]['offsets'])
+        deadline = time.monotonic() + self.batch_latency
+        while frame_count < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            frame_count += len(job[1]['offsets'])
+        return jobs
+    
+    def _inference_loop(self):
+        """Run batched inference on queued requests"""
+        while self.running:
+            jobs = self._next_jobs()
+            # Tracked and untracked requests go through separate calls
+            for track in (False, True):
+                group = [job for job in jobs if bool(job[1].get('track')) == track]
+                if group:
+                    self._run_jobs(group, track)
+    
+    def _run_jobs(self, jobs, track):
+        """Run one detect_batch() over all frames of the given requests"""
+        # Keep disconnecting clients from freeing buffers still being read
+        clients = list({id(client): client for client, _ in jobs}.values())
+        for client in clients:
+            client.buffer_lock.acquire()
+        try:
+            frames, rois, stream_ids, owners, job_frames = [], [], [], [], []
+            for job_index, (client, request) in enumerate(jobs):
+                try:
+                    job_frames = [client.frame(offset, shape)
+                                  for offset, shape in zip(request['offsets'], request['shapes'])]
+                except (KeyError, ValueError, TypeError) as e:
+                    self._send_error(client, f"Invalid frame buffer: {e}", request)
+                    jobs[job_index] = (None, request)
+                    continue
+                frames.extend(job_frames)
+                rois.extend(request['rois'])
+                stream_ids.extend(self._stream_key(client, stream_id) for stream_id in request['stream_ids'])
+                owners.extend([job_index] * len(job_frames))
+            
+            with self.tracker_lock:
+                results = self.detector.detect_batch(frames, track=track, rois=rois, stream_ids=stream_ids)
+            del frames, job_frames  # Release the shared-memory views
+        finally:
+            for client in clients:
+                client.buffer_lock.release()
+        self.frames_served += len(results)
+        self.batches_run += 1
+        
+        for job_index, (client, request) in enumerate(jobs):
+            if client is None:
+                continue
+            detections = [
+                (det.xyxy.tolist(), det.confidence.tolist(), det.track_id.tolist())
+                for det, owner in zip(results, owners) if owner == job_index
+            ]
+            try:
+                client.send({'detections': detections}, request)
+            except (OSError, EOFError):
+                pass
+    
+    @staticmethod
+    def _send_error(client, error, request):
+        """Reject a request, ignoring clients that already left"""
+        try:
+            client.send({'error': error}, request)
+        except (OSError, EOFError):
+            pass
+
+
+class InferenceClient:
+    """
+    PersonDetector stand-in that runs inference on the shared server
+    
+    Frames are written into a shared-memory segment the server created for
+    this client, only their offsets and shapes go over the socket.
+    
+    Every request carries a sequence number and stale replies are
+    dropped. When the server times out or goes away the connection is
+    closed, detection falls back to a model loaded in this process, and
+    the server is retried every retry_interval seconds.
+    """
+    
+    # Model settings such as imgsz are the server's, see QoSController
+    remote = True
+    
+    def __init__(self, address=None, timeout=10.0, retry_interval=5.0):
+        """
+        Connect to the inference server
+        
+        Parameters
+        ----------
+        address : str or tuple, optional
+            Server address; defaults to the config
+        timeout : float
+            Seconds to wait for a reply before giving up on the server
+        retry_interval : float
+            Seconds between reconnection attempts once the server is lost
+        
+        Raises
+        ------
+        ConnectionError
+            If no server is listening
+        """
+        self.address = address or get_server_address()
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.lock = threading.Lock()
+        self.conn = None
+        self.shm = None
+        self.roi = None
+        self.seq = 0
+        self.retry_at = 0.0
+        self.fallback = None  # Local PersonDetector while the server is down
+        
+        info = self._connect()
+        self.model_file = info.get('model')
+        self.backend = info.get('backend')
+        self.imgsz = info.get('imgsz')
+        self.model = True  # Loaded on the server
+        self.ready = threading.Event()
+        self.ready.set()
+        logger.info(f"Using inference server at {self.address} ({self.model_file}, {self.backend})")
+    
+    @classmethod
+    def connect_if_available(cls, address=None):
+        """
+        Connect to the server when one is running
+        
+        Returns
+        -------
+        InferenceClient or None
+            Connected client, None when no server answers
+        """
+        try:
+            return cls(address)
+        except ConnectionError as e:
+            logger.info(str(e))
+            return None
+    
+    @property
+    def connected(self):
+        """Whether requests currently go to the server"""
+        return self.conn is not None
+    
+    def _connect(self):
+        """
+        Open the connection, the lock must be held (or not shared yet)
+        
+        Returns
+        -------
+        dict
+            Server info
+        
+        Raises
+        ------
+        ConnectionError
+            If the server cannot be reached
+        """
+        try:
+            self.conn = Client(self.address, authkey=_authkey())
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise ConnectionError(f"No inference server at {self.address}: {e}")
+        return self._call({'op': 'info'})
+    
+    def _disconnect(self):
+        """Close a broken connection and schedule the next attempt"""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+        self._detach_buffer()
+        self.retry_at = time.monotonic() + self.retry_interval
+    
+    def _reconnect(self):
+        """Try to get the server back, the lock must be held"""
+        try:
+            self._connect()
+        except ConnectionError as e:
+            self.retry_at = time.monotonic() + self.retry_interval
+            if self.fallback is False:
+                logger.error(f"{e}; no local model either, nothing is detected")
+            return
+        logger.info(f"Reconnected to the inference server at {self.address}")
+    
+    def _request(self, message):
+        """Send a control request and wait for the reply"""
+        with self.lock:
+            return self._call(message)
+    
+    def _call(self, message):
+        """
+        Send a request and wait for its reply, the lock must be held
+        
+        Raises
+        ------
+        ConnectionError
+            If the server did not answer in time or the connection broke;
+            the connection is closed
+        RuntimeError
+            If the server rejected the request
+        """
+        if self.conn is None:
+            raise ConnectionError("Not connected to the inference server")
+        
+        self.seq += 1
+        message['seq'] = self.seq
+        deadline = time.monotonic() + self.timeout
+        try:
+            _send(self.conn, message)
+            while True:
+                if not self.conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"no reply within {self.timeout}s")
+                reply = _recv(self.conn)
+                if reply.get('seq') == self.seq:
+                    break
+                logger.debug(f"Dropped stale inference reply {reply.get('seq')}")
+        except (TimeoutError, EOFError, OSError, ValueError) as e:
+            self._disconnect()
+            raise ConnectionError(f"Inference server connection lost: {e or type(e).__name__}")
+        
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+    
+    def _ensure_buffer(self, size):
+        """Get a server-created shared-memory segment of at least size bytes"""
+        if self.shm is None or self.shm.size < size:
+            reply = self._call({'op': 'buffer', 'size': max(size, 1)})
+            self._detach_buffer()
+            self.shm = _attach_shared_memory(reply['shm'])
+        return self.shm
+    
+    def _detach_buffer(self):
+        """Close the frame buffer, the server frees it"""
+        if self.shm is not None:
+            try:
+                self.shm.close()
+            except BufferError:
+                pass
+            self.shm = None
+    
+    def wait_ready(self, timeout=None):
+        """The server model is always loaded, see PersonDetector.wait_ready()"""
+        return True
+    
+    def set_roi(self, roi):
+        """Set region of interest for detection"""
+        self.roi = roi
+    
+    def detect(self, frame, track=False, roi=None, stream_id=None):
+        """Detect people in frame, see PersonDetector.detect()"""
+        return self.detect_batch([frame], track, [roi], [stream_id])[0]
+    
+    def detect_batch(self, frames, track=False, rois=None, stream_ids=None):
+        """Detect people in several frames, see PersonDetector.detect_batch()"""
+        if not frames:
+            return []
+        
+        rois = [roi if roi is not None else self.roi for roi in (rois or [None] * len(frames))]
+        stream_ids = stream_ids or [None] * len(frames)
+        
+        with self.lock:
+            if self.conn is None and time.monotonic() >= self.retry_at:
+                self._reconnect()
+            
+            if self.conn is not None:
+                try:
+                    return self._detect_remote(frames, track, rois, stream_ids)
+                except ConnectionError as e:
+                    logger.error(f"{e}; detecting locally until it is back")
+                except Exception as e:
+                    logger.error(f"Remote detection error: {e}")
+                    return [Detections.empty() for _ in frames]
+            
+            return self._detect_local(frames, track, rois, stream_ids)
+    
+    def _detect_remote(self, frames, track, rois, stream_ids):
+        """Run one detect request on the server, the lock must be held"""
+        frames = [np.ascontiguousarray(frame, dtype=np.uint8) for frame in frames]
+        
+        # Pack all frames into the shared segment back to back
+        shm = self._ensure_buffer(sum(frame.nbytes for frame in frames))
+        offsets, offset = [], 0
+        for frame in frames:
+            np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[:] = frame
+            offsets.append(offset)
+            offset += frame.nbytes
+        
+        reply = self._call({
+            'op': 'detect',
+            'offsets': offsets,
+            'shapes': [list(frame.shape) for frame in frames],
+            'rois': [_plain(roi) for roi in rois],
+            'stream_ids': stream_ids,
+            'track': track
+        })
+        return [Detections(*arrays) for arrays in reply['detections']]
+    
+    def _detect_local(self, frames, track, rois, stream_ids):
+        """Detect with a model loaded in this process while the server is down"""
+        if self.fallback is None:
+            from src.detector import PersonDetector
+            logger.warning("Inference server unavailable, loading the model in this process")
+            detector = PersonDetector.from_config()
+            if detector.model is None:
+                logger.error("Local model failed to load, nothing is detected until the server is back")
+                detector = False
+            self.fallback = detector
+        
+        if not self.fallback:
+            return [Detections.empty() for _ in frames]
+        return self.fallback.detect_batch(frames, track=track, rois=rois, stream_ids=stream_ids)
+    
+    def reset_tracking(self, stream_id=None):
+        """Forget the tracks of one stream, or of all streams of this client"""
+        if self.fallback:
+            self.fallback.reset_tracking(stream_id)
+        try:
+            self._request({'op': 'reset_tracking', 'stream_id': stream_id})
+        except Exception as e:
+            logger.error(f"Remote reset error: {e}")
+    
+    def draw_detections(self, *args, **kwargs):
+        """Draw bounding boxes on frame, see utils.frames.draw_detections()"""
+        return draw_detections(*args, **kwargs)
+    
+    def close(self):
+        """Disconnect and release the shared-memory segment"""
+        with self.lock:
+            self._disconnect()
+
+
+def load_people_model(weights='yolov8n.pt'):
+    """
+    Model for the standalone counter scripts
+    
+    Parameters
+    ----------
+    weights : str
+        YOLO weights loaded when no server is used
+    
+    Returns
+    -------
+    InferenceClient or ultralytics.YOLO
+        Client of the running inference server when it is enabled, else a
+        model loaded in this process (ultralytics is only imported then)
+    """
+    if config.get('inference_server', 'enabled', default=False):
+        client = InferenceClient.connect_if_available()
+        if client is not None:
+            return client
+    
+    from ultralytics import YOLO
+    return YOLO(weights)
+
+
+def detect_people(model, frame, conf=0.45):
+    """
+    Detect and track people for the standalone counter scripts
+    
+    Parameters
+    ----------
+    model : InferenceClient or ultralytics.YOLO
+        Model from load_people_model()
+    frame : numpy.ndarray
+        Input frame (BGR)
+    conf : float
+        Confidence threshold of the local model
+    
+    Returns
+    -------
+    list
+        [(box, track_id), ...] with box as [x1, y1, x2, y2]; track_id is
+        None when untracked
+    """
+    if isinstance(model, InferenceClient):
+        detections = model.detect(frame, track=True, stream_id='default')
+        return [
+            (box, track_id if track_id >= 0 else None)
+            for box, track_id in zip(detections.xyxy.tolist(), detections.track_id.tolist())
+        ]
+    
+    people = []
+    results = model.track(frame, persist=True, verbose=False, conf=conf)
+    if results and len(results) > 0 and results[0].boxes:
+        for box in results[0].boxes:
+            if int(box.cls[0]) != 0:  # Only people
+                continue
+            track_id = int(box.id[0]) if box.id is not None else None
+            people.append((box.xyxy[0].tolist(), track_id))
+    return people
+
+
+def _plain(roi):
+    """Convert an ROI to JSON-serializable ints"""
+    return None if roi is None else [int(value) for value in roi]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--address', help='Unix socket path (default from config)')
+    parser.add_argument('--batch-size', type=int,
+                        default=config.get('inference_server', 'batch_size', default=4))
+    parser.add_argument('--batch-latency-ms', type=float,
+                        default=config.get('inference_server', 'batch_latency_ms', default=10))
+    args = parser.parse_args()
+    
+    from src.detector import PersonDetector
+    detector = PersonDetector.from_config()
+    if detector.model is None:
+        sys.exit("Model could not be loaded")
+    
+    server = InferenceServer(detector, args.address, args.batch_size, args.batch_latency_ms / 1000.0)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Inference server stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Cheap motion gate that skips person detection on static scenes
+"""
+
+import cv2
+import numpy as np
+from src.utils.logger import logger
+
+
+class MotionGate:
+    """
+    Decide per frame whether the detector needs to run
+    
+    Works on a small grayscale copy of the frame using frame differencing
+    or MOG2 background subtraction, restricted to the region that matters
+    for counting (usually a band around the counting line).
+    """
+    
+    def __init__(self, method='diff', width=160, threshold=25, min_area=0.002,
+                 cooldown_frames=15, max_skip_frames=150):
+        """
+        Initialize motion gate
+        
+        Parameters
+        ----------
+        method : str
+            'diff' for frame differencing or 'mog2' for background subtraction
+        width : int
+            Width of the downscaled analysis frame in pixels
+        threshold : int
+            Per-pixel intensity change treated as motion (0-255)
+        min_area : float
+            Fraction of the region that must change to count as motion
+        cooldown_frames : int
+            Keep detecting for this many frames after the last motion so
+            people who stop near the line are not lost
+        max_skip_frames : int
+            Force a detection after this many skipped frames
+        """
+        self.method = method
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.cooldown_frames = cooldown_frames
+        self.max_skip_frames = max_skip_frames
+        
+        self.roi = None
+        self.checked_frames = 0
+        self.skipped_frames = 0
+        self.last_motion = 0.0
+        
+        self._prev_gray = None
+        self._mask = None
+        self._frames_since_motion = 0
+        self._frames_since_detect = 0
+        self._subtractor = None
+        if method == 'mog2':
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(
+                history=300, varThreshold=threshold, detectShadows=False
+            )
+        
+        logger.info(f"Motion gate initialized ({method})")
+    
+    def set_roi(self, roi):
+        """
+        Only look for motion inside a region
+        
+        Parameters
+        ----------
+        roi : list or None
+            [x1, y1, x2, y2] in source frame pixels, or None for the full frame
+        """
+        self.roi = list(roi) if roi is not None else None
+        self._mask = None
+    
+    def _build_mask(self, small_shape, frame_shape):
+        """Build a boolean mask of the ROI at analysis resolution"""
+        mask = np.zeros(small_shape, dtype=bool)
+        if self.roi is None:
+            mask[:] = True
+            return mask
+        
+        scale_x = small_shape[1] / float(frame_shape[1])
+        scale_y = small_shape[0] / float(frame_shape[0])
+        x1, y1, x2, y2 = self.roi
+        mask[int(y1 * scale_y):int(np.ceil(y2 * scale_y)),
+             int(x1 * scale_x):int(np.ceil(x2 * scale_x))] = True
+        return mask
+    
+    def measure(self, frame):
+        """
+        Measure motion in the gated region
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Input BGR frame
+        
+        Returns
+        -------
+        float
+            Fraction of the region that changed since the previous frame
+        """
+        height, width = frame.shape[:2]
+        small_height = max(1, int(height * self.width / float(width)))
+        small = cv2.resize(frame, (self.width, small_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        
+        if self._mask is None or self._mask.shape != gray.shape:
+            self._mask = self._build_mask(gray.shape, frame.shape)
+            self._prev_gray = None
+        
+        if self._subtractor is not None:
+            changed = self._subtractor.apply(gray) > 0
+        else:
+            if self._prev_gray is None:
+                self._prev_gray = gray
+                return 1.0  # No reference yet - treat as motion
+            changed = cv2.absdiff(gray, self._prev_gray) > self.threshold
+            self._prev_gray = gray
+        
+        region = int(np.count_nonzero(self._mask))
+        if region == 0:
+            return 0.0
+        return float(np.count_nonzero(changed & self._mask)) / region
+    
+    def check(self, frame):
+        """
+        Check whether the detector should run on this frame
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Input BGR frame
+        
+        Returns
+        -------
+        bool
+            True to run detection, False to reuse the previous result
+        """
+        self.checked_frames += 1
+        self.last_motion = self.measure(frame)
+        
+        if self.last_motion >= self.min_area:
+            self._frames_since_motion = 0
+        else:
+            self._frames_since_motion += 1
+        
+        run = (self._frames_since_motion <= self.cooldown_frames or
+               self._frames_since_detect >= self.max_skip_frames)
+        
+        if run:
+            self._frames_since_detect = 0
+        else:
+            self._frames_since_detect += 1
+            self.skipped_frames += 1
+        return run
+    
+    def get_stats(self):
+        """
+        Get gate statistics
+        
+        Returns
+        -------
+        dict
+            Checked and skipped frame counts and the skip ratio
+        """
+        return {
+            'checked': self.checked_frames,
+            'skipped': self.skipped_frames,
+            'skip_ratio': self.skipped_frames / float(self.checked_frames) if self.checked_frames else 0.0,
+            'motion': self.last_motion
+        }
+    
+    def reset(self):
+        """Reset reference frame and statistics"""
+        self._prev_gray = None
+        self._frames_since_motion = 0
+        self._frames_since_detect = 0
+        self.checked_frames = 0
+        self.skipped_frames = 0
+        if self.method == 'mog2':
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(
+                history=300, varThreshold=self.threshold, detectShadows=False
+            )
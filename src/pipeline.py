@@ -0,0 +1,362 @@
+"""
+Staged producer/consumer pipeline with bounded queues
+"""
+
+import threading
+import time
+from collections import deque
+from src.camera import DROP_OLDEST, LOSSLESS
+from src.utils.logger import logger
+
+
+class StageQueue:
+    """
+    Bounded FIFO between two pipeline stages
+    
+    With the 'lossless' policy a full queue blocks the producer
+    (backpressure); with 'latest' the oldest queued item is dropped so
+    the consumer always gets the newest work.
+    """
+    
+    def __init__(self, maxsize=2, policy=LOSSLESS):
+        """
+        Initialize queue
+        
+        Parameters
+        ----------
+        maxsize : int
+            Maximum queued items
+        policy : str
+            'lossless' or 'latest', see camera.DROP_OLDEST / LOSSLESS
+        """
+        if policy not in (DROP_OLDEST, LOSSLESS):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0
+        self.peak = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+    
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+    
+    def put(self, item):
+        """
+        Queue an item
+        
+        Parameters
+        ----------
+        item : Any
+            Work item (never None)
+        
+        Returns
+        -------
+        bool
+            False if the queue was closed
+        """
+        with self._cond:
+            if self.policy == LOSSLESS:
+                while not self.closed and len(self._items) >= self.maxsize:
+                    self._cond.wait(0.1)
+            elif len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            
+            if self.closed:
+                return False
+            self._items.append(item)
+            self.peak = max(self.peak, len(self._items))
+            self._cond.notify_all()
+            return True
+    
+    def get(self, timeout=0.1):
+        """
+        Take the oldest item
+        
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for an item
+        
+        Returns
+        -------
+        Any
+            The item, or None on timeout or when closed and empty
+        """
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+    
+    def close(self):
+        """Stop accepting items, consumers drain what is left"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+    
+    def is_drained(self):
+        """Check whether the queue is closed and empty"""
+        with self._cond:
+            return self.closed and not self._items
+
+
+class Stage:
+    """
+    One pipeline stage running in its own thread
+    
+    func(item) returns the item for the downstream stages, or None to
+    drop it. A source stage has no input queue and func() is polled for
+    new items.
+    """
+    
+    def __init__(self, name, func, input_queue=None, monitor=None):
+        """
+        Initialize stage
+        
+        Parameters
+        ----------
+        name : str
+            Stage name used in statistics and logs
+        func : callable
+            Work function, see class docstring
+        input_queue : StageQueue, optional
+            Queue this stage consumes; None for the source
+        monitor : callable, optional
+            Called as monitor(name, seconds) after each item
+        """
+        self.name = name
+        self.func = func
+        self.input = input_queue
+        self.outputs = []
+        self.monitor = monitor
+        self.thread = None
+        self.stopping = threading.Event()
+        
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.latencies = deque(maxlen=100)
+        self.started_at = None
+    
+    def start(self):
+        """Start the stage thread"""
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}", daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        """Process items until the input is drained or the source is stopped"""
+        while True:
+            if self.input is None:
+                if self.stopping.is_set():
+                    break
+                item = None
+            else:
+                item = self.input.get()
+                if item is None:
+                    if self.input.is_drained():
+                        break
+                    continue
+            
+            start = time.perf_counter()
+            try:
+                result = self.func() if self.input is None else self.func(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage {self.name} failed: {e}")
+                self.errors += 1
+                continue
+            
+            if result is None:
+                continue
+            
+            elapsed = time.perf_counter() - start
+            self.processed += 1
+            self.busy_time += elapsed
+            self.latencies.append(elapsed)
+            if self.monitor is not None:
+                self.monitor(self.name, elapsed)
+            
+            for output in self.outputs:
+                output.put(result)
+        
+        # Let the downstream stages drain and exit
+        for output in self.outputs:
+            output.close()
+    
+    def get_stats(self):
+        """
+        Get stage statistics
+        
+        Returns
+        -------
+        dict
+            processed items, errors, mean and max latency (ms) of the last
+            items, busy ratio and input queue occupancy
+        """
+        latencies = list(self.latencies)
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        stats = {
+            'processed': self.processed,
+            'errors': self.errors,
+            'latency_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'max_latency_ms': 1000 * max(latencies) if latencies else 0.0,
+            'busy': self.busy_time / elapsed if elapsed else 0.0
+        }
+        if self.input is not None:
+            stats.update({
+                'queued': len(self.input),
+                'capacity': self.input.maxsize,
+                'peak': self.input.peak,
+                'dropped': self.input.dropped
+            })
+        return stats
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues
+    
+    Every stage runs in its own thread, so a slow stage only limits its
+    own throughput: the others keep working on the next items while it
+    catches up, and the queue policies decide what happens to the
+    backlog. Stages normally consume the previous stage's output; a stage
+    can branch off an earlier one instead (e.g. persistence and rendering
+    both consuming the counting results).
+    """
+    
+    def __init__(self, monitor=None):
+        """
+        Initialize pipeline
+        
+        Parameters
+        ----------
+        monitor : callable, optional
+            Called as monitor(stage_name, seconds) after each item of every
+            stage (e.g. QoSController.record)
+        """
+        self.monitor = monitor
+        self.stages = []
+    
+    def add_source(self, name, func):
+        """
+        Add the stage that produces work
+        
+        Parameters
+        ----------
+        name : str
+            Stage name
+        func : callable
+            Called repeatedly, returns the next item or None when there is
+            nothing yet; it should wait briefly instead of spinning
+        
+        Returns
+        -------
+        Stage
+            The source stage
+        """
+        if self.stages:
+            raise ValueError("The source must be the first stage")
+        stage = Stage(name, func, monitor=self.monitor)
+        self.stages.append(stage)
+        return stage
+    
+    def add_stage(self, name, func, queue_size=2, drop_policy=LOSSLESS, after=None):
+        """
+        Add a stage consuming the output of another one
+        
+        Parameters
+        ----------
+        name : str
+            Stage name
+        func : callable
+            Called as func(item) for every item, returns the item for the
+            next stages or None
+        queue_size : int
+            Capacity of the stage's input queue
+        drop_policy : str
+            'lossless' blocks the upstream stage when the queue is full,
+            'latest' drops the oldest queued item
+        after : str, optional
+            Name of the stage to consume, defaults to the last added stage
+        
+        Returns
+        -------
+        Stage
+            The new stage
+        """
+        if not self.stages:
+            raise ValueError("Add a source first")
+        upstream = self.get_stage(after) if after else self.stages[-1]
+        if upstream is None:
+            raise ValueError(f"Unknown stage: {after}")
+        
+        queue = StageQueue(queue_size, drop_policy)
+        stage = Stage(name, func, queue, monitor=self.monitor)
+        upstream.outputs.append(queue)
+        self.stages.append(stage)
+        return stage
+    
+    def get_stage(self, name):
+        """Get a stage by name"""
+        return next((stage for stage in self.stages if stage.name == name), None)
+    
+    def start(self):
+        """Start all stage threads, consumers first"""
+        for stage in reversed(self.stages):
+            stage.start()
+        logger.info(f"Pipeline started: {' -> '.join(stage.name for stage in self.stages)}")
+    
+    def stop(self, timeout=5.0):
+        """
+        Stop the source and wait for the other stages to drain
+        
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for each stage
+        
+        Returns
+        -------
+        bool
+            True if every stage finished in time
+        """
+        if not self.stages:
+            return True
+        
+        self.stages[0].stopping.set()
+        finished = True
+        for stage in self.stages:
+            if stage.thread is not None:
+                stage.thread.join(timeout)
+                finished &= not stage.thread.is_alive()
+        
+        if not finished:
+            logger.warning("Pipeline stages did not finish in time")
+        return finished
+    
+    def get_stats(self):
+        """
+        Get per-stage statistics
+        
+        Returns
+        -------
+        dict
+            {stage_name: Stage.get_stats()}
+        """
+        return {stage.name: stage.get_stats() for stage in self.stages}
+    
+    def log_stats(self):
+        """Log latency and queue occupancy of every stage"""
+        for name, stats in self.get_stats().items():
+            queue = ''
+            if 'queued' in stats:
+                queue = f", queue {stats['queued']}/{stats['capacity']} (peak {stats['peak']}, dropped {stats['dropped']})"
+            logger.info(f"Pipeline {name}: {stats['processed']} items, {stats['latency_ms']:.1f}ms avg, "
+                        f"{stats['max_latency_ms']:.1f}ms max, busy {stats['busy']:.0%}{queue}")
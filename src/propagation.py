@@ -0,0 +1,100 @@
+"""
+Constant-velocity track propagation between detector runs
+"""
+
+import numpy as np
+from src.detections import Detections
+
+
+class TrackPropagator:
+    """
+    Predict track boxes on frames where the detector is not run
+    
+    Keeps a constant-velocity model per track (an alpha-beta filter, the
+    steady-state form of a constant-velocity Kalman filter) in NumPy
+    arrays, so propagating all tracks is a single array operation.
+    """
+    
+    def __init__(self, smoothing=0.6):
+        """
+        Initialize track propagator
+        
+        Parameters
+        ----------
+        smoothing : float
+            Weight of the newest velocity measurement (0-1); lower values
+            give steadier but slower-reacting predictions
+        """
+        self.smoothing = smoothing
+        self.reset()
+    
+    def reset(self):
+        """Forget all tracks"""
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.velocity = np.empty((0, 4), dtype=np.float32)
+        self.confidence = np.empty(0, dtype=np.float32)
+        self.last_time = None
+        self.frames_since_observe = 0
+    
+    def observe(self, detections, timestamp):
+        """
+        Update the motion model with fresh detector output
+        
+        Parameters
+        ----------
+        detections : Detections
+            Tracked detections from the detector
+        timestamp : float
+            Capture time of the frame in seconds
+        """
+        tracked = detections[detections.tracked]
+        boxes = tracked.xyxy.astype(np.float32)
+        velocity = np.zeros_like(boxes)
+        
+        if self.last_time is not None and len(self.track_ids) and len(tracked):
+            dt = max(timestamp - self.last_time, 1e-3)
+            
+            # Match current tracks to previous state by id, all at once
+            order = np.argsort(self.track_ids)
+            positions = np.searchsorted(self.track_ids[order], tracked.track_id)
+            positions = np.clip(positions, 0, len(order) - 1)
+            previous = order[positions]
+            known = self.track_ids[previous] == tracked.track_id
+            
+            measured = (boxes[known] - self.boxes[previous[known]]) / dt
+            velocity[known] = (self.smoothing * measured +
+                               (1 - self.smoothing) * self.velocity[previous[known]])
+        
+        self.track_ids = tracked.track_id.copy()
+        self.boxes = boxes
+        self.velocity = velocity
+        self.confidence = tracked.confidence.copy()
+        self.last_time = timestamp
+        self.frames_since_observe = 0
+    
+    def predict(self, timestamp):
+        """
+        Predict where every track is at a given time
+        
+        Parameters
+        ----------
+        timestamp : float
+            Capture time of the frame in seconds
+        
+        Returns
+        -------
+        Detections
+            Predicted boxes with the last observed confidences and track IDs
+        """
+        self.frames_since_observe += 1
+        if self.last_time is None or not len(self.track_ids):
+            return Detections.empty()
+        
+        dt = timestamp - self.last_time
+        boxes = self.boxes + self.velocity * dt
+        return Detections(boxes, self.confidence, self.track_ids)
+    
+    def min_confidence(self):
+        """Lowest confidence among the tracks (1.0 when there are none)"""
+        return float(self.confidence.min()) if len(self.confidence) else 1.0
@@ -0,0 +1,295 @@
+"""
+Adaptive quality-of-service control for the processing loop
+"""
+
+import time
+from collections import deque
+from src.utils.logger import logger
+
+
+class QoSController:
+    """
+    Hold a target frame rate by trading detection quality for speed
+    
+    Every `window` seconds the measured processing time per frame (detect,
+    count and render stages) is compared with the time budget of the
+    frames the cameras ask for: target_fps per camera, capped by each
+    source's own frame rate divided by the frame skip. The processed frame
+    rate itself is not used, since a slow or skipped source caps it
+    whatever the load. When the load exceeds the budget, one knob is
+    degraded, cheapest loss of accuracy first:
+    
+    1. detect interval (tracks are predicted on the skipped frames)
+    2. model input size (imgsz, in stride-32 steps; not for a remote
+       inference server, whose size is fixed)
+    3. camera frame skip
+    
+    A knob is restored (in reverse order) once the estimated load after
+    restoring it still leaves `headroom`. Every knob stops at its floor,
+    and every change is logged with the per-stage latencies that caused it.
+    """
+    
+    STAGES = ('capture', 'detect', 'count', 'render')
+    
+    # Stages that keep the CPU busy; capture time is mostly spent waiting
+    # for the source's next frame
+    BUSY_STAGES = ('detect', 'count', 'render')
+    
+    # Model input sizes must be multiples of the YOLO stride
+    IMGSZ_STRIDE = 32
+    
+    def __init__(self, target_fps=15, min_imgsz=320, max_frame_skip=3,
+                 max_detect_interval=4, imgsz_step=0.8, window=2.0, headroom=1.3):
+        """
+        Initialize QoS controller
+        
+        Parameters
+        ----------
+        target_fps : float
+            Frames per second to process per camera
+        min_imgsz : int
+            Smallest model input size imgsz may drop to
+        max_frame_skip : int
+            Largest camera frame skip
+        max_detect_interval : int
+            Largest detect-every-N interval
+        imgsz_step : float
+            Factor imgsz is scaled by per step (rounded to the stride)
+        window : float
+            Seconds between evaluations
+        headroom : float
+            Restore quality only when the estimated load after restoring
+            leaves this factor of spare time
+        """
+        self.target_fps = target_fps
+        self.min_imgsz = int(min_imgsz)
+        self.max_frame_skip = max(1, int(max_frame_skip))
+        self.max_detect_interval = max(1, int(max_detect_interval))
+        self.imgsz_step = imgsz_step
+        self.window = window
+        self.headroom = headroom
+        
+        # Current knob settings, filled from the manager on first use
+        self.base = None
+        self.detect_interval = None
+        self.imgsz_sizes = []  # Input sizes from the configured one down to the floor
+        self.imgsz = None
+        self.frame_skip = None
+        
+        self.adjustments = deque(maxlen=50)
+        self.last_fps = 0.0
+        self.last_load = 0.0
+        self._reset_window()
+    
+    def _reset_window(self):
+        """Start a new measurement window"""
+        self.window_start = time.monotonic()
+        self.window_frames = 0
+        self.stage_totals = dict.fromkeys(self.STAGES, 0.0)
+    
+    def record(self, stage, seconds):
+        """
+        Add time spent in a pipeline stage
+        
+        Parameters
+        ----------
+        stage : str
+            One of STAGES
+        seconds : float
+            Time spent
+        """
+        self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+    
+    def frame_done(self, manager, frames=1):
+        """
+        Count processed frames and adjust the knobs once per window
+        
+        Parameters
+        ----------
+        manager : CameraManager
+            Manager whose detector and streams are adjusted
+        frames : int
+            Frames processed since the last call
+        """
+        self.window_frames += frames
+        elapsed = time.monotonic() - self.window_start
+        if elapsed < self.window or not manager.streams:
+            return
+        if not self.window_frames:
+            self._reset_window()
+            return
+        
+        if self.base is None:
+            self._read_base(manager)
+        
+        streams = list(manager.streams.values())
+        fps = self.window_frames / elapsed / len(streams)
+        self.last_fps = fps
+        
+        # Seconds of work per frame against the frames asked for per second
+        detect = self.stage_totals.get('detect', 0.0) / self.window_frames
+        busy = sum(self.stage_totals.get(stage, 0.0) for stage in self.BUSY_STAGES) / self.window_frames
+        self.last_load = busy * self._demand(streams, self.frame_skip)
+        
+        if self.last_load > 1.0:
+            change = self._degrade()
+        elif self._restored_load(busy, detect, streams) * self.headroom < 1.0:
+            change = self._restore()
+        else:
+            change = None
+        
+        if change:
+            self._apply(manager)
+            self._report(change, fps)
+        self._reset_window()
+    
+    def _demand(self, streams, frame_skip):
+        """
+        Get the frames per second the cameras ask for
+        
+        Parameters
+        ----------
+        streams : list
+            CameraStreams of the manager
+        frame_skip : int
+            Camera frame skip
+        
+        Returns
+        -------
+        float
+            Sum over cameras of target_fps, capped by the source frame
+            rate divided by frame_skip
+        """
+        return sum(
+            min(self.target_fps, (getattr(stream.camera, 'fps', 0) or self.target_fps) / float(frame_skip))
+            for stream in streams
+        )
+    
+    def _restored_load(self, busy, detect, streams):
+        """
+        Estimate the load after the next _restore() step
+        
+        Parameters
+        ----------
+        busy : float
+            Measured seconds of work per frame
+        detect : float
+            Part of busy spent in the detector
+        streams : list
+            CameraStreams of the manager
+        
+        Returns
+        -------
+        float
+            Expected load (1.0 uses the whole time budget); infinite at full
+            quality, when there is nothing to restore
+        """
+        if self.frame_skip > self.base['frame_skip']:
+            return busy * self._demand(streams, self.frame_skip - 1)
+        
+        demand = self._demand(streams, self.frame_skip)
+        if self.imgsz != self.base['imgsz']:
+            # Detector time grows with the model input area
+            larger = self.imgsz_sizes[self.imgsz_sizes.index(self.imgsz) - 1]
+            return (busy + detect * ((larger / float(self.imgsz)) ** 2 - 1.0)) * demand
+        if self.detect_interval > self.base['detect_interval']:
+            # The detector runs on one frame in detect_interval
+            factor = self.detect_interval / float(self.detect_interval - 1)
+            return (busy + detect * (factor - 1.0)) * demand
+        return float('inf')
+    
+    def _read_base(self, manager):
+        """Take the configured knob settings as the best quality level"""
+        streams = list(manager.streams.values())
+        imgsz = getattr(manager.detector, 'imgsz', None)
+        if getattr(manager.detector, 'remote', False):
+            imgsz = None  # Set on the server, not here
+        
+        self.base = {
+            'detect_interval': streams[0].detect_interval,
+            'imgsz': imgsz,
+            'frame_skip': streams[0].camera.frame_skip
+        }
+        self.detect_interval = self.base['detect_interval']
+        self.imgsz = self.base['imgsz']
+        self.frame_skip = self.base['frame_skip']
+        
+        self.imgsz_sizes = [imgsz] if imgsz else []
+        while self.imgsz_sizes:
+            smaller = int(round(self.imgsz_sizes[-1] * self.imgsz_step / self.IMGSZ_STRIDE)) * self.IMGSZ_STRIDE
+            if smaller >= self.imgsz_sizes[-1] or smaller < max(self.min_imgsz, self.IMGSZ_STRIDE):
+                break
+            self.imgsz_sizes.append(smaller)
+    
+    def _degrade(self):
+        """Lower quality by one step, returns a description or None at the floors"""
+        if self.detect_interval < self.max_detect_interval:
+            self.detect_interval += 1
+            return f"detect interval -> {self.detect_interval}"
+        
+        if self.imgsz is not None and self.imgsz != self.imgsz_sizes[-1]:
+            self.imgsz = self.imgsz_sizes[self.imgsz_sizes.index(self.imgsz) + 1]
+            return f"model input size -> {self.imgsz}"
+        
+        if self.frame_skip < self.max_frame_skip:
+            self.frame_skip += 1
+            return f"frame skip -> {self.frame_skip}"
+        return None
+    
+    def _restore(self):
+        """Raise quality by one step, returns a description or None at full quality"""
+        if self.frame_skip > self.base['frame_skip']:
+            self.frame_skip -= 1
+            return f"frame skip -> {self.frame_skip}"
+        
+        if self.imgsz != self.base['imgsz']:
+            self.imgsz = self.imgsz_sizes[self.imgsz_sizes.index(self.imgsz) - 1]
+            return f"model input size -> {self.imgsz}"
+        
+        if self.detect_interval > self.base['detect_interval']:
+            self.detect_interval -= 1
+            return f"detect interval -> {self.detect_interval}"
+        return None
+    
+    def _apply(self, manager):
+        """Push the current knob settings to the detector and streams"""
+        if self.imgsz is not None:
+            manager.detector.imgsz = self.imgsz
+        for stream in list(manager.streams.values()):
+            stream.set_detect_interval(self.detect_interval)
+            stream.camera.frame_skip = self.frame_skip
+    
+    def _report(self, change, fps):
+        """Log an adjustment together with the stage latencies behind it"""
+        frames = max(self.window_frames, 1)
+        stages = ', '.join(
+            f"{stage} {1000 * self.stage_totals.get(stage, 0.0) / frames:.1f}ms" for stage in self.STAGES
+        )
+        self.adjustments.append({'time': time.time(), 'fps': fps, 'change': change})
+        logger.info(f"QoS: {fps:.1f} FPS/camera (target {self.target_fps}), load {self.last_load:.0%}, "
+                    f"{stages} -> {change}")
+    
+    def get_stats(self):
+        """
+        Get the current QoS state
+        
+        Returns
+        -------
+        dict
+            fps, load (share of the time budget in use), degraded flag,
+            knob settings and the last adjustment
+        """
+        degraded = self.base is not None and (
+            self.detect_interval != self.base['detect_interval'] or
+            self.imgsz != self.base['imgsz'] or
+            self.frame_skip != self.base['frame_skip']
+        )
+        return {
+            'fps': self.last_fps,
+            'load': self.last_load,
+            'degraded': degraded,
+            'detect_interval': self.detect_interval,
+            'imgsz': self.imgsz,
+            'frame_skip': self.frame_skip,
+            'last_change': self.adjustments[-1]['change'] if self.adjustments else None
+        }
@@ -0,0 +1,246 @@
+"""
+Post-training INT8 quantization of the person detector
+
+Calibrates on a folder of frames from our own cameras and writes an INT8
+model next to the original weights. Select it by pointing
+detection.model at the output path, then check it with
+benchmarks/verify_int8.py before deploying.
+
+Usage:
+    python -m src.quantize --calibration data/calibration --backend openvino
+    python -m src.quantize --extract-from clip.mp4 --calibration data/calibration
+"""
+
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+from src.utils.logger import logger
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def extract_calibration_frames(video_path, output_dir, every=30, limit=300):
+    """
+    Save every Nth frame of a clip as a calibration image
+    
+    Parameters
+    ----------
+    video_path : str
+        Recorded clip from the target camera
+    output_dir : str
+        Folder to write JPG frames into
+    every : int
+        Keep one frame out of this many
+    limit : int
+        Maximum number of frames to save
+    
+    Returns
+    -------
+    int
+        Number of frames written
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    cap = cv2.VideoCapture(str(video_path))
+    index, written = 0, 0
+    while written < limit:
+        if not cap.grab():
+            break
+        if index % every == 0:
+            ret, frame = cap.retrieve()
+            if ret:
+                cv2.imwrite(str(output_dir / f"{Path(video_path).stem}_{index:06d}.jpg"), frame)
+                written += 1
+        index += 1
+    cap.release()
+    
+    logger.info(f"Extracted {written} calibration frames from {video_path}")
+    return written
+
+
+def list_calibration_images(calibration_dir, limit=300):
+    """Get calibration image paths, sorted for reproducible results"""
+    images = sorted(
+        path for path in Path(calibration_dir).rglob('*')
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    )
+    if not images:
+        raise FileNotFoundError(f"No calibration images found in {calibration_dir}")
+    return images[:limit]
+
+
+def letterbox(frame, imgsz):
+    """
+    Preprocess a frame the way YOLO does: letterbox, RGB, CHW, 0-1 float
+    
+    Parameters
+    ----------
+    frame : numpy.ndarray
+        BGR frame
+    imgsz : int
+        Square model input size
+    
+    Returns
+    -------
+    numpy.ndarray
+        (1, 3, imgsz, imgsz) float32 tensor
+    """
+    height, width = frame.shape[:2]
+    scale = min(imgsz / float(width), imgsz / float(height))
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_height) // 2, (imgsz - new_width) // 2
+    canvas[top:top + new_height, left:left + new_width] = resized
+    
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return tensor[None]
+
+
+def quantize_openvino(model_path, calibration_dir, imgsz=640, limit=300):
+    """
+    Quantize to an INT8 OpenVINO model with NNCF through ultralytics export
+    
+    Returns
+    -------
+    Path
+        <name>_<imgsz>_int8_openvino_model directory
+    """
+    from ultralytics import YOLO
+    
+    source = Path(model_path)
+    output = source.with_name(f"{source.stem}_{imgsz}_int8_openvino_model")
+    model = YOLO(str(source))
+    
+    # ultralytics reads calibration images from a dataset yaml
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / 'images'
+        image_dir.mkdir()
+        for image in list_calibration_images(calibration_dir, limit):
+            (image_dir / image.name).symlink_to(image.resolve())
+        
+        data_yaml = Path(tmp) / 'calibration.yaml'
+        with open(data_yaml, 'w') as f:
+            yaml.safe_dump({
+                'path': tmp, 'train': 'images', 'val': 'images',
+                'names': dict(model.names)
+            }, f)
+        
+        exported = model.export(
+            format='openvino', int8=True, data=str(data_yaml),
+            imgsz=imgsz, dynamic=True, verbose=False
+        )
+    
+    if output.exists():
+        shutil.rmtree(output)
+    Path(exported).rename(output)
+    return output
+
+
+def quantize_onnx(model_path, calibration_dir, imgsz=640, limit=300):
+    """
+    Quantize to an INT8 ONNX model with onnxruntime static quantization
+    
+    Returns
+    -------
+    Path
+        <name>_<imgsz>_int8.onnx
+    """
+    from ultralytics import YOLO
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    )
+    
+    source = Path(model_path)
+    output = source.with_name(f"{source.stem}_{imgsz}_int8.onnx")
+    fp32_path = YOLO(str(source)).export(format='onnx', imgsz=imgsz, dynamic=True, verbose=False)
+    images = list_calibration_images(calibration_dir, limit)
+    
+    class FrameReader(CalibrationDataReader):
+        """Feed letterboxed calibration frames to the quantizer"""
+        
+        def __init__(self):
+            self.images = iter(images)
+        
+        def get_next(self):
+            for image in self.images:
+                frame = cv2.imread(str(image))
+                if frame is not None:
+                    return {'images': letterbox(frame, imgsz)}
+            return None
+    
+    quantize_static(
+        fp32_path, str(output), FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+    return output
+
+
+def quantize_model(model_path, calibration_dir, backend='openvino', imgsz=640, limit=300):
+    """
+    Create an INT8 model calibrated on our own frames
+    
+    Parameters
+    ----------
+    model_path : str
+        FP32 .pt model
+    calibration_dir : str
+        Folder of representative frames from the target cameras
+    backend : str
+        'openvino' or 'onnxruntime'
+    imgsz : int
+        Model input size
+    limit : int
+        Maximum number of calibration frames
+    
+    Returns
+    -------
+    Path
+        Quantized model, usable as detection.model
+    """
+    logger.info(f"Quantizing {model_path} to INT8 for {backend} using {calibration_dir}")
+    if backend == 'openvino':
+        output = quantize_openvino(model_path, calibration_dir, imgsz, limit)
+    elif backend == 'onnxruntime':
+        output = quantize_onnx(model_path, calibration_dir, imgsz, limit)
+    else:
+        raise ValueError(f"INT8 quantization is not supported for backend '{backend}'")
+    
+    logger.info(f"INT8 model written to {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='models/yolov8n.pt', help='FP32 model to quantize')
+    parser.add_argument('--calibration', default='data/calibration', help='Folder of calibration frames')
+    parser.add_argument('--backend', default='openvino', choices=['openvino', 'onnxruntime'])
+    parser.add_argument('--imgsz', type=int, default=640, help='Model input size')
+    parser.add_argument('--limit', type=int, default=300, help='Max calibration frames')
+    parser.add_argument('--extract-from', nargs='*', default=[], metavar='CLIP',
+                        help='Extract calibration frames from these clips first')
+    parser.add_argument('--every', type=int, default=30, help='Keep every Nth frame when extracting')
+    args = parser.parse_args()
+    
+    for clip in args.extract_from:
+        extract_calibration_frames(clip, args.calibration, args.every, args.limit)
+    
+    output = quantize_model(args.model, args.calibration, args.backend, args.imgsz, args.limit)
+    print(f"\nINT8 model: {output}")
+    print(f"Verify it:  python benchmarks/verify_int8.py --candidate {output} --clips <clips>")
+    print(f"Enable it:  set detection.model: {output} in config/settings.yaml")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Built-in person tracker with explicit per-stream state
+"""
+
+import numpy as np
+from src.detections import Detections, box_iou
+
+try:
+    import lap
+except ImportError:
+    lap = None
+
+
+def linear_assignment(cost, max_cost):
+    """
+    Solve a rectangular assignment problem
+    
+    Parameters
+    ----------
+    cost : numpy.ndarray
+        (N, M) cost matrix
+    max_cost : float
+        Pairs costing more than this are never matched
+    
+    Returns
+    -------
+    tuple
+        (rows, cols) index arrays of the matched pairs
+    """
+    if cost.size == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    
+    if lap is not None:
+        _, row_to_col, _ = lap.lapjv(cost, extend_cost=True, cost_limit=max_cost)
+        rows = np.flatnonzero(row_to_col >= 0)
+        return rows, row_to_col[rows]
+    
+    # Greedy fallback when lap is not installed
+    rows, cols = [], []
+    cost = cost.copy()
+    while True:
+        row, col = np.unravel_index(cost.argmin(), cost.shape)
+        if cost[row, col] > max_cost:
+            break
+        rows.append(row)
+        cols.append(col)
+        cost[row, :] = np.inf
+        cost[:, col] = np.inf
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+class ByteTracker:
+    """
+    ByteTrack-style IoU tracker for one camera
+    
+    Track state lives in NumPy arrays and association is one IoU matrix
+    per stage: confident detections are matched to all tracks first, then
+    low-confidence detections to the tracks still unmatched, which keeps
+    IDs through partial occlusion. Boxes are predicted with a constant
+    velocity before matching.
+    """
+    
+    def __init__(self, track_threshold=0.5, low_threshold=0.1, match_threshold=0.8,
+                 track_buffer=30, min_hits=2):
+        """
+        Initialize tracker
+        
+        Parameters
+        ----------
+        track_threshold : float
+            Detections at or above this confidence start and update tracks
+        low_threshold : float
+            Detections below this confidence are ignored
+        match_threshold : float
+            Maximum matching cost (1 - IoU) for confident detections
+        track_buffer : int
+            Frames a lost track is kept before it is removed
+        min_hits : int
+            Matches needed before a new track gets an ID
+        """
+        self.track_threshold = track_threshold
+        self.low_threshold = low_threshold
+        self.match_threshold = match_threshold
+        self.track_buffer = track_buffer
+        self.min_hits = min_hits
+        self.reset()
+    
+    def reset(self):
+        """Remove all tracks"""
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.velocity = np.empty((0, 4), dtype=np.float32)
+        self.scores = np.empty(0, dtype=np.float32)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.lost = np.empty(0, dtype=np.int32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.next_id = 1
+        self.frame_count = 0
+    
+    def update(self, detections):
+        """
+        Associate the detections of a new frame with the tracks
+        
+        Parameters
+        ----------
+        detections : Detections
+            Untracked detections of the current frame
+        
+        Returns
+        -------
+        Detections
+            Detections kept by the tracker; confirmed tracks carry their
+            ID, new tracks -1 until they reach min_hits
+        """
+        self.frame_count += 1
+        keep = detections.confidence >= self.low_threshold
+        boxes = detections.xyxy[keep].astype(np.float32)
+        scores = detections.confidence[keep]
+        
+        # Constant-velocity prediction of every track
+        predicted = self.boxes + self.velocity
+        track_of = np.full(len(boxes), -1, dtype=int)
+        unmatched_tracks = np.arange(len(predicted))
+        
+        # Stage 1: confident detections against all tracks
+        high = np.flatnonzero(scores >= self.track_threshold)
+        rows, cols = linear_assignment(
+            1.0 - box_iou(predicted, boxes[high]), self.match_threshold
+        )
+        track_of[high[cols]] = rows
+        unmatched_tracks = np.setdiff1d(unmatched_tracks, rows)
+        
+        # Stage 2: low-confidence detections against the remaining tracks
+        # that were seen in the previous frame
+        low = np.flatnonzero(scores < self.track_threshold)
+        recent = unmatched_tracks[self.lost[unmatched_tracks] == 0]
+        rows, cols = linear_assignment(1.0 - box_iou(predicted[recent], boxes[low]), 0.5)
+        track_of[low[cols]] = recent[rows]
+        
+        # Update matched tracks
+        matched = np.flatnonzero(track_of >= 0)
+        tracks = track_of[matched]
+        self.velocity[tracks] = 0.5 * self.velocity[tracks] + 0.5 * (boxes[matched] - self.boxes[tracks])
+        self.boxes[tracks] = boxes[matched]
+        self.scores[tracks] = scores[matched]
+        self.hits[tracks] += 1
+        self.lost += 1
+        self.lost[tracks] = 0
+        
+        # Unconfirmed tracks that missed a frame are dropped right away,
+        # confirmed ones after track_buffer frames
+        confirmed = self.ids > 0
+        alive = (self.lost == 0) | (confirmed & (self.lost <= self.track_buffer))
+        
+        # Start tentative tracks from unmatched confident detections
+        new = high[track_of[high] < 0]
+        count = len(new)
+        
+        remap = np.cumsum(alive) - 1
+        self.boxes = np.vstack([self.boxes[alive], boxes[new]])
+        self.velocity = np.vstack([self.velocity[alive], np.zeros((count, 4), dtype=np.float32)])
+        self.scores = np.concatenate([self.scores[alive], scores[new]])
+        self.hits = np.concatenate([self.hits[alive], np.ones(count, dtype=np.int32)])
+        self.lost = np.concatenate([self.lost[alive], np.zeros(count, dtype=np.int32)])
+        self.ids = np.concatenate([self.ids[alive], np.zeros(count, dtype=np.int64)])
+        track_of[matched] = remap[tracks]
+        track_of[new] = np.arange(count) + alive.sum()
+        
+        # Hand out IDs to tracks that just got confirmed
+        promote = (self.ids == 0) & (self.hits >= self.min_hits)
+        if self.frame_count == 1:
+            promote = self.ids == 0
+        self.ids[promote] = np.arange(self.next_id, self.next_id + promote.sum())
+        self.next_id += int(promote.sum())
+        
+        # Report tracked detections; low-confidence ones only when matched
+        report = track_of >= 0
+        track_ids = self.ids[track_of[report]]
+        return Detections(boxes[report], scores[report], np.where(track_ids > 0, track_ids, -1))
+
+
+class StreamTracker:
+    """
+    Keeps one ByteTracker per camera so a single detector can serve
+    several streams
+    """
+    
+    def __init__(self, **tracker_args):
+        """
+        Initialize stream tracker
+        
+        Parameters
+        ----------
+        **tracker_args
+            Arguments for each ByteTracker
+        """
+        self.tracker_args = tracker_args
+        self.trackers = {}
+    
+    def update(self, stream_id, detections):
+        """
+        Track detections of one stream
+        
+        Parameters
+        ----------
+        stream_id : str
+            Camera identifier
+        detections : Detections
+            Untracked detections of the stream's current frame
+        
+        Returns
+        -------
+        Detections
+            Detections with track IDs, see ByteTracker.update()
+        """
+        tracker = self.trackers.get(stream_id)
+        if tracker is None:
+            tracker = self.trackers[stream_id] = ByteTracker(**self.tracker_args)
+        return tracker.update(detections)
+    
+    def reset(self, stream_id=None):
+        """Reset one stream, or all streams when stream_id is None"""
+        if stream_id is None:
+            self.trackers.clear()
+        else:
+            self.trackers.pop(stream_id, None)
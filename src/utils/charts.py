@@ -3,16 +3,20 @@ Visual chart generation for reports
 All processing done locally using matplotlib
 """
 
-import matplotlib
-matplotlib.use('Agg')  # Use non-GUI backend
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 import sqlite3
 from pathlib import Path
 from src.utils.logger import logger
 
 
+def _pyplot():
+    """Import pyplot on first use, matplotlib is slow to import"""
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-GUI backend
+    import matplotlib.pyplot as plt
+    return plt
+
+
 class ChartGenerator:
     """Generate visual charts and reports from counting data"""
     
@@ -77,6 +81,7 @@ class ChartGenerator:
             outs = [row['total_out'] for row in results]
             
             # Create chart
+            plt = _pyplot()
             fig, ax = plt.subplots(figsize=(12, 6))
             
             x = range(len(hours))
@@ -146,6 +151,8 @@ class ChartGenerator:
             totals = [row['total_in'] + row['total_out'] for row in results]
             
             # Create chart
+            import matplotlib.dates as mdates
+            plt = _pyplot()
             fig, ax = plt.subplots(figsize=(12, 6))
             
             ax.plot(dates, totals, marker='o', linewidth=2, markersize=8, color='#2196F3')
@@ -222,6 +229,7 @@ class ChartGenerator:
                 heatmap_data = np.where(counts > 0, heatmap_data / counts, 0)
             
             # Create heatmap
+            plt = _pyplot()
             fig, ax = plt.subplots(figsize=(10, 12))
             
             im = ax.imshow(heatmap_data, cmap='YlOrRd', aspect='auto')
@@ -4,6 +4,7 @@ Database management for storing counting data and generating reports
 
 import sqlite3
 import csv
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from src.utils.logger import logger
@@ -24,13 +25,15 @@ class CounterDatabase:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.conn = None
+        self.lock = threading.RLock()  # Shared by GUI and processing threads
         self.create_tables()
     
     def connect(self):
         """Establish database connection"""
         try:
-            self.conn = sqlite3.connect(str(self.db_path))
-            self.conn.row_factory = sqlite3.Row  # Enable column access by name
+            with self.lock:
+                self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+                self.conn.row_factory = sqlite3.Row  # Enable column access by name
             return True
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
@@ -38,56 +41,57 @@ class CounterDatabase:
     
     def create_tables(self):
         """Create database tables if they don't exist"""
-        if not self.connect():
-            return False
-        
-        try:
-            cursor = self.conn.cursor()
-            
-            # Count events table (individual IN/OUT events)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS count_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME NOT NULL,
-                    direction TEXT NOT NULL,
-                    track_id INTEGER,
-                    camera_id TEXT,
-                    count_total INTEGER
-                )
-            ''')
-            
-            # Hourly statistics table (aggregated data)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS hourly_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date DATE NOT NULL,
-                    hour INTEGER NOT NULL,
-                    total_in INTEGER DEFAULT 0,
-                    total_out INTEGER DEFAULT 0,
-                    camera_id TEXT,
-                    UNIQUE(date, hour, camera_id)
-                )
-            ''')
-            
-            # Sessions table (track when counting started/stopped)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    start_time DATETIME NOT NULL,
-                    end_time DATETIME,
-                    total_in INTEGER DEFAULT 0,
-                    total_out INTEGER DEFAULT 0,
-                    camera_id TEXT
-                )
-            ''')
-            
-            self.conn.commit()
-            logger.info("Database tables created/verified")
-            return True
+        with self.lock:
+            if not self.connect():
+                return False
             
-        except Exception as e:
-            logger.error(f"Error creating tables: {e}")
-            return False
+            try:
+                cursor = self.conn.cursor()
+                
+                # Count events table (individual IN/OUT events)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS count_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp DATETIME NOT NULL,
+                        direction TEXT NOT NULL,
+                        track_id INTEGER,
+                        camera_id TEXT,
+                        count_total INTEGER
+                    )
+                ''')
+                
+                # Hourly statistics table (aggregated data)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS hourly_stats (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date DATE NOT NULL,
+                        hour INTEGER NOT NULL,
+                        total_in INTEGER DEFAULT 0,
+                        total_out INTEGER DEFAULT 0,
+                        camera_id TEXT,
+                        UNIQUE(date, hour, camera_id)
+                    )
+                ''')
+                
+                # Sessions table (track when counting started/stopped)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        start_time DATETIME NOT NULL,
+                        end_time DATETIME,
+                        total_in INTEGER DEFAULT 0,
+                        total_out INTEGER DEFAULT 0,
+                        camera_id TEXT
+                    )
+                ''')
+                
+                self.conn.commit()
+                logger.info("Database tables created/verified")
+                return True
+                
+            except Exception as e:
+                logger.error(f"Error creating tables: {e}")
+                return False
     
     def log_event(self, direction, track_id=None, camera_id='default', count_total=0):
         """
@@ -104,19 +108,20 @@ class CounterDatabase:
         count_total : int
             Current total count
         """
-        if not self.conn:
-            self.connect()
-        
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO count_events (timestamp, direction, track_id, camera_id, count_total)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (datetime.now(), direction, track_id, camera_id, count_total))
-            self.conn.commit()
-            
-            # Update hourly stats
-            self._update_hourly_stats(direction, camera_id)
+            with self.lock:
+                if not self.conn:
+                    self.connect()
+                
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    INSERT INTO count_events (timestamp, direction, track_id, camera_id, count_total)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (datetime.now(), direction, track_id, camera_id, count_total))
+                self.conn.commit()
+                
+                # Update hourly stats
+                self._update_hourly_stats(direction, camera_id)
             
         except Exception as e:
             logger.error(f"Error logging event: {e}")
@@ -128,38 +133,39 @@ class CounterDatabase:
         hour = now.hour
         
         try:
-            cursor = self.conn.cursor()
-            
-            # Check if record exists
-            cursor.execute('''
-                SELECT id, total_in, total_out FROM hourly_stats
-                WHERE date = ? AND hour = ? AND camera_id = ?
-            ''', (date, hour, camera_id))
-            
-            row = cursor.fetchone()
-            
-            if row:
-                # Update existing record
-                if direction == 'IN':
-                    cursor.execute('''
-                        UPDATE hourly_stats SET total_in = total_in + 1
-                        WHERE id = ?
-                    ''', (row['id'],))
+            with self.lock:
+                cursor = self.conn.cursor()
+                
+                # Check if record exists
+                cursor.execute('''
+                    SELECT id, total_in, total_out FROM hourly_stats
+                    WHERE date = ? AND hour = ? AND camera_id = ?
+                ''', (date, hour, camera_id))
+                
+                row = cursor.fetchone()
+                
+                if row:
+                    # Update existing record
+                    if direction == 'IN':
+                        cursor.execute('''
+                            UPDATE hourly_stats SET total_in = total_in + 1
+                            WHERE id = ?
+                        ''', (row['id'],))
+                    else:
+                        cursor.execute('''
+                            UPDATE hourly_stats SET total_out = total_out + 1
+                            WHERE id = ?
+                        ''', (row['id'],))
                 else:
+                    # Insert new record
+                    total_in = 1 if direction == 'IN' else 0
+                    total_out = 1 if direction == 'OUT' else 0
                     cursor.execute('''
-                        UPDATE hourly_stats SET total_out = total_out + 1
-                        WHERE id = ?
-                    ''', (row['id'],))
-            else:
-                # Insert new record
-                total_in = 1 if direction == 'IN' else 0
-                total_out = 1 if direction == 'OUT' else 0
-                cursor.execute('''
-                    INSERT INTO hourly_stats (date, hour, total_in, total_out, camera_id)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (date, hour, total_in, total_out, camera_id))
-            
-            self.conn.commit()
+                        INSERT INTO hourly_stats (date, hour, total_in, total_out, camera_id)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (date, hour, total_in, total_out, camera_id))
+                
+                self.conn.commit()
             
         except Exception as e:
             logger.error(f"Error updating hourly stats: {e}")
@@ -168,23 +174,29 @@ class CounterDatabase:
         """
         Start a new counting session
         
+        Parameters
+        ----------
+        camera_id : str
+            Camera identifier
+        
         Returns
         -------
         int
             Session ID
         """
-        if not self.conn:
-            self.connect()
-        
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO sessions (start_time, camera_id)
-                VALUES (?, ?)
-            ''', (datetime.now(), camera_id))
-            self.conn.commit()
-            session_id = cursor.lastrowid
-            logger.info(f"Session {session_id} started")
+            with self.lock:
+                if not self.conn:
+                    self.connect()
+                
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    INSERT INTO sessions (start_time, camera_id)
+                    VALUES (?, ?)
+                ''', (datetime.now(), camera_id))
+                self.conn.commit()
+                session_id = cursor.lastrowid
+            logger.info(f"Session {session_id} started for camera {camera_id}")
             return session_id
         except Exception as e:
             logger.error(f"Error starting session: {e}")
@@ -203,44 +215,50 @@ class CounterDatabase:
         total_out : int
             Total people out
         """
-        if not self.conn:
-            self.connect()
-        
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                UPDATE sessions
-                SET end_time = ?, total_in = ?, total_out = ?
-                WHERE id = ?
-            ''', (datetime.now(), total_in, total_out, session_id))
-            self.conn.commit()
+            with self.lock:
+                if not self.conn:
+                    self.connect()
+                
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    UPDATE sessions
+                    SET end_time = ?, total_in = ?, total_out = ?
+                    WHERE id = ?
+                ''', (datetime.now(), total_in, total_out, session_id))
+                self.conn.commit()
             logger.info(f"Session {session_id} ended")
         except Exception as e:
             logger.error(f"Error ending session: {e}")
     
-    def get_today_stats(self, camera_id='default'):
+    def get_today_stats(self, camera_id=None):
         """
         Get today's statistics
         
+        Parameters
+        ----------
+        camera_id : str, optional
+            Camera identifier, None for the sum over all cameras
+        
         Returns
         -------
         dict
             Today's counts
         """
-        if not self.conn:
-            self.connect()
-        
         try:
-            cursor = self.conn.cursor()
             today = datetime.now().date()
+            with self.lock:
+                if not self.conn:
+                    self.connect()
+                
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    SELECT SUM(total_in) as total_in, SUM(total_out) as total_out
+                    FROM hourly_stats
+                    WHERE date = ? AND (? IS NULL OR camera_id = ?)
+                ''', (today, camera_id, camera_id))
+                row = cursor.fetchone()
             
-            cursor.execute('''
-                SELECT SUM(total_in) as total_in, SUM(total_out) as total_out
-                FROM hourly_stats
-                WHERE date = ? AND camera_id = ?
-            ''', (today, camera_id))
-            
-            row = cursor.fetchone()
             if row:
                 return {
                     'in': row['total_in'] or 0,
@@ -252,7 +270,7 @@ class CounterDatabase:
             logger.error(f"Error getting today's stats: {e}")
             return {'in': 0, 'out': 0}
     
-    def export_to_csv(self, output_path, start_date=None, end_date=None, camera_id='default'):
+    def export_to_csv(self, output_path, start_date=None, end_date=None, camera_id=None):
         """
         Export data to CSV file
         
@@ -264,44 +282,45 @@ class CounterDatabase:
             Start date for export
         end_date : datetime, optional
             End date for export
-        camera_id : str
-            Camera identifier
+        camera_id : str, optional
+            Camera identifier, None exports every camera
         
         Returns
         -------
         bool
             True if export successful
         """
-        if not self.conn:
-            self.connect()
-        
         try:
-            cursor = self.conn.cursor()
-            
             # Default to last 30 days if not specified
             if not end_date:
                 end_date = datetime.now().date()
             if not start_date:
                 start_date = end_date - timedelta(days=30)
             
-            cursor.execute('''
-                SELECT date, hour, total_in, total_out
-                FROM hourly_stats
-                WHERE date BETWEEN ? AND ? AND camera_id = ?
-                ORDER BY date, hour
-            ''', (start_date, end_date, camera_id))
-            
-            rows = cursor.fetchall()
+            # The file is written after the lock is released
+            with self.lock:
+                if not self.conn:
+                    self.connect()
+                
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    SELECT date, hour, camera_id, total_in, total_out
+                    FROM hourly_stats
+                    WHERE date BETWEEN ? AND ? AND (? IS NULL OR camera_id = ?)
+                    ORDER BY date, hour, camera_id
+                ''', (start_date, end_date, camera_id, camera_id))
+                rows = cursor.fetchall()
             
             with open(output_path, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(['Date', 'Hour', 'Total IN', 'Total OUT', 'Net'])
+                writer.writerow(['Date', 'Hour', 'Camera', 'Total IN', 'Total OUT', 'Net'])
                 
                 for row in rows:
                     net = row['total_in'] - row['total_out']
                     writer.writerow([
                         row['date'],
                         row['hour'],
+                        row['camera_id'],
                         row['total_in'],
                         row['total_out'],
                         net
@@ -316,9 +335,11 @@ class CounterDatabase:
     
     def close(self):
         """Close database connection"""
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+        with self.lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+                logger.info("Database connection closed")
     
     def __del__(self):
         """Cleanup on object destruction"""
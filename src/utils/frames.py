@@ -0,0 +1,322 @@
+"""
+Frame helpers (resizing, buffers, drawing) shared by detection and display
+"""
+
+import threading
+import cv2
+import numpy as np
+from src.detections import Detections
+
+
+def fit_resolution(width, height, max_size):
+    """
+    Compute the largest size that fits inside max_size keeping aspect ratio
+    
+    Parameters
+    ----------
+    width : int
+        Source width
+    height : int
+        Source height
+    max_size : list or tuple
+        [max_width, max_height]; frames are never upscaled
+    
+    Returns
+    -------
+    tuple
+        (width, height) of the fitted frame
+    """
+    max_width, max_height = max_size
+    scale = min(max_width / float(width), max_height / float(height), 1.0)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def resize_to_fit(frame, max_size, out=None):
+    """
+    Downscale frame to fit inside max_size
+    
+    Parameters
+    ----------
+    frame : numpy.ndarray
+        Input frame
+    max_size : list or tuple or None
+        [max_width, max_height]; None returns the frame unchanged
+    out : numpy.ndarray, optional
+        Array of the fitted shape (see fit_resolution) to write the result
+        into, e.g. a frame bus slot; the frame is then always written
+        there, resized or not
+    
+    Returns
+    -------
+    tuple
+        (resized_frame, (scale_x, scale_y)) - multiply coordinates in the
+        resized frame by the scale to get source coordinates
+    """
+    height, width = frame.shape[:2]
+    new_width, new_height = fit_resolution(width, height, max_size) if max_size else (width, height)
+    scale = (width / float(new_width), height / float(new_height))
+    
+    if (new_width, new_height) == (width, height):
+        if out is None:
+            return frame, scale
+        np.copyto(out, frame)
+        return out, scale
+    
+    resized = cv2.resize(frame, (new_width, new_height), dst=out, interpolation=cv2.INTER_AREA)
+    return resized, scale
+
+
+def clip_roi(roi, frame_width, frame_height):
+    """
+    Clip an ROI to the frame and drop empty regions
+    
+    Parameters
+    ----------
+    roi : list or tuple
+        [x1, y1, x2, y2] in pixels
+    frame_width : int
+        Frame width
+    frame_height : int
+        Frame height
+    
+    Returns
+    -------
+    tuple or None
+        Clipped (x1, y1, x2, y2), or None if nothing is left
+    """
+    x1, y1, x2, y2 = [int(v) for v in roi]
+    x1, x2 = max(0, min(x1, x2)), min(frame_width, max(x1, x2))
+    y1, y2 = max(0, min(y1, y2)), min(frame_height, max(y1, y2))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+def line_band_roi(line_start, line_end, margin, frame_width, frame_height):
+    """
+    Get the bounding box of a band around a counting line
+    
+    Parameters
+    ----------
+    line_start : tuple
+        (x, y) of the first line end point
+    line_end : tuple
+        (x, y) of the second line end point
+    margin : int
+        Band half-width in pixels on each side of the line
+    frame_width : int
+        Frame width
+    frame_height : int
+        Frame height
+    
+    Returns
+    -------
+    tuple or None
+        (x1, y1, x2, y2) clipped to the frame
+    """
+    roi = (
+        min(line_start[0], line_end[0]) - margin,
+        min(line_start[1], line_end[1]) - margin,
+        max(line_start[0], line_end[0]) + margin,
+        max(line_start[1], line_end[1]) + margin
+    )
+    return clip_roi(roi, frame_width, frame_height)
+
+
+def frame_signature(frame, size=(160, 90)):
+    """
+    Compute a small grayscale thumbnail used to compare frames
+    
+    Area averaging removes sensor and compression noise, while a person
+    moving anywhere in the frame still changes several thumbnail pixels.
+    
+    Parameters
+    ----------
+    frame : numpy.ndarray
+        BGR or grayscale frame
+    size : tuple
+        (width, height) of the thumbnail
+    
+    Returns
+    -------
+    numpy.ndarray
+        uint8 thumbnail of shape (height, width)
+    """
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+class FramePool:
+    """
+    Reusable frame buffers to decode into (cap.retrieve(image=...))
+    
+    Ownership is explicit: a decoded frame belongs to whoever received it,
+    and its buffer is only decoded into again after release(). Frames that
+    are never released are simply garbage collected, so consumers that
+    keep frames (queues, tracking, display) never see one overwritten.
+    At most max_size free buffers are kept.
+    """
+    
+    def __init__(self, max_size=8):
+        """
+        Initialize pool
+        
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of free buffers kept (0 disables reuse)
+        """
+        self.max_size = max(0, int(max_size))
+        self.reused = 0
+        self.allocated = 0
+        self._free = []
+        self._lock = threading.Lock()  # Capture thread acquires, consumers release
+    
+    def acquire(self):
+        """
+        Get a free buffer
+        
+        Returns
+        -------
+        numpy.ndarray or None
+            A released buffer, None when there is none (the decoder
+            allocates, see adopt())
+        """
+        with self._lock:
+            return self._free.pop() if self._free else None
+    
+    def adopt(self, buffer, frame):
+        """
+        Count a decoded frame
+        
+        Parameters
+        ----------
+        buffer : numpy.ndarray or None
+            Buffer from acquire() passed to the decoder
+        frame : numpy.ndarray or None
+            Decoded frame; a new array when the decoder had to allocate
+            (no free buffer, or the frame size changed)
+        """
+        if frame is None:
+            return
+        if frame is buffer:
+            self.reused += 1
+        else:
+            self.allocated += 1
+    
+    def release(self, frame):
+        """
+        Hand a frame back for decoding into
+        
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Frame from this pool's decoder that the caller, and everything
+            it passed the frame to, no longer uses
+        """
+        if frame is None or self.max_size == 0 or frame.base is not None:
+            return  # Views share memory with a frame that may still be used
+        with self._lock:
+            if len(self._free) < self.max_size and not any(buffer is frame for buffer in self._free):
+                self._free.append(frame)
+    
+    def clear(self):
+        """Drop all free buffers"""
+        with self._lock:
+            self._free = []
+
+
+def annotation_target(frame, out=None):
+    """
+    Get the array to draw annotations into
+    
+    Parameters
+    ----------
+    frame : numpy.ndarray
+        Source frame, may be a read-only view
+    out : numpy.ndarray, optional
+        Preallocated overlay buffer of the same shape; may be frame
+        itself to draw in place
+    
+    Returns
+    -------
+    numpy.ndarray
+        out holding the frame pixels, or a copy of frame without out
+    """
+    if out is None:
+        return frame.copy()
+    if out is not frame:
+        np.copyto(out, frame)
+    return out
+
+
+def draw_detections(frame, detections, show_ids=True, box_color=(0, 255, 0), scale=None, out=None):
+    """
+    Draw bounding boxes on frame
+    
+    Parameters
+    ----------
+    frame : numpy.ndarray
+        Input frame
+    detections : Detections
+        Detections from a detector (legacy dicts are accepted too)
+    show_ids : bool
+        Whether to show track IDs
+    box_color : tuple
+        BGR color for bounding boxes
+    scale : tuple, optional
+        (scale_x, scale_y) mapping source coordinates onto frame, used
+        when drawing on a downscaled display frame
+    out : numpy.ndarray, optional
+        Overlay buffer to draw into (may be frame itself); a copy of
+        frame is made without it
+    
+    Returns
+    -------
+    numpy.ndarray
+        Annotated frame
+    """
+    annotated = annotation_target(frame, out)
+    
+    detections = Detections.from_dicts(detections)
+    if scale is not None:
+        detections = detections.scaled(*scale)
+    
+    for (x1, y1, x2, y2), confidence, track_id in zip(
+        detections.xyxy.tolist(), detections.confidence.tolist(), detections.track_id.tolist()
+    ):
+        # Draw bounding box
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), box_color, 2)
+        
+        # Prepare label text
+        label = f"Person {confidence:.2f}"
+        if show_ids and track_id >= 0:
+            label = f"ID:{track_id} {confidence:.2f}"
+        
+        # Draw label background
+        (label_width, label_height), _ = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
+        )
+        cv2.rectangle(
+            annotated,
+            (x1, y1 - label_height - 10),
+            (x1 + label_width, y1),
+            box_color,
+            -1
+        )
+        
+        # Draw label text
+        cv2.putText(
+            annotated,
+            label,
+            (x1, y1 - 5),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (0, 0, 0),  # Black text
+            1,
+            cv2.LINE_AA
+        )
+    
+    return annotated
@@ -0,0 +1,547 @@
+"""
+Process-per-camera workers with a central aggregator
+
+Every camera runs in its own worker process with its own capture,
+detector (or inference server client), tracker and counter, so the
+Python work of different cameras no longer shares one GIL. Workers send
+count events, statistics and small preview frames to the parent, which
+owns the database and the GUI and restarts crashed or hung workers.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from src.camera import CONNECTED, DISCONNECTED
+from src.config import config
+from src.utils.logger import logger
+
+# Seconds between worker statistics messages (also the heartbeat, with
+# the processed frame counter as proof that the processing loop moves)
+HEARTBEAT_INTERVAL = 1.0
+
+
+class EventForwarder:
+    """
+    Database stand-in used inside a worker
+    
+    CameraManager writes sessions and events through the same calls as
+    CounterDatabase; here they are sent to the aggregator instead.
+    """
+    
+    def __init__(self, messages):
+        """
+        Initialize forwarder
+        
+        Parameters
+        ----------
+        messages : multiprocessing.Queue
+            Queue read by the aggregator
+        """
+        self.messages = messages
+    
+    def start_session(self, camera_id='default'):
+        """Sessions are owned by the aggregator, return a placeholder id"""
+        return camera_id
+    
+    def end_session(self, session_id, total_in, total_out):
+        """Report the final counts of the worker"""
+        self.messages.put(('session_end', session_id, total_in, total_out))
+    
+    def log_event(self, direction, track_id=None, camera_id='default', count_total=0):
+        """Forward one counting event"""
+        self.messages.put(('event', camera_id, direction, track_id, count_total))
+
+
+def _create_detector():
+    """Create the detector of a worker from settings"""
+    from src.cascade import CascadeDetector
+    from src.detector import PersonDetector
+    from src.inference_server import InferenceClient
+    
+    detector = None
+    if config.get('inference_server', 'enabled', default=False):
+        # One shared model for all workers, batched across cameras
+        detector = InferenceClient.connect_if_available()
+    if detector is None:
+        detector = PersonDetector.from_config()
+        if detector.model is None:
+            raise RuntimeError("model failed to load")
+    if config.get('cascade', 'enabled', default=False):
+        detector = CascadeDetector.from_config(detector, config.get('cascade'))
+    return detector
+
+
+def _render_preview(manager, stream, frame, detections, max_size):
+    """Draw detections and the line at preview size, return JPEG bytes"""
+    from src.utils.frames import resize_to_fit
+    
+    frame, (scale_x, scale_y) = resize_to_fit(frame, max_size)
+    scale = (1.0 / scale_x, 1.0 / scale_y)
+    
+    if config.get('display', 'show_boxes'):
+        frame = manager.detector.draw_detections(
+            frame, detections,
+            show_ids=config.get('display', 'show_ids'),
+            box_color=tuple(config.get('display', 'box_color')),
+            scale=scale
+        )
+    if config.get('display', 'show_line'):
+        frame = stream.counter.draw_line(frame, color=tuple(config.get('display', 'line_color')), scale=scale)
+    
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return encoded.tobytes() if ok else None
+
+
+def worker_main(camera_id, source, messages, previews, commands, stop_event, preview_fps=10):
+    """
+    Run one camera (entry point of the worker process)
+    
+    Parameters
+    ----------
+    camera_id : str
+        Camera identifier
+    source : int or str
+        Camera index, video file path or RTSP URL
+    messages : multiprocessing.Queue
+        Events, statistics and status for the aggregator
+    previews : multiprocessing.Queue
+        Latest annotated preview frame (JPEG), size 1
+    commands : multiprocessing.Queue
+        Commands from the aggregator ('reset')
+    stop_event : multiprocessing.Event
+        Set by the aggregator to stop all workers
+    preview_fps : float
+        Preview frames sent per second
+    """
+    from src.camera_manager import CameraManager
+    
+    # A preview the GUI never took must not hold up the exit of the process
+    # (events and statistics on messages are still flushed)
+    previews.cancel_join_thread()
+    
+    try:
+        detector = _create_detector()
+    except Exception as e:
+        logger.error(f"Worker {camera_id}: cannot create detector: {e}")
+        messages.put(('failed', camera_id, str(e)))
+        return
+    
+    manager = CameraManager(detector, EventForwarder(messages))
+    stream = manager.add_camera(camera_id, source)
+    if not manager.start():
+        messages.put(('failed', camera_id, 'camera did not connect'))
+        return
+    
+    def heartbeat():
+        # Statistics double as the liveness signal, commands are polled here.
+        # This thread runs on while processing hangs, so the processed frame
+        # counter is sent along for the aggregator to check
+        while manager.is_running:
+            try:
+                command = commands.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                command = None
+            if command == 'reset':
+                manager.reset_counters()
+            if stop_event.is_set():
+                manager.stop()
+            
+            stats = stream.counter.get_stats() if stream.counter is not None else None
+            messages.put(('stats', camera_id, stats, stream.camera.get_health(), stream.frames_processed))
+    
+    threading.Thread(target=heartbeat, daemon=True).start()
+    
+    max_size = config.get('performance', 'display_resolution')
+    last_preview = [0.0]
+    
+    def on_frame(stream, frame, detections, stats):
+        now = time.monotonic()
+        if now - last_preview[0] < 1.0 / preview_fps:
+            return
+        last_preview[0] = now
+        
+        preview = _render_preview(manager, stream, frame, detections, max_size)
+        if preview is None:
+            return
+        try:
+            previews.put_nowait((preview, stats))
+        except queue.Full:
+            pass  # The GUI has not taken the previous preview yet
+    
+    logger.info(f"Worker {camera_id} running (pid {multiprocessing.current_process().pid})")
+    if config.get('pipeline', 'enabled', default=False):
+        manager.run_pipeline(on_frame=on_frame, queue_size=config.get('pipeline', 'queue_size', default=2))
+    else:
+        manager.run(on_frame=on_frame)
+    manager.release()
+    messages.put(('stopped', camera_id))
+
+
+class _WorkerCamera:
+    """Camera health reported by a worker, see Camera.get_health()"""
+    
+    def __init__(self):
+        self.state = DISCONNECTED
+        self.frozen = False
+        self._frozen_seconds = 0.0
+    
+    def update(self, health):
+        self.state = health.get('state', CONNECTED if health.get('connected') else DISCONNECTED)
+        self.frozen = health.get('frozen', False)
+        self._frozen_seconds = health.get('frozen_seconds', 0.0)
+    
+    def frozen_seconds(self):
+        return self._frozen_seconds
+
+
+class WorkerStream:
+    """
+    Aggregator-side view of one camera worker
+    
+    Has the attributes of CameraStream the GUI reads; counter and motion
+    gate live in the worker.
+    """
+    
+    def __init__(self, camera_id, source):
+        self.camera_id = camera_id
+        self.source = source
+        self.camera = _WorkerCamera()
+        self.counter = None
+        self.motion_gate = None
+        self.session_id = None
+        
+        # Worker process and its queues
+        self.process = None
+        self.previews = None
+        self.commands = None
+        self.started_at = None
+        self.last_heartbeat = None
+        self.frames_processed = None
+        self.last_progress = None
+        self.restarts = 0
+        self.restart_at = None
+        
+        # Counts of previous worker runs are carried over after a restart
+        self.base_stats = {'in': 0, 'out': 0, 'current': 0, 'total': 0}
+        self.worker_stats = dict(self.base_stats)
+    
+    def get_stats(self):
+        """Counts of this camera since start(), across worker restarts"""
+        return {key: self.base_stats[key] + self.worker_stats.get(key, 0) for key in self.base_stats}
+    
+    def carry_over(self):
+        """Keep the counts of a worker that died"""
+        self.base_stats = self.get_stats()
+        self.worker_stats = dict.fromkeys(self.base_stats, 0)
+
+
+class WorkerSupervisor:
+    """
+    Run every camera in its own process and aggregate the results
+    
+    Drop-in for CameraManager in the GUI: the same start/run/stop/release
+    calls, with run() delivering annotated preview frames. The aggregator
+    (the thread calling run()) owns the database: worker events are
+    written there with counts carried over restarts. A worker that exits
+    or stops sending heartbeats is restarted with exponential backoff, and
+    so is one whose processed frame counter stalls while its camera is
+    connected. Until its first heartbeat (model load, camera connect) a
+    worker gets the longer startup timeout.
+    """
+    
+    def __init__(self, database=None, preview_fps=10, heartbeat_timeout=15.0,
+                 restart_delay=1.0, max_restart_delay=30.0, startup_timeout=120.0):
+        """
+        Initialize supervisor
+        
+        Parameters
+        ----------
+        database : CounterDatabase, optional
+            Database for events and sessions
+        preview_fps : float
+            Preview frames per second and camera
+        heartbeat_timeout : float
+            Seconds without statistics, or without a processed frame while
+            the camera is connected, after which a worker counts as hung
+        restart_delay : float
+            Seconds before the first restart, doubled for each further one
+        max_restart_delay : float
+            Upper limit of the restart delay
+        startup_timeout : float
+            Seconds a new worker may take to send its first heartbeat
+        """
+        self.database = database
+        self.preview_fps = preview_fps
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.startup_timeout = startup_timeout
+        
+        self.streams = {}
+        self.qos = None
+        self.is_running = False
+        self.context = multiprocessing.get_context('spawn')
+        self.messages = self.context.Queue()
+        self.stop_event = self.context.Event()
+    
+    def add_camera(self, camera_id, source):
+        """
+        Add a camera source
+        
+        Parameters
+        ----------
+        camera_id : str
+            Unique camera identifier
+        source : int or str
+            Camera index, video file path or RTSP URL
+        
+        Returns
+        -------
+        WorkerStream
+            The new stream
+        """
+        if camera_id in self.streams:
+            raise ValueError(f"Duplicate camera id: {camera_id}")
+        stream = WorkerStream(camera_id, source)
+        self.streams[camera_id] = stream
+        logger.info(f"Camera {camera_id} added: {source} (worker process)")
+        return stream
+    
+    def start(self):
+        """
+        Start one worker per camera and open their database sessions
+        
+        Returns
+        -------
+        bool
+            True if at least one worker started
+        """
+        self.stop_event.clear()
+        for stream in list(self.streams.values()):
+            self._spawn(stream)
+            if self.database:
+                stream.session_id = self.database.start_session(camera_id=stream.camera_id)
+        
+        self.is_running = any(stream.process is not None for stream in self.streams.values())
+        return self.is_running
+    
+    def _spawn(self, stream):
+        """Start the worker process of a stream"""
+        stream.previews = self.context.Queue(maxsize=1)
+        stream.commands = self.context.Queue()
+        stream.process = self.context.Process(
+            target=worker_main,
+            args=(stream.camera_id, stream.source, self.messages, stream.previews,
+                  stream.commands, self.stop_event, self.preview_fps),
+            name=f"camera-{stream.camera_id}",
+            daemon=True
+        )
+        stream.process.start()
+        stream.started_at = time.monotonic()
+        stream.last_heartbeat = None  # Starting up until the first statistics
+        stream.frames_processed = None
+        stream.last_progress = stream.started_at
+        stream.restart_at = None
+        logger.info(f"Worker {stream.camera_id} started (pid {stream.process.pid})")
+    
+    def run(self, on_frame=None):
+        """
+        Aggregator loop (blocks until stop() is called)
+        
+        Parameters
+        ----------
+        on_frame : callable, optional
+            Called as on_frame(stream, frame, None, stats) with the
+            annotated preview of each camera
+        """
+        while self.is_running and self.streams:
+            self._drain_messages(timeout=0.02)
+            
+            for stream in list(self.streams.values()):
+                if on_frame and stream.previews is not None:
+                    self._deliver_preview(stream, on_frame)
+                self._supervise(stream)
+        
+        self.is_running = False
+    
+    def _drain_messages(self, timeout):
+        """Handle every pending worker message"""
+        try:
+            message = self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return
+        
+        while True:
+            try:
+                self._handle_message(message)
+            except Exception as e:
+                logger.error(f"Error handling worker message {message[0]}: {e}")
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _handle_message(self, message):
+        """Apply one worker message"""
+        kind, camera_id = message[0], message[1]
+        stream = self.streams.get(camera_id)
+        if stream is None:
+            return
+        
+        if kind == 'event':
+            _, _, direction, track_id, count_total = message
+            if self.database:
+                self.database.log_event(
+                    direction, track_id, camera_id=camera_id,
+                    count_total=stream.base_stats['current'] + count_total
+                )
+        elif kind == 'stats':
+            _, _, stats, health, frames_processed = message
+            if stream.last_heartbeat is None:
+                logger.info(f"Worker {camera_id} up after {time.monotonic() - stream.started_at:.1f}s")
+            stream.last_heartbeat = time.monotonic()
+            if stats is not None:
+                stream.worker_stats = stats
+            stream.camera.update(health)
+            
+            # No frames to process is not a hang while the camera is down
+            if frames_processed != stream.frames_processed or stream.camera.state != CONNECTED:
+                stream.frames_processed = frames_processed
+                stream.last_progress = stream.last_heartbeat
+        elif kind == 'session_end':
+            _, _, total_in, total_out = message
+            stream.worker_stats = {
+                'in': total_in, 'out': total_out,
+                'current': total_in - total_out, 'total': total_in + total_out
+            }
+        elif kind == 'failed':
+            logger.error(f"Worker {camera_id} failed: {message[2]}")
+    
+    def _deliver_preview(self, stream, on_frame):
+        """Decode the newest preview of a worker and hand it to on_frame"""
+        try:
+            preview, stats = stream.previews.get_nowait()
+        except queue.Empty:
+            return
+        
+        frame = cv2.imdecode(np.frombuffer(preview, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is not None:
+            stream.worker_stats = stats
+            on_frame(stream, frame, None, stream.get_stats())
+    
+    def _supervise(self, stream):
+        """Restart a worker that exited or stopped sending heartbeats"""
+        if stream.process is None or self.stop_event.is_set():
+            return
+        
+        now = time.monotonic()
+        if stream.restart_at is not None:
+            if now >= stream.restart_at:
+                self._spawn(stream)
+            return
+        
+        if stream.process.is_alive():
+            if stream.last_heartbeat is None:
+                if now - stream.started_at < self.startup_timeout:
+                    return
+                logger.error(f"Worker {stream.camera_id} did not start within {self.startup_timeout:.0f}s, "
+                             f"terminating")
+            elif now - stream.last_heartbeat >= self.heartbeat_timeout:
+                logger.error(f"Worker {stream.camera_id} sent no heartbeat for {self.heartbeat_timeout:.0f}s, "
+                             f"terminating")
+            elif now - stream.last_progress >= self.heartbeat_timeout:
+                logger.error(f"Worker {stream.camera_id} processed no frame for {self.heartbeat_timeout:.0f}s "
+                             f"with the camera connected, terminating")
+            else:
+                return
+            stream.process.terminate()
+            stream.process.join(timeout=2.0)
+        else:
+            logger.error(f"Worker {stream.camera_id} exited with code {stream.process.exitcode}")
+        
+        # A worker that ran for a while starts over with the shortest delay
+        if now - stream.started_at > 60:
+            stream.restarts = 0
+        delay = min(self.max_restart_delay, self.restart_delay * 2 ** stream.restarts)
+        stream.restarts += 1
+        stream.carry_over()
+        stream.restart_at = now + delay
+        stream.camera.update({'state': DISCONNECTED})
+        logger.info(f"Restarting worker {stream.camera_id} in {delay:.1f}s")
+    
+    def get_stream(self, camera_id):
+        """Get a stream by camera id"""
+        return self.streams.get(camera_id)
+    
+    def get_stats(self):
+        """
+        Get counts for every camera
+        
+        Returns
+        -------
+        dict
+            {camera_id: counter statistics}
+        """
+        return {camera_id: stream.get_stats() for camera_id, stream in list(self.streams.items())}
+    
+    def get_health(self):
+        """
+        Get the health signal of every camera
+        
+        Returns
+        -------
+        dict
+            {camera_id: health}, see CameraManager.get_health()
+        """
+        return {
+            camera_id: {
+                'state': stream.camera.state,
+                'connected': stream.camera.state == CONNECTED,
+                'frozen': stream.camera.frozen,
+                'frozen_seconds': stream.camera.frozen_seconds(),
+                'restarts': stream.restarts
+            }
+            for camera_id, stream in list(self.streams.items())
+        }
+    
+    def reset_counters(self):
+        """Reset the counters of all cameras"""
+        for stream in list(self.streams.values()):
+            stream.base_stats = dict.fromkeys(stream.base_stats, 0)
+            stream.worker_stats = dict(stream.base_stats)
+            if stream.commands is not None:
+                stream.commands.put('reset')
+    
+    def stop(self):
+        """Signal the aggregator loop and all workers to exit"""
+        self.is_running = False
+        self.stop_event.set()
+    
+    def release(self, timeout=5.0):
+        """Stop the workers, write their last events and end the sessions"""
+        self.stop()
+        deadline = time.monotonic() + timeout
+        for stream in list(self.streams.values()):
+            if stream.process is None:
+                continue
+            stream.process.join(max(deadline - time.monotonic(), 0.1))
+            if stream.process.is_alive():
+                logger.warning(f"Worker {stream.camera_id} did not stop, terminating")
+                stream.process.terminate()
+                stream.process.join(timeout=1.0)
+        
+        # Events sent while the workers were shutting down
+        self._drain_messages(timeout=0.1)
+        
+        for stream in list(self.streams.values()):
+            if self.database and stream.session_id:
+                stats = stream.get_stats()
+                self.database.end_session(stream.session_id, stats['in'], stats['out'])
+                stream.session_id = None
+            stream.process = None
+        self.streams = {}